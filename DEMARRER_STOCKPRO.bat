@@ -19,6 +19,8 @@ if %errorlevel% neq 0 (
 echo [2/3] Demarrage du moteur de base de donnees...
 :: Lance le serveur en arriere-plan
 start /min cmd /c "python manage.py runserver 0.0.0.0:8000"
+:: Lance le worker des taches de fond (exports, rapports, bons de sortie)
+start /min cmd /c "python manage.py run_stockpro_worker"
 
 echo [3/3] Ouverture de l'interface de gestion...
 :: Attend 3 secondes que le serveur se lance bien
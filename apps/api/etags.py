@@ -0,0 +1,87 @@
+"""
+Versions des ressources de l'API, conservées dans le cache partagé entre
+processus (voir CACHES).
+
+Chaque écriture sur un modèle renouvelle la version des ressources qui
+l'exposent (après validation de la transaction), qu'elle vienne du serveur
+web, d'un worker ou d'une commande. L'ETag d'une réponse est
+dérivé de cette version et de l'URL demandée : un client qui relance la
+même requête reçoit un 304 sans qu'aucune requête SQL ne soit exécutée.
+"""
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+from apps.inventory.models import Category, Inventory, InventoryItem, Item, Movement
+from apps.inventory.signals import inventory_updated, movements_posted
+from personnel.models import Department, Employee
+
+KEY_PREFIX = 'stockpro:api:version'
+
+# Modèle modifié -> ressources dont le contenu change
+DEPENDENCIES = {
+    Item: ('items', 'movements', 'inventories'),
+    Category: ('categories', 'items'),
+    Movement: ('movements', 'items'),
+    Inventory: ('inventories',),
+    InventoryItem: ('inventories',),
+    Employee: ('employees', 'movements'),
+    Department: ('employees',),
+}
+
+
+def _key(resource):
+    return f'{KEY_PREFIX}:{resource}'
+
+
+def get_version(resource):
+    version = cache.get(_key(resource))
+    if version is None:
+        # Clé absente (démarrage, cache vidé) : nouvelle version, jamais vue des clients
+        version = time.time_ns()
+        cache.add(_key(resource), version, None)
+        version = cache.get(_key(resource), version)
+    return version
+
+
+def bump(*resources):
+    # Nouvelle version horodatée plutôt qu'un incrément : une seule écriture,
+    # et jamais une version déjà servie si la clé avait expiré
+    version = time.time_ns()
+    cache.set_many({_key(resource): version for resource in resources}, None)
+
+
+def compute_etag(resource, request):
+    raw = f'{get_version(resource)}:{request.version}:{request.get_full_path()}'
+    return '"%s"' % hashlib.md5(raw.encode()).hexdigest()
+
+
+def etag_matches(etag, header):
+    """Comparaison faible : la compression gzip transforme l'ETag en W/"..." """
+    if not header:
+        return False
+    if header.strip() == '*':
+        return True
+    candidates = [value.strip() for value in header.split(',')]
+    return any(value.removeprefix('W/') == etag for value in candidates)
+
+
+# --- INVALIDATION ---
+
+def _on_change(sender, **kwargs):
+    resources = DEPENDENCIES[sender]
+    transaction.on_commit(lambda: bump(*resources))
+
+
+for model in DEPENDENCIES:
+    post_save.connect(_on_change, sender=model, dispatch_uid=f'api_etag_save_{model.__name__}')
+    post_delete.connect(_on_change, sender=model, dispatch_uid=f'api_etag_delete_{model.__name__}')
+
+# Postage par lot (bulk_create + UPDATE) : pas de post_save
+movements_posted.connect(_on_change, sender=Movement, dispatch_uid='api_etag_movements_posted')
+
+# Comptages enregistrés par UPDATE ensembliste
+inventory_updated.connect(_on_change, sender=Inventory, dispatch_uid='api_etag_inventory_updated')
@@ -0,0 +1,15 @@
+from rest_framework.pagination import CursorPagination
+
+
+class StockProCursorPagination(CursorPagination):
+    """
+    Pagination par curseur : chaque page reprend après la dernière ligne
+    servie, sans OFFSET. L'ordre est celui déclaré par la vue (attribut ordering).
+    """
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    ordering = ('id',)
+
+    def get_ordering(self, request, queryset, view):
+        self.ordering = getattr(view, 'ordering', self.ordering)
+        return super().get_ordering(request, queryset, view)
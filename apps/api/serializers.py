@@ -0,0 +1,64 @@
+from rest_framework import serializers
+
+from apps.inventory.models import Category, Inventory, InventoryItem, Item, Movement
+from personnel.models import Employee
+
+
+class DynamicFieldsModelSerializer(serializers.ModelSerializer):
+    """
+    Sérialiseur restreint aux champs demandés (?fields=id,name,...).
+    Les champs inconnus sont ignorés.
+    """
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        if fields:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class CategorySerializer(DynamicFieldsModelSerializer):
+    class Meta:
+        model = Category
+        fields = ['id', 'name']
+
+
+class ItemSerializer(DynamicFieldsModelSerializer):
+    category_name = serializers.CharField(source='category.name', read_only=True)
+
+    class Meta:
+        model = Item
+        fields = ['id', 'name', 'category', 'category_name', 'quantity', 'unit_price', 'status']
+
+
+class MovementSerializer(DynamicFieldsModelSerializer):
+    item_name = serializers.CharField(source='item.name', read_only=True)
+    beneficiary_name = serializers.CharField(source='beneficiary.name', read_only=True, default=None)
+
+    class Meta:
+        model = Movement
+        fields = ['id', 'date', 'item', 'item_name', 'type_mouvement', 'quantite', 'beneficiary', 'beneficiary_name']
+
+
+class InventoryItemSerializer(DynamicFieldsModelSerializer):
+    item_name = serializers.CharField(source='item.name', read_only=True)
+
+    class Meta:
+        model = InventoryItem
+        fields = ['id', 'item', 'item_name', 'expected_quantity', 'actual_quantity']
+
+
+class InventorySerializer(DynamicFieldsModelSerializer):
+    # Lignes de comptage servies à part, paginées (/inventories/<id>/items/)
+    class Meta:
+        model = Inventory
+        fields = ['id', 'date', 'description', 'category', 'status', 'closed_at']
+
+
+class EmployeeSerializer(DynamicFieldsModelSerializer):
+    department_name = serializers.CharField(source='department.name', read_only=True)
+
+    class Meta:
+        model = Employee
+        fields = ['id', 'name', 'department', 'department_name']
@@ -1,3 +1,112 @@
+import gzip
+import json
+
+from django.contrib.auth.models import User
 from django.test import TestCase
 
-# Create your tests here.
+from apps.inventory.models import Category, Inventory, InventoryItem, Item, Movement
+from personnel.models import Department, Employee
+
+
+class ApiTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('scanner', 'scanner@test.com', 'pass')
+        self.client.force_login(self.user)
+        self.cat = Category.objects.create(name='Informatique')
+        self.items = Item.objects.bulk_create([
+            Item(name=f'Câble {i}', category=self.cat, quantity=100, unit_price=2500) for i in range(12)
+        ])
+        self.employee = Employee.objects.create(name='Awa Ndiaye', department=Department.objects.create(name='DAF'))
+        Movement.objects.post_batch([
+            {'item': item, 'type_mouvement': 'SORTIE', 'quantite': 2, 'beneficiary': self.employee}
+            for item in self.items
+        ])
+
+    def _get(self, url, **headers):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.get(url, **headers)
+
+    def test_authentification_requise(self):
+        self.client.logout()
+        self.assertEqual(self.client.get('/api/v1/items/').status_code, 403)
+
+    def test_version_inconnue(self):
+        self.assertEqual(self.client.get('/api/v2/items/').status_code, 404)
+
+    def test_liste_articles(self):
+        data = self._get('/api/v1/items/').json()
+        first = data['results'][0]
+        self.assertEqual(first['category_name'], 'Informatique')
+        self.assertEqual(first['quantity'], 98)
+
+    def test_pagination_par_curseur(self):
+        page = self._get('/api/v1/items/?page_size=5').json()
+        seen = [row['id'] for row in page['results']]
+        while page['next']:
+            page = self._get(page['next']).json()
+            seen += [row['id'] for row in page['results']]
+        self.assertEqual(seen, sorted(item.pk for item in self.items))
+
+    def test_selection_des_champs_sans_jointure(self):
+        with self.assertNumQueries(3):  # session, utilisateur, page
+            data = self._get('/api/v1/movements/?fields=id,quantite').json()
+        self.assertEqual(set(data['results'][0]), {'id', 'quantite'})
+
+    def test_requetes_constantes_avec_relations(self):
+        with self.assertNumQueries(3):
+            data = self._get('/api/v1/movements/').json()
+        self.assertEqual(len(data['results']), 12)
+        self.assertEqual(data['results'][0]['beneficiary_name'], 'Awa Ndiaye')
+
+    def test_inventaires_et_lignes_paginees(self):
+        inventory = Inventory.objects.create(description='Annuel')
+        for item in self.items[:5]:
+            InventoryItem.objects.create(inventory=inventory, item=item, actual_quantity=90)
+        with self.assertNumQueries(3):  # session, utilisateur, inventaires (sans les lignes)
+            data = self._get('/api/v1/inventories/').json()
+        self.assertNotIn('items', data['results'][0])
+
+        url = f'/api/v1/inventories/{inventory.pk}/items/?page_size=2'
+        with self.assertNumQueries(4):  # session, utilisateur, inventaire, page de lignes
+            page = self._get(url).json()
+        seen = [row['item_name'] for row in page['results']]
+        while page['next']:
+            page = self._get(page['next']).json()
+            seen += [row['item_name'] for row in page['results']]
+        self.assertEqual(seen, [item.name for item in self.items[:5]])
+        self.assertEqual(self._get('/api/v1/inventories/0/items/').status_code, 404)
+
+    def test_filtres_mouvements(self):
+        url = f'/api/v1/movements/?item={self.items[0].pk}&type=SORTIE'
+        self.assertEqual(len(self._get(url).json()['results']), 1)
+
+    def test_get_conditionnel(self):
+        response = self._get('/api/v1/items/')
+        etag = response['ETag']
+        with self.assertNumQueries(2):  # session et utilisateur seulement
+            cached = self._get('/api/v1/items/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(cached.content, b'')
+
+        # Un mouvement posté change la version des articles
+        with self.captureOnCommitCallbacks(execute=True):
+            Movement.objects.create(item=self.items[0], type_mouvement='ENTREE', quantite=1)
+        self.assertEqual(self._get('/api/v1/items/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_etag_propre_a_la_requete(self):
+        first = self._get('/api/v1/items/')['ETag']
+        self.assertNotEqual(first, self._get('/api/v1/items/?fields=id')['ETag'])
+        self.assertNotEqual(first, self._get('/api/v1/categories/')['ETag'])
+
+    def test_gzip(self):
+        response = self._get('/api/v1/items/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        data = json.loads(gzip.decompress(response.content))
+        self.assertEqual(len(data['results']), 12)
+        # ETag affaibli par la compression : toujours accepté
+        cached = self._get('/api/v1/items/', HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(cached.status_code, 304)
+
+    def test_employes_et_categories(self):
+        self.assertEqual(self._get('/api/v1/employees/').json()['results'][0]['department_name'], 'DAF')
+        self.assertEqual(self._get(f'/api/v1/categories/{self.cat.pk}/').json()['name'], 'Informatique')
@@ -1,5 +1,18 @@
-from django.urls import path
+from django.urls import include, re_path
+from rest_framework.routers import DefaultRouter
+
+from . import views
 
 app_name = 'api'
 
-urlpatterns = []
+router = DefaultRouter()
+router.register('items', views.ItemViewSet, basename='item')
+router.register('categories', views.CategoryViewSet, basename='category')
+router.register('movements', views.MovementViewSet, basename='movement')
+router.register('inventories', views.InventoryViewSet, basename='inventory')
+router.register('employees', views.EmployeeViewSet, basename='employee')
+
+urlpatterns = [
+    # Version dans l'URL : /api/v1/items/
+    re_path(r'^(?P<version>v1)/', include(router.urls)),
+]
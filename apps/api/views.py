@@ -1,3 +1,170 @@
-from django.shortcuts import render
+from django.core.exceptions import ValidationError
+from django.shortcuts import get_object_or_404
+from django.utils.decorators import method_decorator
+from django.views.decorators.gzip import gzip_page
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied
+from rest_framework.response import Response
 
-# Create your views here.
+from apps.inventory.counts import record_counts
+from apps.inventory.exports import filter_date_range
+from apps.inventory.models import Category, Inventory, InventoryItem, Item, Movement
+from personnel.models import Employee
+
+from . import serializers
+from .etags import compute_etag, etag_matches
+
+
+@method_decorator(gzip_page, name='dispatch')
+class StockProViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Base des vues de l'API :
+    - ?fields= restreint les champs, et donc les jointures effectuées ;
+    - GET conditionnel : ETag tiré de la version de la ressource, 304 sans
+      aucune requête SQL si le client a déjà la réponse ;
+    - réponses compressées (gzip) si le client l'accepte.
+    """
+    resource = None
+    # Champ sérialisé -> relation à joindre (select_related) ou précharger
+    select_related_fields = {}
+    prefetch_related_fields = {}
+
+    def requested_fields(self):
+        fields = self.request.query_params.get('fields')
+        if not fields:
+            return None
+        return [name.strip() for name in fields.split(',') if name.strip()]
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs.setdefault('fields', self.requested_fields())
+        return super().get_serializer(*args, **kwargs)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        fields = self.requested_fields()
+        wanted = lambda name: fields is None or name in fields  # noqa: E731
+        joins = {relation for name, relation in self.select_related_fields.items() if wanted(name)}
+        if joins:
+            queryset = queryset.select_related(*joins)
+        for name, lookup in self.prefetch_related_fields.items():
+            if wanted(name):
+                queryset = queryset.prefetch_related(lookup)
+        return self.filter_queryset_params(queryset)
+
+    def filter_queryset_params(self, queryset):
+        """Filtres propres à la ressource (paramètres de l'URL)"""
+        return queryset
+
+    def _conditional(self, handler, request, *args, **kwargs):
+        etag = compute_etag(self.resource, request)
+        if etag_matches(etag, request.headers.get('If-None-Match')):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = handler(request, *args, **kwargs)
+        if response.status_code in (status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED):
+            response['ETag'] = etag
+            # Le client revalide à chaque fois (réponse 304 si rien n'a changé)
+            response['Cache-Control'] = 'private, no-cache'
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self._conditional(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._conditional(super().retrieve, request, *args, **kwargs)
+
+
+class CategoryViewSet(StockProViewSet):
+    resource = 'categories'
+    queryset = Category.objects.all()
+    serializer_class = serializers.CategorySerializer
+    ordering = ('id',)
+
+
+class ItemViewSet(StockProViewSet):
+    """Articles ; filtres : ?category=<id>, ?status="""
+    resource = 'items'
+    queryset = Item.objects.all()
+    serializer_class = serializers.ItemSerializer
+    select_related_fields = {'category_name': 'category'}
+    ordering = ('id',)
+
+    def filter_queryset_params(self, queryset):
+        params = self.request.query_params
+        if params.get('category', '').isdigit():
+            queryset = queryset.filter(category_id=params['category'])
+        if params.get('status'):
+            queryset = queryset.filter(status=params['status'])
+        return queryset
+
+
+class MovementViewSet(StockProViewSet):
+    """Mouvements, plus récents d'abord ; filtres : ?item=<id>, ?type=, ?start= et ?end= (AAAA-MM-JJ)"""
+    resource = 'movements'
+    queryset = Movement.objects.all()
+    serializer_class = serializers.MovementSerializer
+    select_related_fields = {'item_name': 'item', 'beneficiary_name': 'beneficiary'}
+    ordering = ('-date', '-id')
+
+    def filter_queryset_params(self, queryset):
+        params = self.request.query_params
+        if params.get('item', '').isdigit():
+            queryset = queryset.filter(item_id=params['item'])
+        if params.get('type'):
+            queryset = queryset.filter(type_mouvement=params['type'])
+        return filter_date_range(queryset, params.get('start'), params.get('end'))
+
+
+class InventoryViewSet(StockProViewSet):
+    """Sessions d'inventaire ; leurs lignes (jusqu'à des dizaines de milliers) sous /<id>/items/"""
+    resource = 'inventories'
+    queryset = Inventory.objects.all()
+    serializer_class = serializers.InventorySerializer
+    ordering = ('-date', '-id')
+
+    @action(detail=True, methods=['get'])
+    def items(self, request, pk=None, version=None):
+        return self._conditional(self._items, request, pk=pk)
+
+    def _items(self, request, pk=None):
+        """Lignes de comptage, paginées par curseur sur l'identifiant (?page_size=, ?fields=)"""
+        inventory = get_object_or_404(Inventory.objects.only('pk'), pk=pk)
+        lines = InventoryItem.objects.filter(inventory=inventory)
+        fields = self.requested_fields()
+        if fields is None or 'item_name' in fields:
+            lines = lines.select_related('item')
+        # Ordre de pagination des lignes, et non celui des sessions
+        self.ordering = ('id',)
+        page = self.paginate_queryset(lines)
+        serializer = serializers.InventoryItemSerializer(page, many=True, fields=fields)
+        return self.get_paginated_response(serializer.data)
+
+    @action(detail=True, methods=['post'])
+    def counts(self, request, pk=None, version=None):
+        """
+        Comptages envoyés par les scanners, par lots :
+        {"counts": [{"item": 12, "quantity": 4}, ...], "mode": "add" | "set"}
+        """
+        if not request.user.has_perm('inventory.change_inventoryitem'):
+            raise PermissionDenied
+        # Pas de get_object() : il préchargerait toutes les lignes de l'inventaire
+        inventory = get_object_or_404(Inventory, pk=pk)
+        try:
+            counts = [(int(row['item']), row['quantity']) for row in request.data.get('counts', [])]
+        except (KeyError, TypeError, ValueError):
+            return Response({'detail': "Format attendu : {\"counts\": [{\"item\": id, \"quantity\": n}]}"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            updated, errors = record_counts(inventory, counts, add=request.data.get('mode') == 'add')
+        except ValidationError as exc:
+            return Response({'detail': exc.messages[0]}, status=status.HTTP_409_CONFLICT)
+        return Response({'updated': updated, 'errors': errors})
+
+
+class EmployeeViewSet(StockProViewSet):
+    resource = 'employees'
+    queryset = Employee.objects.all()
+    serializer_class = serializers.EmployeeSerializer
+    select_related_fields = {'department_name': 'department'}
+    ordering = ('id',)
@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        # Temps de rendu des gabarits relevé par core.instrumentation
+        from .instrumentation import install_template_timer
+        install_template_timer()
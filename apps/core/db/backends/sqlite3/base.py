@@ -0,0 +1,87 @@
+"""
+Moteur SQLite de StockPro (ENGINE 'core.db.backends.sqlite3').
+
+Identique au moteur Django, avec deux options supplémentaires dans
+DATABASES[...]['OPTIONS'] :
+  - 'pragmas'          : PRAGMA exécutés à l'ouverture de chaque connexion
+                         (journal_mode, synchronous, busy_timeout, ...) ;
+  - 'transaction_mode' : DEFERRED, IMMEDIATE ou EXCLUSIVE pour le BEGIN des
+                         blocs atomic(). En IMMEDIATE, le verrou d'écriture
+                         est pris dès le début de la transaction : un
+                         écrivain concurrent attend (busy_timeout) au lieu
+                         d'échouer sur « database is locked » quand deux
+                         lectures veulent devenir des écritures.
+
+Pendant les tests, un alias déclaré miroir (TEST['MIRROR'], ex. 'replica')
+d'une base en mémoire partage la connexion de son primaire : il voit ainsi
+les données non validées des TestCase, comme une réplica à jour.
+"""
+import re
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.sqlite3 import base
+
+TRANSACTION_MODES = ('DEFERRED', 'IMMEDIATE', 'EXCLUSIVE')
+PRAGMA_NAME = re.compile(r'^[a-z_]+$')
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def __init__(self, settings_dict, *args, **kwargs):
+        super().__init__(settings_dict, *args, **kwargs)
+        options = settings_dict.get('OPTIONS', {})
+        self.pragmas = dict(options.get('pragmas', {}))
+        self.transaction_mode = options.get('transaction_mode')
+        if self.transaction_mode is not None and self.transaction_mode.upper() not in TRANSACTION_MODES:
+            raise ImproperlyConfigured(
+                f"transaction_mode SQLite invalide : {self.transaction_mode!r} ({', '.join(TRANSACTION_MODES)})"
+            )
+        for name in self.pragmas:
+            if not PRAGMA_NAME.match(name):
+                raise ImproperlyConfigured(f"PRAGMA SQLite invalide : {name!r}")
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        # Options propres à ce moteur : ne sont pas des arguments de sqlite3.connect()
+        params.pop('pragmas', None)
+        params.pop('transaction_mode', None)
+        return params
+
+    def _test_primary(self):
+        """Connexion du primaire si cet alias est un miroir de test en mémoire"""
+        mirror = self.settings_dict.get('TEST', {}).get('MIRROR')
+        if mirror and self.is_in_memory_db():
+            from django.db import connections
+            return connections[mirror]
+        return None
+
+    def get_new_connection(self, conn_params):
+        primary = self._test_primary()
+        if primary is not None:
+            primary.ensure_connection()
+            return primary.connection
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.pragmas.items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    # Connexion partagée : fermeture et transactions restent au primaire
+
+    def _close(self):
+        if self._test_primary() is None:
+            super()._close()
+
+    def _commit(self):
+        if self._test_primary() is None:
+            super()._commit()
+
+    def _rollback(self):
+        if self._test_primary() is None:
+            super()._rollback()
+
+    def _start_transaction_under_autocommit(self):
+        if self._test_primary() is not None:
+            return
+        if self.transaction_mode:
+            self.cursor().execute(f'BEGIN {self.transaction_mode.upper()}')
+        else:
+            super()._start_transaction_under_autocommit()
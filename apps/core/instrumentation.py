@@ -0,0 +1,163 @@
+"""
+Instrumentation des vues, actions admin et tâches de fond de StockPro.
+
+Pour chaque requête (middleware InstrumentationMiddleware) ou tâche
+(reports.jobs.run_job), Measurement relève :
+  - le nombre de requêtes SQL et le temps passé en base, toutes connexions
+    confondues (connection.execute_wrapper) ;
+  - le temps de rendu des gabarits (Template.render du moteur Django) ;
+  - la durée totale et, pour une réponse HTTP, sa taille.
+
+Les valeurs alimentent des histogrammes Prometheus étiquetés par type
+(view, action, job) et par nom (nom d'URL, action admin ou type de tâche),
+exportés avec ceux de django_prometheus sur /metrics. Une requête lente
+(STOCKPRO_SLOW_REQUEST_MS) ou trop bavarde (STOCKPRO_SLOW_REQUEST_QUERIES)
+est journalisée sur le logger 'stockpro.slow_requests' avec son SQL,
+regroupé par instruction : un N+1 apparaît comme une même requête répétée.
+"""
+import contextvars
+import logging
+import time
+from collections import Counter, defaultdict
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from prometheus_client import Histogram
+
+logger = logging.getLogger('stockpro.slow_requests')
+
+LABELS = ('kind', 'endpoint')
+
+QUERIES = Histogram(
+    'stockpro_db_queries', "Requêtes SQL par vue, action admin ou tâche", LABELS,
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 5000),
+)
+DB_SECONDS = Histogram(
+    'stockpro_db_seconds', "Temps passé en base (s)", LABELS,
+    buckets=(.001, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10, 30),
+)
+TEMPLATE_SECONDS = Histogram(
+    'stockpro_template_seconds', "Temps de rendu des gabarits (s)", LABELS,
+    buckets=(.001, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5),
+)
+DURATION_SECONDS = Histogram(
+    'stockpro_duration_seconds', "Durée totale (s)", LABELS,
+    buckets=(.005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10, 30, 60, 300),
+)
+RESPONSE_BYTES = Histogram(
+    'stockpro_response_bytes', "Taille des réponses (octets)", LABELS,
+    buckets=(256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216),
+)
+
+_current = contextvars.ContextVar('stockpro_measurement', default=None)
+
+
+def _setting(name, default):
+    # Lu à chaque mesure : modifiable par override_settings
+    return getattr(settings, name, default)
+
+
+class Measurement:
+    """Relevé des requêtes SQL et du rendu des gabarits, à utiliser avec « with »"""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.duration = 0.0
+        self.statements = []  # [(sql, durée)], limité à STOCKPRO_SLOW_REQUEST_MAX_SQL
+        self._max_statements = _setting('STOCKPRO_SLOW_REQUEST_MAX_SQL', 200)
+        self._rendering = False
+
+    def __enter__(self):
+        self._stack = ExitStack()
+        for connection in connections.all():
+            self._stack.enter_context(connection.execute_wrapper(self._record_query))
+        self._token = _current.set(self)
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.duration = time.perf_counter() - self._started
+        _current.reset(self._token)
+        self._stack.close()
+        return False
+
+    def _record_query(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.queries += 1
+            self.db_time += elapsed
+            if len(self.statements) < self._max_statements:
+                self.statements.append((sql, elapsed))
+
+    def observe(self, kind, endpoint, response_size=None):
+        """Alimente les histogrammes et journalise la mesure si elle est lente"""
+        labels = (kind, endpoint)
+        QUERIES.labels(*labels).observe(self.queries)
+        DB_SECONDS.labels(*labels).observe(self.db_time)
+        TEMPLATE_SECONDS.labels(*labels).observe(self.template_time)
+        DURATION_SECONDS.labels(*labels).observe(self.duration)
+        if response_size is not None:
+            RESPONSE_BYTES.labels(*labels).observe(response_size)
+        if self.is_slow():
+            self.log(kind, endpoint)
+
+    def is_slow(self):
+        slow_ms = _setting('STOCKPRO_SLOW_REQUEST_MS', 1000)
+        slow_queries = _setting('STOCKPRO_SLOW_REQUEST_QUERIES', 100)
+        return (
+            (slow_ms is not None and self.duration * 1000 >= slow_ms)
+            or (slow_queries is not None and self.queries >= slow_queries)
+        )
+
+    def log(self, kind, endpoint):
+        counts = Counter()
+        times = defaultdict(float)
+        for sql, elapsed in self.statements:
+            counts[sql] += 1
+            times[sql] += elapsed
+        lines = [
+            f"  {counts[sql]:>4} x {times[sql] * 1000:8.1f} ms  {sql}"
+            for sql in sorted(times, key=times.get, reverse=True)
+        ]
+        if self.queries > len(self.statements):
+            lines.append(f"  ... {self.queries - len(self.statements)} requêtes non relevées")
+        logger.warning(
+            "%s %s : %.0f ms, %d requêtes SQL (%.0f ms en base), gabarits %.0f ms\n%s",
+            kind, endpoint, self.duration * 1000, self.queries, self.db_time * 1000,
+            self.template_time * 1000, '\n'.join(lines),
+        )
+
+
+# --- RENDU DES GABARITS ---
+
+def install_template_timer():
+    """
+    Chronomètre Template.render du moteur Django pendant une mesure. Seul le
+    rendu de premier niveau est compté (les gabarits inclus sont dedans).
+    """
+    from django.template.backends.django import Template
+
+    if getattr(Template.render, 'stockpro_timed', False):
+        return
+    render = Template.render
+
+    def timed_render(self, context=None, request=None):
+        measurement = _current.get()
+        if measurement is None or measurement._rendering:
+            return render(self, context, request)
+        measurement._rendering = True
+        started = time.perf_counter()
+        try:
+            return render(self, context, request)
+        finally:
+            measurement.template_time += time.perf_counter() - started
+            measurement._rendering = False
+
+    timed_render.stockpro_timed = True
+    Template.render = timed_render
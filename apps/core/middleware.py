@@ -0,0 +1,51 @@
+from django.conf import settings
+
+from .instrumentation import Measurement
+
+UNRESOLVED = '<non résolue>'
+
+
+OTHER_ACTION = 'other'
+
+
+def _action(request, match):
+    """
+    Nom de l'action postée sur une liste admin si le ModelAdmin l'enregistre
+    pour cet utilisateur authentifié, sinon 'other' : une valeur libre du
+    formulaire ne crée pas de nouvelle série de métriques.
+    """
+    model_admin = getattr(match.func, 'model_admin', None)
+    user = getattr(request, 'user', None)
+    action = request.POST.get('action')
+    if model_admin is None or user is None or not user.is_authenticated:
+        return OTHER_ACTION
+    return action if action in model_admin.get_actions(request) else OTHER_ACTION
+
+
+def _endpoint(request):
+    """(type, nom) : action admin si le formulaire d'une liste admin en déclenche une, sinon nom d'URL"""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'view', UNRESOLVED
+    if request.method == 'POST' and match.namespace == 'admin' and match.url_name.endswith('_changelist'):
+        if request.POST.get('action'):
+            return 'action', f"{match.url_name[:-len('_changelist')]}.{_action(request, match)}"
+    return 'view', match.view_name
+
+
+class InstrumentationMiddleware:
+    """Mesure chaque requête (voir core.instrumentation) ; désactivable par STOCKPRO_INSTRUMENTATION"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not getattr(settings, 'STOCKPRO_INSTRUMENTATION', True):
+            return self.get_response(request)
+        with Measurement() as measurement:
+            response = self.get_response(request)
+        # Réponse en flux (exports) : taille inconnue avant la fin de l'envoi
+        size = None if response.streaming else len(response.content)
+        kind, endpoint = _endpoint(request)
+        measurement.observe(kind, endpoint, size)
+        return response
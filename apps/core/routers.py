@@ -0,0 +1,57 @@
+"""
+Routage des lectures lourdes vers l'alias de lecture (réplica).
+
+Les écritures vont toujours sur 'default'. Les lectures aussi, sauf dans
+un bloc read_replica() (ou une fonction décorée par replica_reads) :
+rapports, exports et tableau de bord y lisent depuis STOCKPRO_READ_ALIAS,
+pour ne pas concurrencer le postage des mouvements sur le primaire.
+Les données lues peuvent avoir le léger retard de la réplication.
+"""
+import contextvars
+import functools
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+_replica_reads = contextvars.ContextVar('stockpro_replica_reads', default=False)
+
+
+def read_alias():
+    alias = getattr(settings, 'STOCKPRO_READ_ALIAS', 'replica')
+    return alias if alias in settings.DATABASES else DEFAULT_DB_ALIAS
+
+
+@contextmanager
+def read_replica():
+    """Lectures du bloc envoyées sur l'alias de lecture"""
+    token = _replica_reads.set(True)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+def replica_reads(function):
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        with read_replica():
+            return function(*args, **kwargs)
+    return wrapper
+
+
+class ReadReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if _replica_reads.get():
+            return read_alias()
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Primaire et réplica portent les mêmes données
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
@@ -0,0 +1,58 @@
+"""
+Lanceur de tests : cache en mémoire du processus à la place du cache
+partagé (Redis ou fichiers sous CACHE_DIR), que les tests ne touchent
+jamais. Il est vidé avant chaque test : dans un TestCase, les on_commit ne
+s'exécutent pas et les versions du catalogue ne changent donc pas d'un test
+à l'autre.
+"""
+import unittest
+
+from django.core.cache import caches
+from django.test import runner
+from django.test.utils import override_settings
+
+TEST_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'stockpro-tests',
+    }
+}
+
+
+def use_test_caches(*args):
+    override = override_settings(CACHES=TEST_CACHES)
+    override.enable()
+    return override
+
+
+class CacheResetMixin:
+    def startTest(self, test):
+        for cache in caches.all(initialized_only=True):
+            cache.clear()
+        super().startTest(test)
+
+
+class RemoteTestRunner(runner.RemoteTestRunner):
+    resultclass = type('RemoteTestResult', (CacheResetMixin, runner.RemoteTestResult), {})
+
+
+class ParallelTestSuite(runner.ParallelTestSuite):
+    # Processus lancés par spawn : réglages relus, cache de test réappliqué
+    process_setup = use_test_caches
+    runner_class = RemoteTestRunner
+
+
+class StockproTestRunner(runner.DiscoverRunner):
+    parallel_test_suite = ParallelTestSuite
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._caches = use_test_caches()
+
+    def teardown_test_environment(self, **kwargs):
+        self._caches.disable()
+        super().teardown_test_environment(**kwargs)
+
+    def get_resultclass(self):
+        resultclass = super().get_resultclass() or unittest.TextTestResult
+        return type(resultclass.__name__, (CacheResetMixin, resultclass), {})
@@ -1,3 +1,207 @@
-from django.test import TestCase
+import os
+import shutil
+import tempfile
+import threading
+import time
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connections, transaction
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from prometheus_client import REGISTRY
+
+from apps.inventory.dashboard import compute_metrics
+from apps.inventory.models import Category, Item, Movement
+from core.routers import ReadReplicaRouter, read_replica
+from reports.jobs import claim_next, enqueue, run_job
+
+
+def sample(name, kind, endpoint):
+    return REGISTRY.get_sample_value(name, {'kind': kind, 'endpoint': endpoint}) or 0
+
+
+class InstrumentationTest(TestCase):
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        self.user = User.objects.create_superuser('admin', 'admin@test.com', 'pass')
+        self.client.force_login(self.user)
+        cat = Category.objects.create(name='Papeterie')
+        self.items = [Item.objects.create(name=f'Ramette {i}', category=cat, quantity=50, unit_price=3500) for i in range(3)]
+
+    def test_vue_etiquetee_par_nom_d_url(self):
+        count = sample('stockpro_db_queries_count', 'view', 'inventory:item_list')
+        queries = sample('stockpro_db_queries_sum', 'view', 'inventory:item_list')
+        response = self.client.get('/items/')
+        self.assertEqual(sample('stockpro_db_queries_count', 'view', 'inventory:item_list'), count + 1)
+        self.assertGreater(sample('stockpro_db_queries_sum', 'view', 'inventory:item_list'), queries)
+        self.assertGreater(sample('stockpro_template_seconds_sum', 'view', 'inventory:item_list'), 0)
+        self.assertGreaterEqual(
+            sample('stockpro_response_bytes_sum', 'view', 'inventory:item_list'), len(response.content)
+        )
+
+    def test_action_admin_etiquetee_par_nom_d_action(self):
+        endpoint = 'inventory_item.export_as_csv'
+        count = sample('stockpro_db_queries_count', 'action', endpoint)
+        self.client.post('/admin/inventory/item/', {
+            'action': 'export_as_csv', '_selected_action': [item.pk for item in self.items],
+        })
+        self.assertEqual(sample('stockpro_db_queries_count', 'action', endpoint), count + 1)
+
+    def test_action_inconnue_ou_anonyme_etiquetee_other(self):
+        endpoint = 'inventory_item.other'
+        count = sample('stockpro_db_queries_count', 'action', endpoint)
+        self.client.post('/admin/inventory/item/', {'action': 'x' * 200, '_selected_action': [self.items[0].pk]})
+        self.client.logout()
+        self.client.post('/admin/inventory/item/', {'action': 'export_as_csv', '_selected_action': [self.items[0].pk]})
+        self.assertEqual(sample('stockpro_db_queries_count', 'action', endpoint), count + 2)
+        self.assertEqual(sample('stockpro_db_queries_count', 'action', 'inventory_item.' + 'x' * 200), 0)
+
+    def test_metriques_activees_et_reservees(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 404)
+        with self.settings(STOCKPRO_METRICS_ENABLED=True, STOCKPRO_METRICS_ALLOWED_IPS=['10.0.0.5']):
+            self.assertContains(self.client.get('/metrics'), 'stockpro_db_queries')
+            self.client.logout()
+            self.assertEqual(self.client.get('/metrics').status_code, 403)
+            self.assertEqual(self.client.get('/metrics', REMOTE_ADDR='10.0.0.5').status_code, 200)
+
+    @override_settings(STOCKPRO_SLOW_REQUEST_MS=None, STOCKPRO_SLOW_REQUEST_QUERIES=1)
+    def test_journal_des_requetes_lentes_avec_le_sql(self):
+        with self.assertLogs('stockpro.slow_requests', 'WARNING') as logs:
+            self.client.get(f'/items/{self.items[0].pk}/')
+        self.assertIn('view inventory:item_detail', logs.output[0])
+        self.assertIn('FROM "inventory_item"', logs.output[0])
+
+    @override_settings(STOCKPRO_SLOW_REQUEST_MS=None, STOCKPRO_SLOW_REQUEST_QUERIES=None)
+    def test_pas_de_journal_sous_les_seuils(self):
+        with self.assertNoLogs('stockpro.slow_requests', 'WARNING'):
+            self.client.get('/items/')
+
+    def test_taches_de_fond_mesurees(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        count = sample('stockpro_db_queries_count', 'job', 'export_items_csv')
+        self.client.post('/admin/inventory/item/', {
+            'action': 'export_as_csv', '_selected_action': [item.pk for item in self.items],
+        })
+        with self.settings(MEDIA_ROOT=media_root):
+            run_job(claim_next())
+        self.assertEqual(sample('stockpro_db_queries_count', 'job', 'export_items_csv'), count + 1)
+
+
+class ReadReplicaRouterTest(TestCase):
+    """Configuration de test à deux alias : 'replica' est un miroir de 'default'"""
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        cat = Category.objects.create(name='Papeterie')
+        self.item = Item.objects.create(name='Ramette', category=cat, quantity=50, unit_price=3500)
+
+    def test_decisions_du_routeur(self):
+        router = ReadReplicaRouter()
+        self.assertEqual(router.db_for_read(Item), 'default')
+        with read_replica():
+            self.assertEqual(router.db_for_read(Item), 'replica')
+            self.assertEqual(router.db_for_write(Movement), 'default')
+        self.assertEqual(router.db_for_read(Item), 'default')
+        self.assertTrue(router.allow_migrate('default', 'inventory'))
+        self.assertFalse(router.allow_migrate('replica', 'inventory'))
+
+    def test_postage_sur_le_primaire_lecture_sur_la_replica(self):
+        with read_replica():
+            movement = Movement.objects.create(item=self.item, type_mouvement='SORTIE', quantite=5)
+            self.assertEqual(movement._state.db, 'default')
+            item = Item.objects.get(pk=self.item.pk)
+        self.assertEqual(item._state.db, 'replica')
+        self.assertEqual(item.quantity, 45)
+
+    def test_tableau_de_bord_lu_sur_la_replica(self):
+        with CaptureQueriesContext(connections['default']) as primary, \
+                CaptureQueriesContext(connections['replica']) as replica:
+            compute_metrics()
+        self.assertEqual(len(primary), 0)
+        self.assertGreater(len(replica), 0)
+
+    def test_export_de_fond_lu_sur_la_replica(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        enqueue('export_items_csv', 'Export', {'ids': [self.item.pk]})
+        job = claim_next()
+        with self.settings(MEDIA_ROOT=media_root), CaptureQueriesContext(connections['replica']) as replica:
+            run_job(job)
+        self.assertTrue(any('FROM "inventory_item"' in query['sql'] for query in replica))
+
+
+class SQLiteProfileTest(SimpleTestCase):
+    """Profil SQLite de production sur un fichier temporaire (la base de test est en mémoire)"""
+    alias = 'sqlite_profile'
+    writers = 8
+    transactions = 40
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        options = settings.DATABASES['default'].get('OPTIONS', {})
+        if 'pragmas' not in options:
+            self.skipTest("Profil SQLite désactivé (SQLITE_TUNING)")
+        configured = connections.configure_settings({'default': connections.settings['default'], self.alias: {
+            'ENGINE': 'core.db.backends.sqlite3',
+            'NAME': os.path.join(directory, 'profile.sqlite3'),
+            'OPTIONS': options,
+        }})
+        connections.settings[self.alias] = configured[self.alias]
+        self.addCleanup(connections.settings.pop, self.alias)
+        self.addCleanup(self._close)
+        with connections[self.alias].cursor() as cursor:
+            cursor.execute('CREATE TABLE counter (id INTEGER PRIMARY KEY, value INTEGER NOT NULL)')
+            cursor.execute('CREATE TABLE entry (id INTEGER PRIMARY KEY, writer INTEGER NOT NULL)')
+            cursor.execute('INSERT INTO counter (id, value) VALUES (1, 0)')
+
+    def _close(self):
+        connections[self.alias].close()
+        del connections[self.alias]
+
+    def test_pragmas_appliques_a_la_connexion(self):
+        with connections[self.alias].cursor() as cursor:
+            values = {}
+            for name in ('journal_mode', 'synchronous', 'busy_timeout', 'mmap_size', 'cache_size'):
+                cursor.execute(f'PRAGMA {name}')
+                values[name] = cursor.fetchone()[0]
+        pragmas = settings.DATABASES['default']['OPTIONS']['pragmas']
+        self.assertEqual(values['journal_mode'], 'wal')
+        self.assertEqual(values['synchronous'], 1)  # NORMAL
+        self.assertEqual(values['busy_timeout'], pragmas['busy_timeout'])
+        self.assertEqual(values['cache_size'], pragmas['cache_size'])
+
+    def test_ecrivains_paralleles_sans_verrou(self):
+        errors = []
+
+        def write(writer):
+            try:
+                for _ in range(self.transactions):
+                    # Lecture puis écriture dans la même transaction : en BEGIN
+                    # DEFERRED, deux écrivains se bloquent mutuellement
+                    with transaction.atomic(using=self.alias), connections[self.alias].cursor() as cursor:
+                        cursor.execute('SELECT value FROM counter WHERE id = 1')
+                        value = cursor.fetchone()[0]
+                        time.sleep(0.001)
+                        cursor.execute('UPDATE counter SET value = %s WHERE id = 1', [value + 1])
+                        cursor.execute('INSERT INTO entry (writer) VALUES (%s)', [writer])
+            except Exception as error:
+                errors.append(error)
+            finally:
+                connections[self.alias].close()
+
+        threads = [threading.Thread(target=write, args=(writer,)) for writer in range(self.writers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        with connections[self.alias].cursor() as cursor:
+            cursor.execute('SELECT value FROM counter WHERE id = 1')
+            self.assertEqual(cursor.fetchone()[0], self.writers * self.transactions)
+            cursor.execute('SELECT COUNT(*) FROM entry')
+            self.assertEqual(cursor.fetchone()[0], self.writers * self.transactions)
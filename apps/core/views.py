@@ -1,3 +1,19 @@
-from django.shortcuts import render
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.http import Http404
+from django_prometheus.exports import ExportToDjangoView
 
-# Create your views here.
+
+def metrics(request):
+    """
+    Métriques Prometheus (/metrics), servies seulement si
+    STOCKPRO_METRICS_ENABLED : au staff connecté, ou sans connexion aux
+    adresses de STOCKPRO_METRICS_ALLOWED_IPS (le collecteur).
+    """
+    if not settings.STOCKPRO_METRICS_ENABLED:
+        raise Http404
+    user = request.user
+    if not (user.is_authenticated and user.is_staff) \
+            and request.META.get('REMOTE_ADDR') not in settings.STOCKPRO_METRICS_ALLOWED_IPS:
+        raise PermissionDenied
+    return ExportToDjangoView(request)
@@ -1,21 +1,22 @@
-﻿import csv
-import json
-from django.contrib import admin
-from django.http import HttpResponse
-from django.utils import timezone
+﻿import json
+import uuid
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin import actions as admin_actions
+from django.contrib.admin.helpers import ActionForm
+from django.core.exceptions import PermissionDenied
+from django.core.files.storage import default_storage
+from django.http import HttpResponseRedirect
+from django.shortcuts import render
+from django.urls import path, reverse
 from django.utils.html import format_html
-from datetime import timedelta
-from django.db.models import Count, Sum
-from django.db.models.functions import TruncDay
 
-# Imports pour ReportLab (Génération PDF)
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import A4
-from reportlab.lib import colors
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph
-from reportlab.lib.styles import getSampleStyleSheet
+from reports.jobs import enqueue
 
-from .models import Category, Item, Movement, AcquisitionMode, Inventory
+from .models import Category, Item, Movement, AcquisitionMode, Inventory, PeriodClose, StockAlert
+from .dashboard import get_metrics
+from .reports import parse_period
+from .search import get_backend
 
 # --- 1. CONFIGURATION DU DASHBOARD (Page d'accueil) ---
 
@@ -24,30 +25,18 @@ def custom_index(self, request, extra_context=None):
     extra_context = extra_context or {}
     extra_context.update(self.each_context(request))
 
-    # Données du Graphique (7 derniers jours)
-    last_7_days = timezone.now() - timedelta(days=6)
-    mouvements_data = (
-        Movement.objects.filter(date__gte=last_7_days)
-        .annotate(day=TruncDay('date'))
-        .values('day')
-        .annotate(total=Count('id'))
-        .order_by('day')
-    )
-    
-    labels = [d['day'].strftime('%d/%m') for d in mouvements_data]
-    counts = [d['total'] for d in mouvements_data]
+    # Indicateurs servis par le cache (aucune requête d'agrégat en régime établi)
+    metrics = get_metrics()
 
     # Données des Tuiles d'Alertes
-    extra_context['total_items'] = Item.objects.count()
-    extra_context['critical_stock'] = Item.objects.filter(quantity__lt=10).count()
-    extra_context['total_mouvements'] = Movement.objects.filter(
-        date__gte=timezone.now().replace(hour=0, minute=0, second=0)
-    ).count()
-    
-    # Injection JSON pour Chart.js
-    extra_context['chart_labels'] = json.dumps(labels)
-    extra_context['chart_data'] = json.dumps(counts)
-    
+    extra_context['total_items'] = metrics['total_items']
+    extra_context['critical_stock'] = metrics['critical_stock']
+    extra_context['total_mouvements'] = metrics['total_mouvements']
+
+    # Injection JSON pour Chart.js (7 derniers jours)
+    extra_context['chart_labels'] = json.dumps(metrics['chart_labels'])
+    extra_context['chart_data'] = json.dumps(metrics['chart_data'])
+
     # Appel de l'index original avec le contexte enrichi
     return admin.sites.AdminSite.index(self, request, extra_context=extra_context)
 
@@ -61,111 +50,275 @@ admin.site.index_title = "Tableau de Bord Logistique"
 
 
 # --- 2. ACTIONS PDF & EXPORT ---
+# Les traitements lourds partent dans la file de tâches (reports.jobs) :
+# l'action rend la main immédiatement et renvoie vers la page de suivi.
+
+def _enqueue(modeladmin, request, kind, label, params):
+    job = enqueue(kind, label, params, user=request.user)
+    url = reverse('reports:job_detail', args=[job.pk])
+    modeladmin.message_user(request, format_html(
+        "{} : tâche en file d'attente, <a href=\"{}\">suivre l'avancement</a>.", label, url,
+    ), messages.SUCCESS)
+    return HttpResponseRedirect(url)
+
+class ItemActionForm(ActionForm):
+    """Formulaire d'actions de la liste des articles, avec la période du rapport mensuel"""
+    period = forms.CharField(
+        label="Période", required=False,
+        widget=forms.TextInput(attrs={'type': 'month', 'placeholder': 'AAAA-MM'}),
+    )
 
 @admin.action(description="📄 Générer Rapport Mensuel (PDF)")
 def generate_monthly_report(modeladmin, request, queryset):
-    response = HttpResponse(content_type='application/pdf')
-    response['Content-Disposition'] = 'attachment; filename="rapport_mensuel_stock.pdf"'
-
-    doc = SimpleDocTemplate(response, pagesize=A4)
-    elements = []
-    styles = getSampleStyleSheet()
-
-    month_name = timezone.now().strftime('%B %Y')
-    elements.append(Paragraph(f"Rapport d'Activité Stock - {month_name}", styles['Title']))
-    elements.append(Paragraph("<br/><br/>", styles['Normal']))
-
-    data = [['Article', 'Entrées', 'Sorties', 'Stock Final', 'Valeur (CFA)']]
-    for item in queryset:
-        current_month = timezone.now().month
-        entrees = item.movements.filter(type_mouvement='ENTREE', date__month=current_month).aggregate(Sum('quantite'))['quantite__sum'] or 0
-        sorties = item.movements.filter(type_mouvement='SORTIE', date__month=current_month).aggregate(Sum('quantite'))['quantite__sum'] or 0
-        valeur = item.quantity * item.unit_price
-        data.append([item.name, entrees, sorties, item.quantity, f"{valeur:,.2f}"])
-
-    table = Table(data, colWidths=[150, 70, 70, 80, 100])
-    table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.gray),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.whitesmoke),
-    ]))
-    elements.append(table)
-    doc.build(elements)
-    return response
+    # Période saisie à côté de l'action (AAAA-MM), mois en cours par défaut
+    year, month = parse_period(request.POST.get('period'))
+    ids = list(queryset.values_list('pk', flat=True))
+    return _enqueue(modeladmin, request, 'monthly_report', f"Rapport mensuel {month:02d}/{year}",
+                    {'ids': ids, 'year': year, 'month': month})
 
 @admin.action(description="📊 Exporter en Excel/CSV")
 def export_as_csv(modeladmin, request, queryset):
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = 'attachment; filename="inventaire_stock.csv"'
-    response.write(u'\ufeff'.encode('utf8')) 
-    writer = csv.writer(response)
-    writer.writerow(['Nom', 'Catégorie', 'Quantité', 'Prix', 'Statut'])
-    for obj in queryset:
-        writer.writerow([obj.name, obj.category.name, obj.quantity, obj.unit_price, obj.status])
-    return response
+    ids = list(queryset.values_list('pk', flat=True))
+    return _enqueue(modeladmin, request, 'export_items_csv', f"Export de {len(ids)} articles", {'ids': ids})
+
+@admin.action(description="📊 Exporter les mouvements (CSV)")
+def export_movements_as_csv(modeladmin, request, queryset):
+    ids = list(queryset.values_list('pk', flat=True))
+    return _enqueue(modeladmin, request, 'export_movements_csv', f"Export de {len(ids)} mouvements", {'ids': ids})
 
 @admin.action(description="🎫 Générer Bon de Sortie (PDF)")
 def generate_pdf_receipt(modeladmin, request, queryset):
-    response = HttpResponse(content_type='application/pdf')
-    response['Content-Disposition'] = 'attachment; filename="bon_de_sortie.pdf"'
-    p = canvas.Canvas(response, pagesize=A4)
-    width, height = A4
-    for obj in queryset:
-        p.setFont("Helvetica-Bold", 16)
-        p.drawString(100, height - 50, "STOCKPRO - BON DE SORTIE")
-        p.setFont("Helvetica", 12)
-        p.drawString(100, height - 80, f"Date : {obj.date.strftime('%d/%m/%Y %H:%M')}")
-        p.drawString(100, height - 100, f"Référence : #MOV-{obj.id}")
-        p.line(100, height - 110, 500, height - 110)
-        p.drawString(120, height - 160, f"Article : {obj.item.name}")
-        p.drawString(120, height - 180, f"Quantité : {obj.quantite}")
-        p.drawString(120, height - 200, f"Bénéficiaire : {getattr(obj, 'beneficiary', 'Non spécifié')}")
-        p.rect(100, height - 380, 150, 70) 
-        p.rect(350, height - 380, 150, 70) 
-        p.showPage()
-    p.save()
-    return response
-
-
-# --- 3. ADMINISTRATION DES MODÈLES ---
+    ids = list(queryset.values_list('pk', flat=True))
+    return _enqueue(modeladmin, request, 'receipts', f"{len(ids)} bons de sortie", {'ids': ids})
+
+@admin.action(permissions=['delete'], description=admin_actions.delete_selected.short_description)
+def delete_selected(modeladmin, request, queryset):
+    # Remplace l'action de Django : refusée si elle emporte un mouvement d'une période clôturée
+    if PeriodClose.objects.closed_movements(modeladmin.movements_of(queryset)).exists():
+        modeladmin.message_user(
+            request, "Suppression impossible : la sélection touche des mouvements d'une période clôturée.",
+            messages.ERROR,
+        )
+        return None
+    return admin_actions.delete_selected(modeladmin, request, queryset)
+
+
+# --- 3. FILTRES ---
+
+class StockAlertFilter(admin.SimpleListFilter):
+    """Filtre lu dans la table des alertes actives (aucune réévaluation des seuils)"""
+    title = "alerte de stock"
+    parameter_name = 'stock'
+
+    def lookups(self, request, model_admin):
+        return [('critical', "Stock bas (toutes alertes)")] + StockAlert.KINDS
+
+    def queryset(self, request, queryset):
+        if self.value() == 'critical':
+            return queryset.critical()
+        if self.value() in dict(StockAlert.KINDS):
+            return queryset.filter(alert__kind=self.value())
+        return queryset
+
+
+# --- 4. IMPORT EN MASSE ---
+
+class ImportItemsForm(forms.Form):
+    file = forms.FileField(label="Fichier CSV ou XLSX")
+
+    def clean_file(self):
+        file = self.cleaned_data['file']
+        if not file.name.lower().endswith(('.csv', '.xlsx')):
+            raise forms.ValidationError("Format non pris en charge : fichier .csv ou .xlsx attendu.")
+        return file
+
+
+# --- 5. ADMINISTRATION DES MODÈLES ---
+
+class CachedChoicesMixin:
+    """
+    Choix des clés étrangères de cached_choice_fields lus une fois par
+    requête : chaque ligne d'une liste éditable (list_editable) reprend la
+    même liste au lieu de réexécuter la requête des choix.
+    """
+    cached_choice_fields = ()
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        formfield = super().formfield_for_foreignkey(db_field, request, **kwargs)
+        if formfield is None or request is None or db_field.name not in self.cached_choice_fields:
+            return formfield
+        choices = request.__dict__.setdefault('_stockpro_choices', {})
+        key = (db_field.model._meta.label, db_field.name)
+        if key not in choices:
+            choices[key] = list(formfield.choices)
+        formfield.choices = choices[key]
+        # Liste rendue par le widget enveloppé (boutons d'ajout/modification)
+        widget = getattr(formfield.widget, 'widget', formfield.widget)
+        widget.choices = choices[key]
+        return formfield
+
+
+class ClosedPeriodMixin:
+    """
+    Suppression (bouton et action groupée) refusée quand elle emporterait un
+    mouvement daté dans une période clôturée ; movements_of() donne les
+    mouvements concernés par une sélection.
+    """
+    def movements_of(self, queryset):
+        raise NotImplementedError
+
+    def in_closed_period(self, obj):
+        selection = self.model.objects.filter(pk=obj.pk)
+        return PeriodClose.objects.closed_movements(self.movements_of(selection)).exists()
+
+    def has_delete_permission(self, request, obj=None):
+        if obj is not None and self.in_closed_period(obj):
+            return False
+        return super().has_delete_permission(request, obj)
+
 
 class MovementInline(admin.TabularInline):
+    """Derniers mouvements de l'article ; l'historique complet est dans la liste des mouvements"""
     model = Movement
     extra = 1
     fields = ('type_mouvement', 'quantite', 'date')
     readonly_fields = ('date',)
+    ordering = ('-date', '-pk')
     classes = ['collapse']
+    recent = 20
 
 @admin.register(Item)
-class ItemAdmin(admin.ModelAdmin):
+class ItemAdmin(ClosedPeriodMixin, CachedChoicesMixin, admin.ModelAdmin):
     list_display = ('name', 'category', 'colored_quantity', 'unit_price', 'status')
     list_editable = ('category', 'status')
-    list_filter = ('category', 'status')
+    # Catégorie et alerte active (colonne Stock Actuel) lues avec l'article
+    list_select_related = ('category', 'alert')
+    cached_choice_fields = ('category', 'acquisition_mode')
+    readonly_fields = ('movement_history',)
+    list_filter = (StockAlertFilter, 'category', 'status', 'acquisition_mode')
     search_fields = ('name',)
     inlines = [MovementInline]
-    actions = [export_as_csv, generate_monthly_report]
+    actions = [export_as_csv, generate_monthly_report, delete_selected]
+    action_form = ItemActionForm
+    change_list_template = 'admin/inventory/item/change_list.html'
+
+    def get_urls(self):
+        urls = [
+            path('import/', self.admin_site.admin_view(self.import_view), name='inventory_item_import'),
+        ]
+        return urls + super().get_urls()
+
+    def import_view(self, request):
+        """Dépôt du fichier puis import en tâche de fond (reports.jobs)"""
+        if not self.has_add_permission(request):
+            raise PermissionDenied
+        form = ImportItemsForm(request.POST or None, request.FILES or None)
+        if request.method == 'POST' and form.is_valid():
+            upload = form.cleaned_data['file']
+            stored = default_storage.save(f"imports/{uuid.uuid4().hex}_{upload.name}", upload)
+            return _enqueue(self, request, 'import_items', f"Import de {upload.name}",
+                            {'path': stored, 'filename': upload.name})
+        return render(request, 'admin/inventory/item/import.html', {
+            **self.admin_site.each_context(request),
+            'form': form,
+            'opts': self.model._meta,
+            'title': "Importer des articles",
+        })
+
+    ALERT_COLORS = {
+        StockAlert.OUT: '#d9534f',
+        StockAlert.BELOW_MIN: '#d9534f',
+        StockAlert.REORDER: '#f0ad4e',
+        StockAlert.OVERSTOCK: '#5bc0de',
+    }
 
     def colored_quantity(self, obj):
-        if obj.quantity <= 0:
-            color, label = '#d9534f', 'RUPTURE'
-        elif obj.quantity < 10:
-            color, label = '#f0ad4e', f'{obj.quantity} (Bas)'
-        else:
+        alert = obj.stock_alert
+        if alert is None:
             color, label = '#5cb85c', obj.quantity
+        elif alert.kind == StockAlert.OUT:
+            color, label = self.ALERT_COLORS[alert.kind], 'RUPTURE'
+        else:
+            color, label = self.ALERT_COLORS[alert.kind], f'{obj.quantity} ({alert.get_kind_display()})'
         return format_html('<span style="color: {}; font-weight: bold;">{}</span>', color, label)
     
     colored_quantity.short_description = 'Stock Actuel'
     colored_quantity.admin_order_field = 'quantity'
 
+    @admin.display(description="Historique des mouvements")
+    def movement_history(self, obj):
+        if obj.pk is None:
+            return '—'
+        url = reverse('admin:inventory_movement_changelist') + f'?item__id__exact={obj.pk}'
+        return format_html(
+            "Les {} derniers mouvements sont affichés ci-dessous. <a href=\"{}\">Historique complet</a>",
+            MovementInline.recent, url,
+        )
+
+    def get_formset_kwargs(self, request, obj, inline, prefix):
+        kwargs = super().get_formset_kwargs(request, obj, inline, prefix)
+        if isinstance(inline, MovementInline) and obj is not None and obj.pk is not None:
+            # Le formset filtre ensuite par article : pas de tranche possible, on borne par clés
+            recent = list(
+                Movement.objects.filter(item=obj).order_by(*inline.ordering)
+                .values_list('pk', flat=True)[:inline.recent]
+            )
+            kwargs['queryset'] = kwargs['queryset'].filter(pk__in=recent)
+        return kwargs
+
+    def movements_of(self, queryset):
+        # Les mouvements d'un article supprimé partent en cascade
+        return Movement.objects.filter(item__in=queryset)
+
+    def get_search_results(self, request, queryset, search_term):
+        # Index plein texte au lieu de LIKE '%terme%'
+        if not search_term:
+            return queryset, False
+        return get_backend().filter(queryset, search_term), False
+
 @admin.register(Movement)
-class MovementAdmin(admin.ModelAdmin):
+class MovementAdmin(ClosedPeriodMixin, admin.ModelAdmin):
     list_display = ('item', 'type_mouvement', 'quantite', 'date')
     list_filter = ('type_mouvement', 'date')
+    list_select_related = ('item',)
+    # Listes déroulantes de tout le catalogue remplacées par une recherche
+    autocomplete_fields = ('item', 'beneficiary')
     search_fields = ('item__name',)
-    actions = [generate_pdf_receipt]
+    actions = [generate_pdf_receipt, export_movements_as_csv, delete_selected]
+
+    def get_search_results(self, request, queryset, search_term):
+        # Recherche des articles dans l'index, sans jointure sur inventory_item
+        if not search_term:
+            return queryset, False
+        return get_backend().filter(queryset, search_term, field='item'), False
+
+    def movements_of(self, queryset):
+        return queryset
+
+    def has_change_permission(self, request, obj=None):
+        # Mouvement d'une période clôturée : consultable, plus modifiable
+        if obj is not None and self.in_closed_period(obj):
+            return False
+        return super().has_change_permission(request, obj)
+
+@admin.register(StockAlert)
+class StockAlertAdmin(admin.ModelAdmin):
+    """Alertes actives : tenues à jour par les postages, en lecture seule"""
+    list_display = ('item', 'kind', 'item_quantity', 'raised_at')
+    list_filter = ('kind',)
+    list_select_related = ('item',)
+    search_fields = ('item__name',)
+    ordering = ('-raised_at',)
+
+    @admin.display(description='Stock', ordering='item__quantity')
+    def item_quantity(self, obj):
+        return obj.item.quantity
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
 
 admin.site.register(Category)
 admin.site.register(AcquisitionMode)
@@ -0,0 +1,111 @@
+"""
+Alertes de stock (table StockAlert).
+
+Les seuils d'un article sont, par ordre de gravité :
+  - rupture           : quantité <= 0 ;
+  - stock minimum     : quantité < min_level ;
+  - point de commande : quantité <= reorder_level, à défaut le point de
+                        commande calculé (ItemForecast), à défaut le seuil
+                        par défaut STOCKPRO_CRITICAL_THRESHOLD (exclu) ;
+  - surstock          : quantité > max_level.
+
+evaluate_alerts() calcule l'alerte de chaque article par une seule requête
+(une expression CASE évaluée par la base, jointe à l'alerte en place) et
+n'écrit que les articles dont l'alerte change. Elle est appelée à chaque
+postage pour les seuls articles touchés : tant qu'aucun seuil n'est
+franchi, la table n'est pas modifiée.
+"""
+from django.db import transaction
+from django.db.models import CharField, F, Q, Value, When, Case
+from django.db.models.functions import Coalesce
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .dashboard import invalidate_metrics
+from .models import DEFAULT_CRITICAL_THRESHOLD, Item, StockAlert
+from .page_cache import bump_catalogue
+from .signals import movements_posted
+
+# Articles évalués par requête (IN sur la clé primaire)
+BATCH_SIZE = 500
+
+
+def alert_kind():
+    """Expression donnant l'alerte d'un article (None si aucun seuil n'est franchi)"""
+    reorder_point = Coalesce(F('reorder_level'), F('forecast__reorder_point'), Value(DEFAULT_CRITICAL_THRESHOLD - 1))
+    return Case(
+        When(quantity__lte=0, then=Value(StockAlert.OUT)),
+        When(min_level__isnull=False, quantity__lt=F('min_level'), then=Value(StockAlert.BELOW_MIN)),
+        When(quantity__lte=reorder_point, then=Value(StockAlert.REORDER)),
+        When(max_level__isnull=False, quantity__gt=F('max_level'), then=Value(StockAlert.OVERSTOCK)),
+        default=None,
+        output_field=CharField(),
+    )
+
+
+def breaching_items(queryset=None):
+    """Articles franchissant un seuil, annotés avec alert_kind (une requête)"""
+    queryset = Item.objects.all() if queryset is None else queryset
+    return queryset.annotate(alert_kind=alert_kind()).filter(alert_kind__isnull=False)
+
+
+def _changes(queryset):
+    """(item_id, nouvelle alerte, alerte en place) des articles dont l'alerte change"""
+    rows = (
+        queryset.annotate(alert_kind=alert_kind())
+        .filter(Q(alert_kind__isnull=False) | Q(alert__isnull=False))
+        .values_list('pk', 'alert_kind', 'alert__kind')
+    )
+    return [(pk, new, current) for pk, new, current in rows.iterator(chunk_size=2000) if new != current]
+
+
+def evaluate_alerts(item_ids=None):
+    """
+    Met la table StockAlert en accord avec les seuils, pour les articles
+    donnés ou pour tout le catalogue. Retourne le nombre d'alertes modifiées.
+    """
+    if item_ids is None:
+        changes = _changes(Item.objects.all())
+    else:
+        item_ids = list(item_ids)
+        changes = []
+        for start in range(0, len(item_ids), BATCH_SIZE):
+            changes += _changes(Item.objects.filter(pk__in=item_ids[start:start + BATCH_SIZE]))
+    if not changes:
+        return 0
+
+    now = timezone.now()
+    # Pas de point de sauvegarde : l'évaluation suit la transaction de postage
+    with transaction.atomic(savepoint=False):
+        raised = [StockAlert(item_id=pk, kind=new, raised_at=now) for pk, new, _ in changes if new]
+        StockAlert.objects.bulk_create(
+            raised,
+            batch_size=BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=['item'],
+            update_fields=['kind', 'raised_at'],
+        )
+        cleared = [pk for pk, new, _ in changes if new is None]
+        for start in range(0, len(cleared), BATCH_SIZE):
+            StockAlert.objects.filter(item_id__in=cleared[start:start + BATCH_SIZE]).delete()
+
+        low = StockAlert.LOW_KINDS
+        if any((new in low) != (current in low) for _, new, current in changes):
+            transaction.on_commit(invalidate_metrics)
+        transaction.on_commit(bump_catalogue)
+    return len(changes)
+
+
+# --- RÉCEPTEURS ---
+
+@receiver(movements_posted)
+def evaluate_alerts_on_movements(sender, stock, **kwargs):
+    # Même transaction que le postage : l'alerte suit le stock écrit
+    evaluate_alerts(pk for pk, (before, after) in stock.items() if before != after)
+
+
+@receiver(post_save, sender=Item)
+def evaluate_alerts_on_item_save(sender, instance, **kwargs):
+    # Création, saisie manuelle du stock ou modification des seuils
+    evaluate_alerts([instance.pk])
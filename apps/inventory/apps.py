@@ -4,3 +4,8 @@ class InventoryConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.inventory'
     label = 'inventory'
+
+    def ready(self):
+        # Branchement des récepteurs de signaux (chemin complet : le module
+        # est chargé sous le nom 'inventory' via INSTALLED_APPS)
+        from apps.inventory import alerts, dashboard, page_cache, periods, search, snapshots, valuation  # noqa: F401
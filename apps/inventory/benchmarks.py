@@ -0,0 +1,221 @@
+"""
+Banc de performance des chemins critiques de StockPro.
+
+Chaque banc est exécuté une fois à blanc puis `repeat` fois ; on relève la
+durée (médiane, min, max) et le nombre de requêtes SQL (core.instrumentation).
+Tout se déroule dans une transaction annulée à la fin : la base mesurée
+(typiquement remplie par seed_warehouse) n'est pas modifiée.
+
+compare() confronte un rapport à une référence enregistrée : plus de
+requêtes qu'en référence, ou une médiane dépassant la référence de plus de
+la tolérance, est une régression.
+"""
+import io
+import statistics
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.utils import timezone
+
+from core.instrumentation import Measurement
+
+from .dashboard import invalidate_metrics
+from .exports import ITEM_HEADER, MOVEMENT_HEADER, item_rows, movement_rows, stream_csv
+from .models import Item, Movement
+from .page_cache import bump_catalogue
+from .receipts import render_receipts
+from .reports import build_monthly_report
+from .valuation import stock_value
+
+BENCHMARKS = {}
+
+# En dessous de cet écart, une différence de durée est du bruit de mesure
+NOISE_MS = 5
+RECEIPTS = 200
+BATCH_LINES = 100
+
+
+def benchmark(name):
+    def decorator(function):
+        BENCHMARKS[name] = function
+        return function
+    return decorator
+
+
+class Context:
+    """Données partagées par les bancs, préparées une fois"""
+
+    def __init__(self):
+        self.user = User.objects.create_superuser(f'benchmark-{uuid.uuid4().hex[:8]}', 'benchmark@stockpro.local', None)
+        host = next((host for host in settings.ALLOWED_HOSTS if host and host != '*'), 'localhost')
+        # Adresse hors INTERNAL_IPS : pas de barre de débogage dans les pages mesurées
+        self.client = Client(HTTP_HOST=host, REMOTE_ADDR='192.0.2.1')
+        self.client.force_login(self.user)
+        self.item_ids = list(Item.objects.order_by('pk').values_list('pk', flat=True)[:BATCH_LINES])
+        if not self.item_ids:
+            raise ValueError("Base vide : lancer d'abord manage.py seed_warehouse.")
+        latest = Movement.objects.order_by('-date').values_list('date', flat=True).first() or timezone.now()
+        latest = timezone.localtime(latest)
+        self.year, self.month = latest.year, latest.month
+        self.month_start = latest.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        self.receipt_ids = list(
+            Movement.objects.filter(type_mouvement='SORTIE').order_by('-pk').values_list('pk', flat=True)[:RECEIPTS]
+        )
+
+    def get(self, path):
+        # HTTPS : pas de redirection quand SECURE_SSL_REDIRECT est actif (production)
+        response = self.client.get(path, secure=True)
+        if response.status_code != 200:
+            raise AssertionError(f"{path} : code HTTP {response.status_code}")
+        return response
+
+
+# --- BANCS ---
+
+@benchmark('post_movement')
+def post_movement(context):
+    Movement.objects.create(item_id=context.item_ids[0], type_mouvement='ENTREE', quantite=1)
+
+
+@benchmark('post_batch')
+def post_batch(context):
+    Movement.objects.post_batch(
+        [{'item_id': pk, 'type_mouvement': 'ENTREE', 'quantite': 1} for pk in context.item_ids]
+    )
+
+
+@benchmark('dashboard_index_cold')
+def dashboard_index_cold(context):
+    invalidate_metrics()
+    context.get('/admin/')
+
+
+@benchmark('dashboard_index')
+def dashboard_index(context):
+    context.get('/admin/')
+
+
+@benchmark('dashboard_after_posting')
+def dashboard_after_posting(context):
+    # Lecture après écriture : à la validation, le postage invalide les
+    # compteurs ; la transaction du banc n'étant jamais validée, on le fait ici
+    Movement.objects.create(item_id=context.item_ids[0], type_mouvement='ENTREE', quantite=1)
+    invalidate_metrics()
+    context.get('/admin/')
+
+
+# Pages du catalogue : mesurées à froid (nouvelle version du catalogue,
+# pages et fragments recalculés par leurs requêtes), la liste aussi servie
+# depuis le cache (item_list_cached)
+
+@benchmark('item_list')
+def item_list(context):
+    bump_catalogue()
+    context.get('/items/')
+
+
+@benchmark('item_list_cached')
+def item_list_cached(context):
+    context.get('/items/')
+
+
+@benchmark('item_list_search')
+def item_list_search(context):
+    bump_catalogue()
+    context.get('/items/?q=ramette')
+
+
+@benchmark('stock_card')
+def stock_card(context):
+    bump_catalogue()
+    context.get(f'/items/{context.item_ids[0]}/stock-card/')
+
+
+@benchmark('monthly_report')
+def monthly_report(context):
+    build_monthly_report(Item.objects.all(), context.year, context.month, io.BytesIO())
+
+
+@benchmark('stock_value')
+def stock_value_now(context):
+    stock_value(method='fifo')
+
+
+@benchmark('csv_export_items')
+def csv_export_items(context):
+    for _ in stream_csv(ITEM_HEADER, item_rows(Item.objects.all())):
+        pass
+
+
+@benchmark('csv_export_movements')
+def csv_export_movements(context):
+    movements = Movement.objects.filter(date__gte=context.month_start - timedelta(days=30))
+    for _ in stream_csv(MOVEMENT_HEADER, movement_rows(movements)):
+        pass
+
+
+@benchmark('pdf_receipts')
+def pdf_receipts(context):
+    render_receipts(Movement.objects.filter(pk__in=context.receipt_ids), io.BytesIO())
+
+
+# --- EXÉCUTION ET COMPARAISON ---
+
+def run_benchmarks(repeat=5, names=None):
+    """Exécute les bancs demandés (tous par défaut) et retourne le rapport"""
+    names = names or list(BENCHMARKS)
+    results = {}
+    # Pas de double relevé par le middleware pendant la mesure
+    with override_settings(STOCKPRO_INSTRUMENTATION=False), transaction.atomic():
+        dataset = {'items': Item.objects.count(), 'movements': Movement.objects.count()}
+        context = Context()
+        for name in names:
+            BENCHMARKS[name](context)  # À blanc : caches, gabarits, requêtes préparées
+            timings, queries = [], 0
+            for _ in range(repeat):
+                with Measurement() as measurement:
+                    BENCHMARKS[name](context)
+                timings.append(measurement.duration * 1000)
+                queries = max(queries, measurement.queries)
+            results[name] = {
+                'median_ms': round(statistics.median(timings), 2),
+                'min_ms': round(min(timings), 2),
+                'max_ms': round(max(timings), 2),
+                'queries': queries,
+            }
+        transaction.set_rollback(True)
+    # Compteurs et pages mis en cache pendant la mesure reflètent des écritures annulées
+    invalidate_metrics()
+    bump_catalogue()
+    return {
+        'generated_at': timezone.now().isoformat(timespec='seconds'),
+        'database': connection.vendor,
+        'debug': settings.DEBUG,
+        'repeat': repeat,
+        'dataset': dataset,
+        'benchmarks': results,
+    }
+
+
+def compare(report, baseline, time_tolerance=0.5):
+    """Retourne (régressions, avertissements) du rapport par rapport à la référence"""
+    regressions, warnings = [], []
+    if report.get('dataset') != baseline.get('dataset'):
+        warnings.append(f"Jeu de données différent de la référence : {report.get('dataset')} / {baseline.get('dataset')}")
+    for name, reference in baseline.get('benchmarks', {}).items():
+        result = report['benchmarks'].get(name)
+        if result is None:
+            continue
+        if result['queries'] > reference['queries']:
+            regressions.append(f"{name} : {result['queries']} requêtes SQL (référence {reference['queries']})")
+        limit = reference['median_ms'] * (1 + time_tolerance)
+        if result['median_ms'] > limit and result['median_ms'] - reference['median_ms'] > NOISE_MS:
+            regressions.append(
+                f"{name} : {result['median_ms']:.1f} ms (référence {reference['median_ms']:.1f} ms, "
+                f"tolérance {time_tolerance:.0%})"
+            )
+    return regressions, warnings
@@ -0,0 +1,174 @@
+"""
+Sessions d'inventaire physique (comptage).
+
+  open_session   : crée l'inventaire et fige la quantité théorique de chaque
+                   article du périmètre par un seul INSERT ... SELECT ;
+  record_counts  : enregistre un lot de comptages (scanners) par un UPDATE
+                   ensembliste ;
+  variance_*     : écarts et impact en valeur, calculés par la base ;
+  close_session  : poste les écarts (compté - quantité figée) en mouvements
+                   d'ajustement dans une transaction.
+"""
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Q, Sum
+from django.db.models.functions import Abs, Coalesce
+from django.utils import timezone
+
+from .models import Inventory, InventoryItem, Item, Movement
+from .signals import inventory_updated
+
+# Nombre de comptages par UPDATE (2 paramètres par ligne)
+BATCH_SIZE = 500
+
+
+def open_session(description='', category=None):
+    """Ouvre une session ; la quantité théorique est le stock à l'ouverture"""
+    with transaction.atomic():
+        inventory = Inventory.objects.create(description=description, category=category)
+        where, params = '', [inventory.pk]
+        if category is not None:
+            where = 'WHERE category_id = %s'
+            params.append(category.pk)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {InventoryItem._meta.db_table} (inventory_id, item_id, expected_quantity, actual_quantity) '
+                f'SELECT %s, id, quantity, NULL FROM {Item._meta.db_table} {where}',
+                params,
+            )
+    return inventory
+
+
+def _check_open(inventory):
+    if not inventory.is_open:
+        raise ValidationError("Cet inventaire est clôturé.")
+
+
+def record_counts(inventory, counts, add=False):
+    """
+    Enregistre des comptages {item_id: quantité} (ou paires (item_id, quantité)).
+    Avec add=True, les quantités s'ajoutent au comptage déjà saisi (scans
+    successifs d'un même article). Retourne (lignes_mises_à_jour, erreurs)
+    où erreurs associe l'item_id à son message.
+    """
+    _check_open(inventory)
+    errors = {}
+    totals = {}
+    for item_id, quantity in (counts.items() if isinstance(counts, dict) else counts):
+        if not isinstance(quantity, int) or isinstance(quantity, bool) or quantity < 0:
+            errors[item_id] = "Quantité invalide"
+        elif add:
+            totals[item_id] = totals.get(item_id, 0) + quantity
+        else:
+            totals[item_id] = quantity
+
+    table = InventoryItem._meta.db_table
+    value = 'COALESCE(actual_quantity, 0) + v.column2' if add else 'v.column2'
+    updated = 0
+    pairs = [(item_id, quantity) for item_id, quantity in totals.items() if item_id not in errors]
+    with transaction.atomic():
+        for start in range(0, len(pairs), BATCH_SIZE):
+            batch = pairs[start:start + BATCH_SIZE]
+            known = set(
+                InventoryItem.objects.filter(inventory=inventory, item_id__in=[item_id for item_id, _ in batch])
+                .values_list('item_id', flat=True)
+            )
+            batch = [(item_id, quantity) for item_id, quantity in batch if item_id in known]
+            for item_id in {item_id for item_id, _ in pairs[start:start + BATCH_SIZE]} - known:
+                errors[item_id] = "Article hors du périmètre de l'inventaire"
+            if not batch:
+                continue
+            rows = ', '.join(['(%s, %s)'] * len(batch))
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f'UPDATE {table} SET actual_quantity = {value} '
+                    f'FROM (VALUES {rows}) AS v '
+                    f'WHERE {table}.inventory_id = %s AND {table}.item_id = v.column1',
+                    [param for pair in batch for param in pair] + [inventory.pk],
+                )
+                updated += cursor.rowcount
+        inventory_updated.send(sender=Inventory, inventory=inventory)
+    return updated, errors
+
+
+# --- ÉCARTS ---
+
+def variance_lines(inventory):
+    """Lignes comptées, annotées avec l'écart et son impact en valeur"""
+    return (
+        inventory.items.filter(actual_quantity__isnull=False)
+        .annotate(
+            variance=F('actual_quantity') - F('expected_quantity'),
+            value_impact=ExpressionWrapper(
+                (F('actual_quantity') - F('expected_quantity')) * F('item__unit_price'),
+                output_field=DecimalField(max_digits=14, decimal_places=2),
+            ),
+        )
+    )
+
+
+def _totals():
+    value = DecimalField(max_digits=14, decimal_places=2)
+    return {
+        'counted': Count('id'),
+        'with_variance': Count('id', filter=~Q(variance=0)),
+        'surplus_qty': Coalesce(Sum('variance', filter=Q(variance__gt=0)), 0),
+        'shortage_qty': Coalesce(Sum(Abs('variance'), filter=Q(variance__lt=0)), 0),
+        'net_value': Coalesce(Sum('value_impact'), 0, output_field=value),
+        'absolute_value': Coalesce(Sum(Abs('value_impact')), 0, output_field=value),
+    }
+
+
+def variance_summary(inventory):
+    """Totaux de la session en une requête (plus le nombre de lignes non comptées)"""
+    summary = variance_lines(inventory).aggregate(**_totals())
+    summary['uncounted'] = inventory.items.filter(actual_quantity__isnull=True).count()
+    return summary
+
+
+def variance_by_category(inventory):
+    return (
+        variance_lines(inventory)
+        .values('item__category__name')
+        .annotate(**_totals())
+        .order_by('item__category__name')
+    )
+
+
+# --- CLÔTURE ---
+
+def close_session(inventory):
+    """
+    Clôture la session : un mouvement ENTREE/SORTIE par écart compté, postés
+    en un seul lot dans la même transaction que le changement d'état.
+
+    L'écart posté est le comptage moins la quantité figée à l'ouverture
+    (expected_quantity, conservée telle quelle) : un delta appliqué au stock
+    courant, relu sous verrou par le postage. Les mouvements postés pendant
+    la session sont donc conservés, ni perdus ni comptés deux fois. Les
+    lignes non comptées ne sont pas ajustées. Retourne les mouvements créés.
+    """
+    with transaction.atomic():
+        inventory = Inventory.objects.select_for_update().get(pk=inventory.pk)
+        _check_open(inventory)
+        lines = [
+            {
+                'item_id': item_id,
+                'type_mouvement': 'ENTREE' if variance > 0 else 'SORTIE',
+                'quantite': abs(variance),
+            }
+            for item_id, variance in variance_lines(inventory).exclude(variance=0)
+            .order_by('item_id').values_list('item_id', 'variance').iterator(chunk_size=2000)
+        ]
+        created, errors = Movement.objects.post_batch(lines)
+        if errors:
+            # Un ajustement impossible (stock sorti entre-temps) annule toute la clôture
+            item_ids = [lines[index]['item_id'] for index in errors]
+            names = dict(Item.objects.filter(pk__in=item_ids).values_list('pk', 'name'))
+            raise ValidationError([
+                f"{names[lines[index]['item_id']]} : {message}" for index, message in sorted(errors.items())
+            ])
+        inventory.status = Inventory.CLOSED
+        inventory.closed_at = timezone.now()
+        inventory.save(update_fields=['status', 'closed_at'])
+    return created
@@ -0,0 +1,117 @@
+"""
+Indicateurs du tableau de bord admin, conservés dans le cache Django.
+
+Les compteurs sont recalculés ensemble quand une clé manque, puis servis
+depuis le cache : entre deux écritures, l'index admin n'exécute aucune
+requête d'agrégat. Toute écriture qui les change (mouvement posté, article
+créé ou supprimé, alerte levée ou retirée) les invalide après validation de
+la transaction, et leur courte durée de vie borne le retard si une
+invalidation se perd. Pas d'incrément : un compteur ne dérive pas d'un
+processus à l'autre, il est toujours recalculé depuis la base.
+
+Le premier affichage après une écriture paie donc le recalcul complet (une
+requête groupée par compteur, sur l'alias de lecture) au lieu d'une mise à
+jour au postage : c'est le banc dashboard_after_posting, à comparer à
+dashboard_index (régime établi) et dashboard_index_cold.
+"""
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from core.routers import replica_reads
+
+from .models import Item, Movement, StockAlert
+from .signals import movements_posted
+
+HISTORY_DAYS = 7
+CACHE_TIMEOUT = getattr(settings, 'STOCKPRO_DASHBOARD_CACHE_TIMEOUT', 60)
+
+KEY_PREFIX = 'stockpro:dashboard'
+TOTAL_ITEMS_KEY = f'{KEY_PREFIX}:total_items'
+CRITICAL_STOCK_KEY = f'{KEY_PREFIX}:critical_stock'
+
+
+def _day_key(day):
+    return f'{KEY_PREFIX}:movements:{day.isoformat()}'
+
+
+def _history_days():
+    today = timezone.localdate()
+    return [today - timedelta(days=offset) for offset in range(HISTORY_DAYS - 1, -1, -1)]
+
+
+@replica_reads
+def compute_metrics():
+    """Recalcule tous les compteurs depuis l'alias de lecture et les remet en cache"""
+    days = _history_days()
+    start = timezone.make_aware(datetime.combine(days[0], time.min))
+    per_day = dict(
+        Movement.objects.filter(date__gte=start)
+        .annotate(day=TruncDate('date'))
+        .values('day')
+        .annotate(total=Count('id'))
+        .values_list('day', 'total')
+    )
+    values = {
+        TOTAL_ITEMS_KEY: Item.objects.count(),
+        CRITICAL_STOCK_KEY: StockAlert.objects.filter(kind__in=StockAlert.LOW_KINDS).count(),
+    }
+    for day in days:
+        values[_day_key(day)] = per_day.get(day, 0)
+    cache.set_many(values, CACHE_TIMEOUT)
+    return values
+
+
+def get_metrics():
+    """
+    Retourne les indicateurs du tableau de bord :
+    total_items, critical_stock, total_mouvements (aujourd'hui),
+    chart_labels et chart_data (mouvements des 7 derniers jours).
+    """
+    days = _history_days()
+    keys = [TOTAL_ITEMS_KEY, CRITICAL_STOCK_KEY] + [_day_key(day) for day in days]
+    values = cache.get_many(keys)
+    if len(values) != len(keys):
+        values = compute_metrics()
+
+    counts = [values[_day_key(day)] for day in days]
+    return {
+        'total_items': values[TOTAL_ITEMS_KEY],
+        'critical_stock': values[CRITICAL_STOCK_KEY],
+        'total_mouvements': counts[-1],
+        'chart_labels': [day.strftime('%d/%m') for day in days],
+        'chart_data': counts,
+    }
+
+
+def invalidate_metrics():
+    """Force un recalcul complet au prochain affichage"""
+    cache.delete_many([TOTAL_ITEMS_KEY, CRITICAL_STOCK_KEY] + [_day_key(day) for day in _history_days()])
+
+
+# --- INVALIDATION ---
+
+def _on_change(sender, **kwargs):
+    # Le cache n'est vidé que si la transaction d'écriture est validée
+    transaction.on_commit(invalidate_metrics)
+
+
+movements_posted.connect(_on_change, dispatch_uid='dashboard_movements_posted')
+
+
+@receiver(post_save, sender=Item, dispatch_uid='dashboard_item_save')
+def invalidate_metrics_on_item_save(sender, instance, created, **kwargs):
+    # Stock et seuils : les alertes de stock bas sont suivies par inventory.alerts
+    if created:
+        _on_change(sender)
+
+
+for model in (Item, Movement):
+    post_delete.connect(_on_change, sender=model, dispatch_uid=f'dashboard_delete_{model.__name__}')
@@ -0,0 +1,89 @@
+import csv
+from datetime import datetime, time, timedelta
+
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+# Nombre de lignes lues par aller-retour avec la base pendant un export
+CHUNK_SIZE = 2000
+
+
+class Echo:
+    """Pseudo-fichier : csv.writer renvoie la ligne formatée au lieu de la stocker"""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(header, rows):
+    writer = csv.writer(Echo())
+    yield u'\ufeff'  # BOM pour l'ouverture directe dans Excel
+    yield writer.writerow(header)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def csv_response(filename, header, rows):
+    """Réponse CSV envoyée au fil de l'eau, en mémoire constante"""
+    response = StreamingHttpResponse(stream_csv(header, rows), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+# --- ARTICLES ---
+
+ITEM_HEADER = ['Nom', 'Catégorie', 'Quantité', 'Prix', 'Statut']
+
+
+def item_rows(queryset):
+    # values_list fait la jointure sur la catégorie : pas de requête par ligne
+    return (
+        queryset.select_related('category')
+        .values_list('name', 'category__name', 'quantity', 'unit_price', 'status')
+        .iterator(chunk_size=CHUNK_SIZE)
+    )
+
+
+# --- MOUVEMENTS ---
+
+MOVEMENT_HEADER = ['Référence', 'Date', 'Article', 'Type', 'Quantité', 'Bénéficiaire']
+
+
+def movement_rows(queryset):
+    rows = (
+        queryset.order_by('date', 'id')
+        .values_list('id', 'date', 'item__name', 'type_mouvement', 'quantite', 'beneficiary__name')
+        .iterator(chunk_size=CHUNK_SIZE)
+    )
+    for pk, date, item_name, type_mouvement, quantite, beneficiary in rows:
+        yield [
+            f"MOV-{pk}",
+            timezone.localtime(date).strftime('%d/%m/%Y %H:%M'),
+            item_name,
+            type_mouvement,
+            quantite,
+            beneficiary or '',
+        ]
+
+
+def _parse_day(value):
+    try:
+        return parse_date(value) if value else None
+    except ValueError:
+        return None
+
+
+def filter_date_range(queryset, start=None, end=None):
+    """
+    Restreint les mouvements à [start, end] (dates 'AAAA-MM-JJ', bornes incluses).
+    Les bornes sont converties en datetimes : la colonne date est comparée
+    telle quelle, sans fonction SQL.
+    """
+    start_date = _parse_day(start)
+    end_date = _parse_day(end)
+    if start_date:
+        queryset = queryset.filter(date__gte=timezone.make_aware(datetime.combine(start_date, time.min)))
+    if end_date:
+        queryset = queryset.filter(date__lt=timezone.make_aware(datetime.combine(end_date + timedelta(days=1), time.min)))
+    return queryset
@@ -0,0 +1,181 @@
+"""
+Prévision de consommation et points de commande (table ItemForecast).
+
+Les sorties des HISTORY_DAYS derniers jours sont agrégées par la base
+(article, jour), puis rangées dans une matrice articles x jours : tous les
+calculs sont vectorisés avec NumPy, sans boucle par article.
+
+Pour chaque article :
+  - consommation journalière moyenne, pondérée (les jours récents comptent
+    davantage, demi-vie HALF_LIFE_DAYS) ;
+  - saisonnalité hebdomadaire (coefficient par jour de semaine, ramené vers
+    1 quand l'historique est court) ;
+  - écart-type des sorties une fois la saisonnalité retirée ;
+  - stock de sécurité = z x écart-type x racine(délai), z tiré du taux de
+    service visé ; point de commande = sorties prévues pendant le délai de
+    réapprovisionnement + stock de sécurité.
+
+Les articles sans historique suffisant (moins de MIN_HISTORY_DAYS jours
+depuis leur premier mouvement) n'ont pas de prévision : le seuil par
+défaut s'applique. Un point de commande saisi sur l'article
+(Item.reorder_level) prime sur la prévision (voir inventory.alerts).
+"""
+import math
+from datetime import datetime, time, timedelta
+from statistics import NormalDist
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Min, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .alerts import evaluate_alerts
+from .models import Item, ItemForecast, Movement
+
+HISTORY_DAYS = getattr(settings, 'STOCKPRO_FORECAST_HISTORY_DAYS', 180)
+LEAD_TIME_DAYS = getattr(settings, 'STOCKPRO_LEAD_TIME_DAYS', 7)
+SERVICE_LEVEL = getattr(settings, 'STOCKPRO_SERVICE_LEVEL', 0.95)
+HALF_LIFE_DAYS = 28
+MIN_HISTORY_DAYS = 14
+# Poids (en semaines) de l'a priori « pas de saisonnalité »
+SEASONALITY_PRIOR_WEEKS = 4
+BATCH_SIZE = 500
+
+
+def _aware(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def load_daily_demand(item_ids, start_day, end_day):
+    """
+    Matrice (articles x jours) des sorties sur [start_day, end_day[, plus le
+    premier jour d'activité de chaque article (indice de colonne, 0 si antérieur).
+    """
+    n_days = (end_day - start_day).days
+    index = {item_id: position for position, item_id in enumerate(item_ids)}
+    demand = np.zeros((len(item_ids), n_days))
+
+    rows = (
+        Movement.objects.filter(type_mouvement='SORTIE', date__gte=_aware(start_day), date__lt=_aware(end_day))
+        .annotate(day=TruncDate('date'))
+        .values('item_id', 'day')
+        .annotate(qty=Sum('quantite'))
+        .values_list('item_id', 'day', 'qty')
+    )
+    items, days, quantities = [], [], []
+    for item_id, day, qty in rows.iterator(chunk_size=5000):
+        if item_id in index:
+            items.append(index[item_id])
+            days.append((day - start_day).days)
+            quantities.append(qty)
+    if items:
+        np.add.at(demand, (np.array(items), np.array(days)), np.array(quantities, dtype=float))
+
+    # Avant son premier mouvement, un article n'existait pas : ces jours ne comptent pas
+    first_day = np.full(len(item_ids), n_days)
+    firsts = Movement.objects.values('item_id').annotate(first=Min('date')).values_list('item_id', 'first')
+    for item_id, first in firsts.iterator(chunk_size=5000):
+        if item_id in index:
+            position = (timezone.localdate(first) - start_day).days
+            first_day[index[item_id]] = min(max(position, 0), n_days)
+    return demand, first_day
+
+
+def compute_forecasts(demand, first_day, start_day, today, lead_time=LEAD_TIME_DAYS, service_level=SERVICE_LEVEL):
+    """
+    Calcule les prévisions à partir de la matrice des sorties.
+    Retourne un dict de tableaux (un élément par article) et le masque des
+    articles ayant assez d'historique.
+    """
+    n_items, n_days = demand.shape
+    columns = np.arange(n_days)
+    active = columns[None, :] >= first_day[:, None]
+    active_days = active.sum(axis=1)
+    eligible = active_days >= MIN_HISTORY_DAYS
+    safe_days = np.maximum(active_days, 1)
+
+    # Consommation moyenne pondérée (décroissance exponentielle)
+    weights = 0.5 ** ((n_days - 1 - columns) / HALF_LIFE_DAYS) * active
+    weight_sums = weights.sum(axis=1)
+    rate = np.divide((weights * demand).sum(axis=1), weight_sums, out=np.zeros(n_items), where=weight_sums > 0)
+
+    # Saisonnalité hebdomadaire : moyenne par jour de semaine / moyenne globale
+    weekdays = (start_day.weekday() + columns) % 7
+    mean = (demand * active).sum(axis=1) / safe_days
+    factors = np.ones((n_items, 7))
+    for weekday in range(7):
+        mask = active & (weekdays == weekday)[None, :]
+        count = mask.sum(axis=1)
+        weekday_mean = np.divide((demand * mask).sum(axis=1), count, out=np.zeros(n_items), where=count > 0)
+        raw = np.divide(weekday_mean, mean, out=np.ones(n_items), where=mean > 0)
+        # Historique court : coefficient ramené vers 1
+        factors[:, weekday] = 1 + (raw - 1) * count / (count + SEASONALITY_PRIOR_WEEKS)
+    factors /= factors.mean(axis=1, keepdims=True)
+
+    # Dispersion une fois la saisonnalité retirée
+    expected = rate[:, None] * factors[:, weekdays]
+    residuals = (demand - expected) * active
+    std = np.sqrt((residuals ** 2).sum(axis=1) / np.maximum(active_days - 1, 1))
+
+    # Sorties prévues pendant le délai de réapprovisionnement
+    upcoming = (today.weekday() + np.arange(lead_time)) % 7
+    lead_time_demand = rate * factors[:, upcoming].sum(axis=1)
+    z = NormalDist().inv_cdf(service_level)
+    safety_stock = np.ceil(z * std * math.sqrt(lead_time))
+    reorder_point = np.ceil(lead_time_demand + safety_stock)
+
+    return {
+        'daily_rate': rate,
+        'weekday_factors': factors,
+        'demand_std': std,
+        'lead_time_demand': lead_time_demand,
+        'safety_stock': safety_stock,
+        'reorder_point': reorder_point,
+    }, eligible
+
+
+def refresh_forecasts(history_days=HISTORY_DAYS, lead_time=LEAD_TIME_DAYS, service_level=SERVICE_LEVEL, today=None):
+    """Recalcule la table ItemForecast ; retourne le nombre de prévisions écrites"""
+    today = today or timezone.localdate()
+    start_day = today - timedelta(days=history_days)
+    item_ids = list(Item.objects.order_by('pk').values_list('pk', flat=True))
+    if not item_ids:
+        return 0
+
+    demand, first_day = load_daily_demand(item_ids, start_day, today)
+    results, eligible = compute_forecasts(demand, first_day, start_day, today, lead_time, service_level)
+
+    now = timezone.now()
+    forecasts = [
+        ItemForecast(
+            item_id=item_ids[position],
+            daily_rate=round(float(results['daily_rate'][position]), 4),
+            weekday_factors=[round(float(factor), 3) for factor in results['weekday_factors'][position]],
+            demand_std=round(float(results['demand_std'][position]), 4),
+            lead_time_days=lead_time,
+            lead_time_demand=round(float(results['lead_time_demand'][position]), 2),
+            safety_stock=int(results['safety_stock'][position]),
+            reorder_point=int(results['reorder_point'][position]),
+            computed_at=now,
+        )
+        for position in np.flatnonzero(eligible)
+    ]
+    with transaction.atomic():
+        ItemForecast.objects.bulk_create(
+            forecasts,
+            batch_size=BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=['item'],
+            update_fields=[
+                'daily_rate', 'weekday_factors', 'demand_std', 'lead_time_days',
+                'lead_time_demand', 'safety_stock', 'reorder_point', 'computed_at',
+            ],
+        )
+        # Articles sortis du calcul (historique devenu insuffisant) : seuil par défaut
+        ItemForecast.objects.filter(computed_at__lt=now).delete()
+
+        # Les points de commande ont changé : alertes réévaluées sur tout le catalogue
+        evaluate_alerts()
+    return len(forecasts)
@@ -25,3 +25,9 @@ class CategoryForm(forms.ModelForm):
     class Meta:
         model = Category
         fields = '__all__'
+
+class InventorySessionForm(forms.ModelForm):
+    """Ouverture d'une session de comptage (toutes catégories si vide)"""
+    class Meta:
+        model = Inventory
+        fields = ['description', 'category']
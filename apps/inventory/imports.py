@@ -0,0 +1,244 @@
+"""
+Import en masse d'articles et de leur stock d'ouverture (CSV ou XLSX).
+
+Le fichier est lu au fil de l'eau et traité par paquets : pour chaque
+paquet, les articles sont insérés par bulk_create puis leurs mouvements
+d'ouverture (ENTREE) de la même façon. Les catégories et modes
+d'acquisition sont résolus par un dictionnaire chargé une seule fois ;
+les noms inconnus sont créés à la volée. Une ligne invalide est écartée
+et signalée sans bloquer les autres.
+"""
+import csv
+import io
+import unicodedata
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+
+from .alerts import evaluate_alerts
+from .dashboard import invalidate_metrics
+from .models import AcquisitionMode, Category, Item, Movement
+from .page_cache import bump_catalogue
+from .search import get_backend
+from .signals import movements_posted
+
+CHUNK_SIZE = 5000
+
+# En-tête normalisé (minuscules, sans accents) -> champ
+COLUMNS = {
+    'nom': 'name', 'name': 'name', 'article': 'name', 'designation': 'name',
+    'categorie': 'category', 'category': 'category',
+    'quantite': 'quantity', 'quantity': 'quantity', 'stock': 'quantity',
+    'prix': 'unit_price', 'prix unitaire': 'unit_price', 'unit_price': 'unit_price',
+    'statut': 'status', 'status': 'status',
+    'mode': 'acquisition_mode', "mode d'acquisition": 'acquisition_mode', 'mode dacquisition': 'acquisition_mode',
+    'acquisition_mode': 'acquisition_mode',
+}
+REQUIRED = ('name', 'category', 'unit_price')
+
+
+class ImportResult:
+    def __init__(self):
+        self.created = 0
+        self.errors = []  # [(numéro de ligne, message)]
+
+    def __repr__(self):
+        return f"<ImportResult créés={self.created} erreurs={len(self.errors)}>"
+
+
+def _normalize(header):
+    text = unicodedata.normalize('NFKD', str(header or '')).encode('ascii', 'ignore').decode()
+    return ' '.join(text.lower().split())
+
+
+def _map_header(header):
+    fields = [COLUMNS.get(_normalize(column)) for column in header]
+    missing = [field for field in REQUIRED if field not in fields]
+    if missing:
+        raise ValueError(f"Colonnes obligatoires manquantes : {', '.join(missing)}")
+    return fields
+
+
+def read_rows(source, filename):
+    """
+    Lit un fichier CSV ou XLSX (chemin ou fichier binaire) ligne par ligne.
+    Produit (numéro de ligne, dict champ -> valeur brute).
+    """
+    if filename.lower().endswith('.xlsx'):
+        rows = _xlsx_rows(source)
+    else:
+        rows = _csv_rows(source)
+    fields = _map_header(next(rows, []))
+    for line, row in enumerate(rows, start=2):
+        if not any(value not in (None, '') for value in row):
+            continue  # Ligne vide
+        yield line, {field: value for field, value in zip(fields, row) if field}
+
+
+def _csv_rows(source):
+    binary = open(source, 'rb') if isinstance(source, str) else source
+    try:
+        text = io.TextIOWrapper(binary, encoding='utf-8-sig', newline='')
+        sample = text.read(4096)
+        text.seek(0)
+        # Excel en français exporte avec des points-virgules
+        delimiter = ';' if sample.count(';') > sample.count(',') else ','
+        yield from csv.reader(text, delimiter=delimiter)
+        text.detach()
+    finally:
+        if isinstance(source, str):
+            binary.close()
+
+
+def _xlsx_rows(source):
+    from openpyxl import load_workbook
+
+    # read_only : les lignes sont lues à la demande, sans charger la feuille
+    workbook = load_workbook(source, read_only=True, data_only=True)
+    try:
+        yield from workbook.active.iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+
+# --- CONVERSION DES VALEURS ---
+
+def _text(value):
+    return '' if value is None else str(value).strip()
+
+
+def _decimal(value):
+    if isinstance(value, (int, float, Decimal)):
+        return Decimal(str(value))
+    # '1 500,50' (format français) ou '1500.50'
+    return Decimal(''.join(_text(value).replace(',', '.').split()))
+
+
+def _quantity(value):
+    if value in (None, ''):
+        return 0
+    number = _decimal(value)
+    if number != number.to_integral_value():
+        raise ValueError
+    return int(number)
+
+
+class Lookup:
+    """Dictionnaire nom -> id chargé une fois ; les noms inconnus sont créés"""
+
+    def __init__(self, model):
+        self.model = model
+        self.ids = {name.lower(): pk for pk, name in model.objects.values_list('pk', 'name')}
+
+    def get(self, name):
+        key = name.lower()
+        if key not in self.ids:
+            self.ids[key] = self.model.objects.create(name=name).pk
+        return self.ids[key]
+
+
+def _build_item(values, categories, modes):
+    """Retourne (article, erreur)"""
+    name = _text(values.get('name'))
+    category = _text(values.get('category'))
+    if not name:
+        return None, "Nom de l'article manquant"
+    if len(name) > Item._meta.get_field('name').max_length:
+        return None, "Nom de l'article trop long"
+    if not category:
+        return None, "Catégorie manquante"
+    try:
+        unit_price = _decimal(values.get('unit_price'))
+        if unit_price < 0 or not unit_price.is_finite():
+            raise InvalidOperation
+    except (InvalidOperation, ValueError):
+        return None, f"Prix invalide : {values.get('unit_price')!r}"
+    try:
+        quantity = _quantity(values.get('quantity'))
+        if quantity < 0:
+            raise ValueError
+    except (InvalidOperation, ValueError):
+        return None, f"Quantité invalide : {values.get('quantity')!r}"
+
+    mode = _text(values.get('acquisition_mode'))
+    return Item(
+        name=name,
+        category_id=categories.get(category[:100]),
+        acquisition_mode_id=modes.get(mode[:100]) if mode else None,
+        quantity=quantity,
+        unit_price=round(unit_price, 2),
+        status=_text(values.get('status'))[:50] or 'Disponible',
+    ), None
+
+
+def _save_chunk(items):
+    """Insère un paquet d'articles et leurs mouvements d'ouverture"""
+    with transaction.atomic():
+        Item.objects.bulk_create(items, batch_size=Movement.objects.BATCH_SIZE)
+        openings = Movement.objects.bulk_create(
+            [Movement(item_id=item.pk, type_mouvement='ENTREE', quantite=item.quantity,
+                      balance_after=item.quantity, unit_cost=item.unit_price, unit_cost_after=item.unit_price,
+                      fifo_value_after=item.quantity * item.unit_price)
+             for item in items if item.quantity > 0],
+            batch_size=Movement.objects.BATCH_SIZE,
+        )
+        get_backend().index(item.pk for item in items)
+        if openings:
+            # Photos de stock, versions de l'API... comme pour un postage ordinaire
+            movements_posted.send(
+                sender=Movement,
+                movements=openings,
+                created=True,
+                stock={movement.item_id: (0, movement.quantite) for movement in openings},
+                prices={movement.item_id: movement.unit_cost for movement in openings},
+            )
+        # Articles importés sans stock : pas de mouvement d'ouverture, alerte évaluée ici
+        evaluate_alerts(item.pk for item in items if item.quantity <= 0)
+        # Les articles sont nouveaux : les compteurs du tableau de bord sont recalculés
+        transaction.on_commit(invalidate_metrics)
+        transaction.on_commit(bump_catalogue)
+
+
+def import_items(rows, chunk_size=CHUNK_SIZE, progress=None):
+    """
+    Importe les lignes produites par read_rows. Chaque paquet est validé dans
+    sa propre transaction. progress(n) reçoit le nombre de lignes lues.
+    """
+    result = ImportResult()
+    categories = Lookup(Category)
+    modes = Lookup(AcquisitionMode)
+    chunk = []
+    read = 0
+    for line, values in rows:
+        read += 1
+        item, error = _build_item(values, categories, modes)
+        if error:
+            result.errors.append((line, error))
+            continue
+        chunk.append(item)
+        if len(chunk) >= chunk_size:
+            _save_chunk(chunk)
+            result.created += len(chunk)
+            chunk = []
+            if progress:
+                progress(read)
+    if chunk:
+        _save_chunk(chunk)
+        result.created += len(chunk)
+    if progress:
+        progress(read)
+    return result
+
+
+def count_rows(source, filename):
+    """Nombre approximatif de lignes de données (pour l'avancement)"""
+    if filename.lower().endswith('.xlsx'):
+        from openpyxl import load_workbook
+        workbook = load_workbook(source, read_only=True)
+        try:
+            return max((workbook.active.max_row or 1) - 1, 0)
+        finally:
+            workbook.close()
+    lines = sum(chunk.count(b'\n') for chunk in iter(lambda: source.read(1 << 20), b''))
+    source.seek(0)
+    return max(lines - 1, 0)
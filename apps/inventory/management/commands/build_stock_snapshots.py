@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils.dateparse import parse_date
+
+from apps.inventory.models import Item
+from apps.inventory.snapshots import rebuild_snapshots
+
+
+class Command(BaseCommand):
+    help = "Reconstruit les photos de stock journalières à partir des mouvements"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', help="Ne reconstruire qu'à partir de cette date (AAAA-MM-JJ)")
+        parser.add_argument('--chunk-size', type=int, default=1000, help="Nombre d'articles traités par lot")
+
+    def handle(self, *args, **options):
+        since = None
+        if options['since']:
+            since = parse_date(options['since'])
+            if since is None:
+                raise CommandError("Date invalide, format attendu : AAAA-MM-JJ")
+
+        item_ids = list(Item.objects.order_by('pk').values_list('pk', flat=True))
+        chunk_size = options['chunk_size']
+        total = 0
+        for start in range(0, len(item_ids), chunk_size):
+            with transaction.atomic():
+                total += rebuild_snapshots(item_ids=item_ids[start:start + chunk_size], since=since)
+        self.stdout.write(self.style.SUCCESS(f"{total} photos de stock écrites pour {len(item_ids)} articles."))
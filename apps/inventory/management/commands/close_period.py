@@ -0,0 +1,36 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.inventory.periods import close_periods
+
+
+class Command(BaseCommand):
+    help = "Clôture les mois échus jusqu'à la période donnée : soldes mensuels figés, archivage facultatif"
+
+    def add_arguments(self, parser):
+        parser.add_argument('period', help="Dernier mois à clôturer (AAAA-MM)")
+        parser.add_argument(
+            '--archive', choices=['table', 'file'], default='',
+            help="Sortir les mouvements clôturés vers la table d'archive ou un CSV compressé sous MEDIA_ROOT",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            year, month = (int(part) for part in options['period'].split('-'))
+            through = date(year, month, 1)
+        except ValueError:
+            raise CommandError("Période invalide, format attendu : AAAA-MM")
+
+        def progress(close, balances):
+            archived = f", {close.movement_count} mouvements archivés" if close.archive else ''
+            self.stdout.write(f"{close.period.strftime('%m/%Y')} : {balances} soldes figés{archived}")
+
+        try:
+            closes = close_periods(through, archive=options['archive'], progress=progress)
+        except ValueError as error:
+            raise CommandError(str(error))
+        if not closes:
+            self.stdout.write("Aucune période à clôturer.")
+            return
+        self.stdout.write(self.style.SUCCESS(f"{len(closes)} période(s) clôturée(s)."))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from apps.inventory.alerts import evaluate_alerts
+from apps.inventory.dashboard import invalidate_metrics
+
+
+class Command(BaseCommand):
+    help = "Réévalue les alertes de stock de tout le catalogue (après une correction directe en base)"
+
+    def handle(self, *args, **options):
+        changed = evaluate_alerts()
+        invalidate_metrics()
+        self.stdout.write(self.style.SUCCESS(f"{changed} alertes modifiées."))
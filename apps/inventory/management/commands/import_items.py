@@ -0,0 +1,38 @@
+import csv
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.inventory.imports import CHUNK_SIZE, import_items, read_rows
+
+
+class Command(BaseCommand):
+    help = "Importe des articles et leur stock d'ouverture depuis un fichier CSV ou XLSX"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Fichier .csv ou .xlsx (colonnes : nom, catégorie, quantité, prix, statut, mode)")
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help="Nombre de lignes insérées par transaction")
+        parser.add_argument('--errors', help="Écrire les lignes rejetées dans ce fichier CSV")
+
+    def handle(self, *args, **options):
+        path = options['path']
+        started = time.monotonic()
+        try:
+            result = import_items(read_rows(path, path), chunk_size=options['chunk_size'])
+        except (OSError, ValueError) as exc:
+            raise CommandError(str(exc))
+
+        for line, message in result.errors[:20]:
+            self.stderr.write(f"Ligne {line} : {message}")
+        if len(result.errors) > 20:
+            self.stderr.write(f"... et {len(result.errors) - 20} autres erreurs")
+        if options['errors'] and result.errors:
+            with open(options['errors'], 'w', newline='', encoding='utf-8-sig') as output:
+                writer = csv.writer(output)
+                writer.writerow(['Ligne', 'Erreur'])
+                writer.writerows(result.errors)
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"{result.created} articles importés, {len(result.errors)} lignes rejetées ({elapsed:.1f} s)."
+        ))
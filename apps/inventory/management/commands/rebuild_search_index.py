@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from apps.inventory.search import get_backend
+
+
+class Command(BaseCommand):
+    help = "Reconstruit l'index de recherche du catalogue (après un import en masse par exemple)"
+
+    def handle(self, *args, **options):
+        backend = get_backend()
+        backend.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Index de recherche reconstruit ({type(backend).__name__})."))
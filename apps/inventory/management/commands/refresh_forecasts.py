@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.inventory import forecasting
+
+
+class Command(BaseCommand):
+    help = "Recalcule les prévisions de consommation et les points de commande (à lancer chaque nuit)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--history-days', type=int, default=forecasting.HISTORY_DAYS,
+                            help="Profondeur de l'historique des sorties (jours)")
+        parser.add_argument('--lead-time', type=int, default=forecasting.LEAD_TIME_DAYS,
+                            help="Délai de réapprovisionnement (jours)")
+        parser.add_argument('--service-level', type=float, default=forecasting.SERVICE_LEVEL,
+                            help="Taux de service visé (ex : 0.95)")
+
+    def handle(self, *args, **options):
+        if not 0 < options['service_level'] < 1:
+            raise CommandError("Le taux de service doit être compris entre 0 et 1 (exclus).")
+        if options['history_days'] < 1 or options['lead_time'] < 1:
+            raise CommandError("L'historique et le délai doivent être d'au moins un jour.")
+        started = time.monotonic()
+        count = forecasting.refresh_forecasts(
+            history_days=options['history_days'],
+            lead_time=options['lead_time'],
+            service_level=options['service_level'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"{count} prévisions calculées en {time.monotonic() - started:.1f} s."
+        ))
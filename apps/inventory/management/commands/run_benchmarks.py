@@ -0,0 +1,60 @@
+import json
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.inventory.benchmarks import BENCHMARKS, compare, run_benchmarks
+
+
+class Command(BaseCommand):
+    help = (
+        "Mesure les chemins critiques (postage, tableau de bord, listes, rapport, exports, bons) "
+        "sur la base courante ; échoue en cas de régression par rapport à la référence"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('names', nargs='*', help=f"Bancs à exécuter (tous par défaut) : {', '.join(BENCHMARKS)}")
+        parser.add_argument('--repeat', type=int, default=5, help="Mesures par banc (médiane retenue)")
+        parser.add_argument('--output', help="Fichier du rapport JSON (sortie standard par défaut)")
+        parser.add_argument('--baseline', default=str(settings.STOCKPRO_BENCHMARK_BASELINE),
+                            help="Rapport de référence")
+        parser.add_argument('--time-tolerance', type=float, default=0.5,
+                            help="Dépassement de durée toléré (0.5 = +50 %%)")
+        parser.add_argument('--update-baseline', action='store_true',
+                            help="Enregistrer ce rapport comme nouvelle référence")
+
+    def handle(self, *args, **options):
+        unknown = set(options['names']) - set(BENCHMARKS)
+        if unknown:
+            raise CommandError(f"Bancs inconnus : {', '.join(sorted(unknown))}")
+        try:
+            report = run_benchmarks(repeat=options['repeat'], names=options['names'])
+        except ValueError as error:
+            raise CommandError(str(error))
+
+        content = json.dumps(report, indent=2, ensure_ascii=False)
+        if options['output']:
+            Path(options['output']).write_text(content + '\n', encoding='utf-8')
+        else:
+            self.stdout.write(content)
+        for name, result in report['benchmarks'].items():
+            self.stderr.write(f"{name:<24} {result['median_ms']:>10.1f} ms {result['queries']:>6} requêtes")
+
+        baseline = Path(options['baseline'])
+        if options['update_baseline']:
+            baseline.parent.mkdir(parents=True, exist_ok=True)
+            baseline.write_text(content + '\n', encoding='utf-8')
+            self.stderr.write(self.style.SUCCESS(f"Référence enregistrée : {baseline}"))
+            return
+        if not baseline.exists():
+            self.stderr.write(self.style.WARNING(f"Pas de référence ({baseline}) : aucune comparaison."))
+            return
+
+        regressions, warnings = compare(report, json.loads(baseline.read_text(encoding='utf-8')),
+                                        options['time_tolerance'])
+        for warning in warnings:
+            self.stderr.write(self.style.WARNING(warning))
+        if regressions:
+            raise CommandError("Régressions de performance :\n  " + "\n  ".join(regressions))
+        self.stderr.write(self.style.SUCCESS("Aucune régression par rapport à la référence."))
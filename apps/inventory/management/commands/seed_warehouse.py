@@ -0,0 +1,156 @@
+import random
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from apps.inventory.alerts import evaluate_alerts
+from apps.inventory.dashboard import invalidate_metrics
+from apps.inventory.models import AcquisitionMode, Category, Item, Movement
+from apps.inventory.page_cache import bump_catalogue
+from apps.inventory.search import get_backend
+from apps.inventory.snapshots import rebuild_snapshots
+from apps.inventory.valuation import rebuild_layers
+from personnel.models import Department, Employee
+
+CATEGORIES = [
+    'Informatique', 'Papeterie', 'Mobilier', 'Entretien', 'Consommables',
+    'Électricité', 'Quincaillerie', 'Téléphonie', 'Sécurité', 'Véhicules',
+]
+PRODUCTS = ['Câble', 'Cartouche', 'Chaise', 'Classeur', 'Disque', 'Lampe', 'Ramette', 'Savon', 'Stylo', 'Toner']
+MODES = ['Achat', 'Don', 'Transfert']
+DEPARTMENTS = ['Comptabilité', 'Logistique', 'Direction', 'Informatique', 'Ressources humaines']
+CHUNK_SIZE = 5000
+
+
+@contextmanager
+def explicit_movement_dates():
+    # Movement.date est en auto_now_add : désactivé le temps d'insérer un historique daté
+    field = Movement._meta.get_field('date')
+    field.auto_now_add = False
+    try:
+        yield
+    finally:
+        field.auto_now_add = True
+
+
+class Command(BaseCommand):
+    help = "Génère un entrepôt fictif (articles, personnel, historique de mouvements) par insertions groupées"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', type=int, default=1000, help="Nombre d'articles")
+        parser.add_argument('--movements', type=int, default=50000,
+                            help="Nombre de mouvements, hors mouvement d'ouverture de chaque article")
+        parser.add_argument('--days', type=int, default=365, help="Profondeur de l'historique (jours)")
+        parser.add_argument('--employees', type=int, default=50, help="Nombre de bénéficiaires")
+        parser.add_argument('--seed', type=int, default=None, help="Graine du générateur (jeu reproductible)")
+
+    def handle(self, *args, **options):
+        if options['items'] < 1 or options['movements'] < 0 or options['days'] < 1:
+            raise CommandError("Il faut au moins un article et un jour d'historique.")
+        rng = random.Random(options['seed'])
+        started = time.monotonic()
+
+        with transaction.atomic():
+            prices = self.create_items(rng, options['items'])
+            item_ids = list(prices)
+            employee_ids = self.create_employees(rng, options['employees'])
+            movements = self.create_movements(rng, prices, employee_ids, options['movements'], options['days'])
+
+            # Index de recherche, photos de stock, couches FIFO, alertes : comme après des postages ordinaires
+            get_backend().rebuild()
+            for start in range(0, len(item_ids), 1000):
+                rebuild_snapshots(item_ids=item_ids[start:start + 1000])
+                rebuild_layers(item_ids[start:start + 1000])
+            evaluate_alerts(item_ids)
+            transaction.on_commit(invalidate_metrics)
+            transaction.on_commit(bump_catalogue)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(item_ids)} articles et {movements} mouvements créés en {time.monotonic() - started:.1f} s."
+        ))
+
+    def create_items(self, rng, count):
+        categories = [Category.objects.get_or_create(name=name)[0] for name in CATEGORIES]
+        modes = [AcquisitionMode.objects.get_or_create(name=name)[0] for name in MODES]
+        first = Item.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+        items = [
+            Item(
+                name=f"{rng.choice(PRODUCTS)} {first + index + 1:06d}",
+                category=rng.choice(categories),
+                acquisition_mode=rng.choice(modes),
+                quantity=0,
+                unit_price=rng.randint(1, 2000) * 50,
+                min_level=rng.choice([None, None, 5, 10]),
+            )
+            for index in range(count)
+        ]
+        Item.objects.bulk_create(items, batch_size=Movement.objects.BATCH_SIZE)
+        return {item.pk: item.unit_price for item in items}
+
+    def create_employees(self, rng, count):
+        departments = [Department.objects.get_or_create(name=name)[0] for name in DEPARTMENTS]
+        employees = Employee.objects.bulk_create([
+            Employee(name=f"Employé {index + 1:04d}", department=rng.choice(departments)) for index in range(count)
+        ])
+        return [employee.pk for employee in employees]
+
+    def create_movements(self, rng, prices, employee_ids, count, days):
+        """
+        Historique chronologique : une ENTREE d'ouverture par article, puis des
+        sorties (80 %) et réapprovisionnements répartis sur la période. Le
+        stock de chaque article est suivi pour ne jamais devenir négatif ; il
+        donne aussi le solde de la fiche de stock. Toutes les entrées étant au
+        prix de l'article, le coût moyen reste ce prix.
+        """
+        item_ids = list(prices)
+        start = timezone.now() - timedelta(days=days)
+        step = timedelta(days=days) / (count + 1)
+        stock = {pk: 0 for pk in item_ids}
+
+        def after(pk):
+            # Coût moyen et valeur FIFO : toutes les couches sont au même prix
+            return {'balance_after': stock[pk], 'unit_cost_after': prices[pk],
+                    'fifo_value_after': stock[pk] * prices[pk]}
+
+        def opening(pk):
+            stock[pk] = rng.randint(20, 500)
+            return Movement(item_id=pk, type_mouvement='ENTREE', quantite=stock[pk], date=start,
+                            unit_cost=prices[pk], **after(pk))
+
+        def movement(index):
+            pk = rng.choice(item_ids)
+            when = start + step * (index + 1)
+            quantity = rng.randint(1, 10)
+            if rng.random() < 0.8 and stock[pk] >= quantity:
+                stock[pk] -= quantity
+                beneficiary = rng.choice(employee_ids) if employee_ids else None
+                return Movement(item_id=pk, type_mouvement='SORTIE', quantite=quantity, date=when,
+                                beneficiary_id=beneficiary, **after(pk))
+            quantity *= 20
+            stock[pk] += quantity
+            return Movement(item_id=pk, type_mouvement='ENTREE', quantite=quantity, date=when,
+                            unit_cost=prices[pk], **after(pk))
+
+        with explicit_movement_dates():
+            for chunk_start in range(0, len(item_ids), CHUNK_SIZE):
+                Movement.objects.bulk_create(
+                    [opening(pk) for pk in item_ids[chunk_start:chunk_start + CHUNK_SIZE]],
+                    batch_size=Movement.objects.BATCH_SIZE,
+                )
+            for chunk_start in range(0, count, CHUNK_SIZE):
+                Movement.objects.bulk_create(
+                    [movement(index) for index in range(chunk_start, min(chunk_start + CHUNK_SIZE, count))],
+                    batch_size=Movement.objects.BATCH_SIZE,
+                )
+
+        # Stock final des articles, par paquets
+        Item.objects.bulk_update(
+            [Item(pk=pk, quantity=quantity) for pk, quantity in stock.items()],
+            ['quantity'],
+            batch_size=Movement.objects.BATCH_SIZE,
+        )
+        return len(item_ids) + count
@@ -0,0 +1,105 @@
+# Generated by Django 4.2.28 on 2026-10-18 18:06
+
+from datetime import timedelta
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Q, Sum
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+BATCH_SIZE = 500
+
+
+def backfill_snapshots(apps, schema_editor):
+    # Même reconstruction que snapshots.rebuild_snapshots(), sur les modèles
+    # historiques : on remonte le temps depuis le stock actuel de chaque article
+    Item = apps.get_model('inventory', 'Item')
+    Movement = apps.get_model('inventory', 'Movement')
+    StockSnapshot = apps.get_model('inventory', 'StockSnapshot')
+    items = {pk: (quantity, price) for pk, quantity, price in Item.objects.values_list('pk', 'quantity', 'unit_price')}
+    daily = (
+        Movement.objects.annotate(day=TruncDate('date'))
+        .values('item_id', 'day')
+        .annotate(
+            in_qty=Coalesce(Sum('quantite', filter=Q(type_mouvement='ENTREE')), 0),
+            out_qty=Coalesce(Sum('quantite', filter=Q(type_mouvement='SORTIE')), 0),
+        )
+        .order_by('item_id', '-day')
+    )
+
+    rows = []
+    running = {pk: quantity for pk, (quantity, _) in items.items()}
+    first_day = {}
+    for row in daily:
+        item_id = row['item_id']
+        closing = running[item_id]
+        rows.append(StockSnapshot(
+            item_id=item_id, day=row['day'], closing_qty=closing,
+            in_qty=row['in_qty'], out_qty=row['out_qty'], value=closing * items[item_id][1],
+        ))
+        running[item_id] = closing - row['in_qty'] + row['out_qty']
+        first_day[item_id] = row['day']
+
+    today = timezone.localdate()
+    for item_id, (quantity, price) in items.items():
+        if item_id not in first_day:
+            rows.append(StockSnapshot(item_id=item_id, day=today, closing_qty=quantity, value=quantity * price))
+        elif running[item_id]:
+            opening = running[item_id]
+            rows.append(StockSnapshot(
+                item_id=item_id, day=first_day[item_id] - timedelta(days=1),
+                closing_qty=opening, value=opening * price,
+            ))
+    StockSnapshot.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0003_alter_acquisitionmode_options_alter_category_options_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='inventory',
+            options={'verbose_name_plural': 'Inventaires'},
+        ),
+        migrations.AlterField(
+            model_name='inventoryitem',
+            name='expected_quantity',
+            field=models.IntegerField(blank=True),
+        ),
+        migrations.AlterField(
+            model_name='movement',
+            name='item',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='movements', to='inventory.item'),
+        ),
+        migrations.AlterField(
+            model_name='movement',
+            name='quantite',
+            field=models.PositiveIntegerField(),
+        ),
+        migrations.AlterField(
+            model_name='movement',
+            name='type_mouvement',
+            field=models.CharField(choices=[('ENTREE', 'Entree'), ('SORTIE', 'Sortie')], max_length=10),
+        ),
+        migrations.CreateModel(
+            name='StockSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('closing_qty', models.IntegerField()),
+                ('in_qty', models.PositiveIntegerField(default=0)),
+                ('out_qty', models.PositiveIntegerField(default=0)),
+                ('value', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='snapshots', to='inventory.item')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='stocksnapshot',
+            constraint=models.UniqueConstraint(fields=('item', 'day'), name='unique_stock_snapshot_per_day'),
+        ),
+        migrations.RunPython(backfill_snapshots, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+from django.db import migrations
+
+FTS_TABLE = 'inventory_item_fts'
+
+
+def create_fts_table(apps, schema_editor):
+    # Index plein texte propre à SQLite ; les autres bases utilisent un autre moteur
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+        "name, category, status, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+    )
+    schema_editor.execute(
+        f"INSERT INTO {FTS_TABLE} (rowid, name, category, status) "
+        "SELECT i.id, i.name, c.name, i.status FROM inventory_item i "
+        "JOIN inventory_category c ON c.id = i.category_id"
+    )
+
+
+def drop_fts_table(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0005_movement_item_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts_table, drop_fts_table),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 4.2.28 on 2026-10-18 18:21
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def close_existing_inventories(apps, schema_editor):
+    # Les inventaires saisis avant les sessions de comptage sont des archives
+    Inventory = apps.get_model('inventory', 'Inventory')
+    Inventory.objects.update(status='CLOSED', closed_at=models.F('date'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0007_item_acquisition_mode'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inventory',
+            name='category',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, to='inventory.category'),
+        ),
+        migrations.AddField(
+            model_name='inventory',
+            name='closed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='inventory',
+            name='status',
+            field=models.CharField(choices=[('OPEN', 'En cours'), ('CLOSED', 'Clôturé')], default='OPEN', max_length=10),
+        ),
+        migrations.AlterField(
+            model_name='inventoryitem',
+            name='actual_quantity',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='inventoryitem',
+            constraint=models.UniqueConstraint(fields=('inventory', 'item'), name='inventoryitem_inventory_item_uniq'),
+        ),
+        migrations.RunPython(close_existing_inventories, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.28 on 2026-10-18 18:24
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0008_inventory_count_sessions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ItemForecast',
+            fields=[
+                ('item', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='forecast', serialize=False, to='inventory.item')),
+                ('daily_rate', models.FloatField(default=0)),
+                ('weekday_factors', models.JSONField(default=list)),
+                ('demand_std', models.FloatField(default=0)),
+                ('lead_time_days', models.PositiveSmallIntegerField()),
+                ('lead_time_demand', models.FloatField(default=0)),
+                ('safety_stock', models.PositiveIntegerField(default=0)),
+                ('reorder_point', models.PositiveIntegerField(default=0)),
+                ('computed_at', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': 'Prévision',
+            },
+        ),
+    ]
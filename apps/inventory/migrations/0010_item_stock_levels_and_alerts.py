@@ -0,0 +1,62 @@
+# Generated by Django 4.2.28 on 2026-10-18 18:32
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import F, Q
+from django.utils import timezone
+
+
+def raise_initial_alerts(apps, schema_editor):
+    # Aucun seuil saisi à ce stade : ruptures et points de commande seulement
+    Item = apps.get_model('inventory', 'Item')
+    StockAlert = apps.get_model('inventory', 'StockAlert')
+    threshold = getattr(settings, 'STOCKPRO_CRITICAL_THRESHOLD', 10)
+    now = timezone.now()
+    out = Item.objects.filter(quantity__lte=0)
+    reorder = Item.objects.filter(quantity__gt=0).filter(
+        Q(forecast__isnull=True, quantity__lt=threshold)
+        | Q(forecast__isnull=False, quantity__lte=F('forecast__reorder_point'))
+    )
+    for kind, queryset in (('OUT', out), ('REORDER', reorder)):
+        StockAlert.objects.bulk_create(
+            [StockAlert(item_id=pk, kind=kind, raised_at=now) for pk in queryset.values_list('pk', flat=True).iterator()],
+            batch_size=500,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0009_itemforecast'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='item',
+            name='max_level',
+            field=models.PositiveIntegerField(blank=True, null=True, verbose_name='stock maximum'),
+        ),
+        migrations.AddField(
+            model_name='item',
+            name='min_level',
+            field=models.PositiveIntegerField(blank=True, null=True, verbose_name='stock minimum'),
+        ),
+        migrations.AddField(
+            model_name='item',
+            name='reorder_level',
+            field=models.PositiveIntegerField(blank=True, null=True, verbose_name='point de commande'),
+        ),
+        migrations.CreateModel(
+            name='StockAlert',
+            fields=[
+                ('item', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='alert', serialize=False, to='inventory.item')),
+                ('kind', models.CharField(choices=[('OUT', 'Rupture'), ('MIN', 'Sous le stock minimum'), ('REORDER', 'À réapprovisionner'), ('MAX', 'Surstock')], max_length=10)),
+                ('raised_at', models.DateTimeField()),
+            ],
+            options={
+                'indexes': [models.Index(fields=['kind', 'raised_at'], name='stockalert_kind_idx')],
+            },
+        ),
+        migrations.RunPython(raise_initial_alerts, migrations.RunPython.noop),
+    ]
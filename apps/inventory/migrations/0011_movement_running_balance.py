@@ -0,0 +1,57 @@
+# Generated by Django 4.2.28 on 2026-10-18 18:57
+
+from django.db import migrations, models
+from django.db.models import Case, F, Sum, When
+
+BATCH_SIZE = 500
+
+
+def backfill_balances(apps, schema_editor):
+    # Soldes ancrés sur le stock actuel (stock d'ouverture = stock - somme des
+    # mouvements). Sans historique des prix d'entrée, le coût moyen est le prix
+    # unitaire actuel de l'article.
+    Item = apps.get_model('inventory', 'Item')
+    Movement = apps.get_model('inventory', 'Movement')
+    items = {pk: (quantity, price) for pk, quantity, price in Item.objects.values_list('pk', 'quantity', 'unit_price')}
+    signed = Case(When(type_mouvement='ENTREE', then=F('quantite')), default=-F('quantite'))
+    totals = dict(Movement.objects.values('item').annotate(total=Sum(signed)).values_list('item', 'total'))
+
+    balances, batch = {}, []
+    rows = Movement.objects.order_by('item', 'date', 'pk').only('pk', 'item_id', 'type_mouvement', 'quantite')
+    for movement in rows.iterator(chunk_size=2000):
+        quantity, price = items[movement.item_id]
+        if movement.item_id not in balances:
+            balances[movement.item_id] = quantity - totals[movement.item_id]
+        delta = movement.quantite if movement.type_mouvement == 'ENTREE' else -movement.quantite
+        balances[movement.item_id] += delta
+        movement.balance_after, movement.unit_cost_after = balances[movement.item_id], price
+        batch.append(movement)
+        if len(batch) >= BATCH_SIZE:
+            Movement.objects.bulk_update(batch, ['balance_after', 'unit_cost_after'])
+            batch = []
+    Movement.objects.bulk_update(batch, ['balance_after', 'unit_cost_after'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0010_item_stock_levels_and_alerts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='movement',
+            name='balance_after',
+            field=models.IntegerField(editable=False, null=True, verbose_name='solde après mouvement'),
+        ),
+        migrations.AddField(
+            model_name='movement',
+            name='unit_cost_after',
+            field=models.DecimalField(decimal_places=4, editable=False, max_digits=14, null=True, verbose_name='coût unitaire moyen'),
+        ),
+        migrations.AddIndex(
+            model_name='movement',
+            index=models.Index(fields=['item', 'date', 'id'], name='movement_item_date_idx'),
+        ),
+        migrations.RunPython(backfill_balances, migrations.RunPython.noop),
+    ]
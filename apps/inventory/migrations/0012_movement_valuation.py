@@ -0,0 +1,80 @@
+# Generated by Django 4.2.28 on 2026-10-18 19:06
+
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import F, Min, OuterRef, Subquery
+from django.utils import timezone
+
+BATCH_SIZE = 500
+
+
+def backfill_valuation(apps, schema_editor):
+    # Sans historique des prix d'entrée (cf. 0011), chaque entrée est valorisée
+    # au prix actuel de l'article : la valeur FIFO est alors solde x prix, et
+    # les couches encore en stock sont les entrées les plus récentes.
+    Item = apps.get_model('inventory', 'Item')
+    Movement = apps.get_model('inventory', 'Movement')
+    CostLayer = apps.get_model('inventory', 'CostLayer')
+    price = Subquery(Item.objects.filter(pk=OuterRef('item_id')).values('unit_price')[:1])
+    Movement.objects.filter(type_mouvement='ENTREE').update(unit_cost=price)
+    Movement.objects.update(fifo_value_after=F('balance_after') * F('unit_cost_after'))
+
+    items = {pk: (quantity, unit_price) for pk, quantity, unit_price in Item.objects.values_list('pk', 'quantity', 'unit_price')}
+    uncovered = {pk: max(quantity, 0) for pk, (quantity, _) in items.items()}
+    layers = []
+    receipts = (
+        Movement.objects.filter(type_mouvement='ENTREE')
+        .order_by('item', '-date', '-pk')
+        .values_list('pk', 'item_id', 'date', 'quantite', 'unit_cost')
+    )
+    for pk, item_id, date, quantite, unit_cost in receipts.iterator(chunk_size=2000):
+        remaining = min(quantite, uncovered[item_id])
+        uncovered[item_id] -= remaining
+        layers.append(CostLayer(item_id=item_id, movement_id=pk, received_at=date,
+                                quantity=quantite, remaining=remaining, unit_cost=unit_cost))
+    # Stock non expliqué par les entrées : couche d'ouverture
+    first_dates = dict(Movement.objects.values('item').annotate(first=Min('date')).values_list('item', 'first'))
+    now = timezone.now()
+    for item_id, quantity in uncovered.items():
+        if quantity > 0:
+            layers.append(CostLayer(item_id=item_id, received_at=first_dates.get(item_id, now),
+                                    quantity=quantity, remaining=quantity, unit_cost=items[item_id][1]))
+    # Les sorties consomment les couches par id croissant : insertion de la plus ancienne à la plus récente
+    layers.sort(key=lambda layer: (layer.item_id, layer.received_at, layer.movement_id or 0))
+    CostLayer.objects.bulk_create(layers, batch_size=BATCH_SIZE)
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0011_movement_running_balance'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='movement',
+            name='fifo_value_after',
+            field=models.DecimalField(decimal_places=4, editable=False, max_digits=18, null=True, verbose_name='valeur FIFO après mouvement'),
+        ),
+        migrations.AddField(
+            model_name='movement',
+            name='unit_cost',
+            field=models.DecimalField(blank=True, decimal_places=4, max_digits=14, null=True, validators=[django.core.validators.MinValueValidator(0)], verbose_name="coût unitaire d'entrée"),
+        ),
+        migrations.CreateModel(
+            name='CostLayer',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('received_at', models.DateTimeField()),
+                ('quantity', models.PositiveIntegerField()),
+                ('remaining', models.PositiveIntegerField()),
+                ('unit_cost', models.DecimalField(decimal_places=4, max_digits=14)),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cost_layers', to='inventory.item')),
+                ('movement', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='cost_layer', to='inventory.movement')),
+            ],
+            options={
+                'indexes': [models.Index(condition=models.Q(('remaining__gt', 0)), fields=['item', 'id'], name='costlayer_open_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_valuation, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,74 @@
+# Generated by Django 4.2.28 on 2026-10-18 19:12
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('personnel', '0002_alter_department_options_alter_employee_options_and_more'),
+        ('inventory', '0012_movement_valuation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PeriodClose',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.DateField(unique=True)),
+                ('closed_at', models.DateTimeField(auto_now_add=True)),
+                ('movement_count', models.PositiveIntegerField(default=0)),
+                ('archive', models.CharField(blank=True, choices=[('', 'Aucune'), ('table', "Table d'archive"), ('file', 'Fichier compressé')], max_length=10)),
+                ('archive_file', models.FileField(blank=True, upload_to='archives/')),
+            ],
+            options={
+                'ordering': ['-period'],
+            },
+        ),
+        migrations.AlterField(
+            model_name='costlayer',
+            name='movement',
+            field=models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='cost_layer', to='inventory.movement'),
+        ),
+        migrations.CreateModel(
+            name='ArchivedMovement',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('type_mouvement', models.CharField(choices=[('ENTREE', 'Entree'), ('SORTIE', 'Sortie')], max_length=10)),
+                ('quantite', models.PositiveIntegerField()),
+                ('date', models.DateTimeField()),
+                ('balance_after', models.IntegerField(null=True)),
+                ('unit_cost_after', models.DecimalField(decimal_places=4, max_digits=14, null=True)),
+                ('unit_cost', models.DecimalField(decimal_places=4, max_digits=14, null=True)),
+                ('fifo_value_after', models.DecimalField(decimal_places=4, max_digits=18, null=True)),
+                ('beneficiary', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='personnel.employee')),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_movements', to='inventory.item')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='PeriodBalance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.DateField()),
+                ('opening_qty', models.IntegerField()),
+                ('in_qty', models.PositiveIntegerField(default=0)),
+                ('out_qty', models.PositiveIntegerField(default=0)),
+                ('closing_qty', models.IntegerField()),
+                ('closing_value', models.DecimalField(decimal_places=4, max_digits=18)),
+                ('fifo_value', models.DecimalField(decimal_places=4, max_digits=18)),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='period_balances', to='inventory.item')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['period', 'item'], name='periodbalance_period_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='periodbalance',
+            constraint=models.UniqueConstraint(fields=('item', 'period'), name='unique_period_balance'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedmovement',
+            index=models.Index(fields=['item', 'date'], name='archivedmovement_item_date_idx'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.28 on 2026-10-18 20:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0013_period_close'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='archivedmovement',
+            name='item',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='archived_movements', to='inventory.item'),
+        ),
+        migrations.AlterField(
+            model_name='periodbalance',
+            name='item',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='period_balances', to='inventory.item'),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 4.2.28 on 2026-10-18 20:09
+
+from django.db import migrations, models
+from django.db.models import Exists, OuterRef, Subquery
+
+
+def undate_opening_stock(apps, schema_editor):
+    # Les reprises 0004 et 0012 dataient le stock d'ouverture d'un article
+    # sans mouvement du jour de la migration (et, pour les photos, de la
+    # veille du premier mouvement) : les lectures à une date antérieure le
+    # perdaient. Ces lignes passent sans date, antérieures à toute date.
+    StockSnapshot = apps.get_model('inventory', 'StockSnapshot')
+    CostLayer = apps.get_model('inventory', 'CostLayer')
+    Movement = apps.get_model('inventory', 'Movement')
+    ArchivedMovement = apps.get_model('inventory', 'ArchivedMovement')
+
+    # Photo la plus ancienne de chaque article, si elle n'a ni entrée ni sortie
+    first = StockSnapshot.objects.filter(item=OuterRef('item')).order_by('day', 'pk').values('pk')[:1]
+    StockSnapshot.objects.filter(pk=Subquery(first), in_qty=0, out_qty=0).update(day=None)
+
+    # Couches d'ouverture des articles sans aucun mouvement, vivant ou archivé
+    CostLayer.objects.filter(movement__isnull=True).exclude(
+        Exists(Movement.objects.filter(item=OuterRef('item')))
+    ).exclude(
+        Exists(ArchivedMovement.objects.filter(item=OuterRef('item')))
+    ).update(received_at=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0014_protect_closed_period_history'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='costlayer',
+            name='received_at',
+            field=models.DateTimeField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='stocksnapshot',
+            name='day',
+            field=models.DateField(null=True),
+        ),
+        migrations.RunPython(undate_opening_stock, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,24 @@
-from django.db import models
-from django.core.exceptions import ValidationError
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models import (
+    Case, DecimalField, ExpressionWrapper, F, IntegerField, OuterRef, Q, Subquery, Sum, Value, When,
+)
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .signals import movements_posted
+from django.core.exceptions import ObjectDoesNotExist, ValidationError
+from django.core.validators import MinValueValidator
+
+# Seuil d'alerte des articles sans prévision de consommation
+DEFAULT_CRITICAL_THRESHOLD = getattr(settings, 'STOCKPRO_CRITICAL_THRESHOLD', 10)
+
+# Valorisation du stock : coût moyen pondéré ('average') ou premier entré, premier sorti ('fifo')
+VALUATION_METHODS = ('average', 'fifo')
+DEFAULT_VALUATION_METHOD = getattr(settings, 'STOCKPRO_VALUATION_METHOD', 'average')
 
 # --- MODÈLES DE BASE ---
 
@@ -18,18 +37,326 @@ class AcquisitionMode(models.Model):
     def __str__(self):
         return self.name
 
+class ItemQuerySet(models.QuerySet):
+    def with_period_totals(self, start, end):
+        """
+        Annote chaque article avec ses entrées, sorties (sur [start, end[)
+        et sa valeur de stock, en une seule requête groupée.
+        """
+        period = Q(movements__date__gte=start, movements__date__lt=end)
+        return self.annotate(
+            entrees=Coalesce(Sum('movements__quantite', filter=period & Q(movements__type_mouvement='ENTREE')), 0),
+            sorties=Coalesce(Sum('movements__quantite', filter=period & Q(movements__type_mouvement='SORTIE')), 0),
+            valeur=ExpressionWrapper(
+                F('quantity') * F('unit_price'),
+                output_field=DecimalField(max_digits=14, decimal_places=2),
+            ),
+        )
+
+    def with_stock_at(self, day):
+        """
+        Annote chaque article avec son stock en fin de journée 'day'
+        (stock_at_date), lu dans la dernière photo de stock <= day, à défaut
+        dans sa photo d'ouverture (sans date : antérieure à toute date).
+        """
+        snapshots = StockSnapshot.objects.filter(item=OuterRef('pk'))
+        closing = snapshots.filter(day__lte=day).order_by('-day').values('closing_qty')[:1]
+        opening = snapshots.filter(day__isnull=True).values('closing_qty')[:1]
+        return self.annotate(stock_at_date=Coalesce(Subquery(closing), Subquery(opening), 0))
+
+    def with_stock_value(self, when=None, method=None, name='stock_value'):
+        """
+        Annote chaque article avec la valeur de son stock (stock_value) à une
+        date (fin de journée), à un instant précis ou, sans when, maintenant.
+
+        La valeur est lue sur le dernier mouvement <= when (solde x coût moyen,
+        ou valeur FIFO tenue au postage) : aucun historique n'est rejoué. Sans
+        mouvement (archivé lors d'une clôture), elle est lue dans le dernier
+        solde mensuel clos ; avant tout mouvement, dans les couches d'ouverture.
+        """
+        method = method or DEFAULT_VALUATION_METHOD
+        if method not in VALUATION_METHODS:
+            raise ValueError(f"Méthode de valorisation inconnue : {method}")
+        movements = Movement.objects.filter(item=OuterRef('pk'))
+        balances = PeriodBalance.objects.filter(item=OuterRef('pk'))
+        openings = CostLayer.objects.filter(item=OuterRef('pk'), movement__isnull=True)
+        if isinstance(when, datetime):
+            movements = movements.filter(date__lte=when)
+            balances = balances.filter(period__lt=timezone.localdate(when).replace(day=1))
+            openings = openings.filter(Q(received_at__lte=when) | Q(received_at__isnull=True))
+        elif when is not None:
+            end = timezone.make_aware(datetime.combine(when + timedelta(days=1), time.min))
+            movements = movements.filter(date__lt=end)
+            # Mois entièrement écoulés à la fin de la journée when
+            balances = balances.filter(period__lt=(when + timedelta(days=1)).replace(day=1))
+            openings = openings.filter(Q(received_at__lt=end) | Q(received_at__isnull=True))
+
+        if method == 'fifo':
+            value = F('fifo_value_after')
+            closing = 'fifo_value'
+        else:
+            value = ExpressionWrapper(F('balance_after') * F('unit_cost_after'), output_field=VALUE_FIELD)
+            closing = 'closing_value'
+        latest = movements.order_by('-date', '-pk').annotate(value=value).values('value')[:1]
+        closed = balances.order_by('-period').values(closing)[:1]
+        opening = (
+            openings.values('item')
+            .annotate(value=Sum(F('quantity') * F('unit_cost'), output_field=VALUE_FIELD))
+            .values('value')
+        )
+        return self.annotate(**{name: Coalesce(
+            Subquery(latest), Subquery(closed), Subquery(opening), Value(Decimal(0)), output_field=VALUE_FIELD,
+        )})
+
+    def critical(self):
+        """Articles en alerte de stock bas (table StockAlert, tenue à jour par inventory.alerts)"""
+        return self.filter(alert__kind__in=StockAlert.LOW_KINDS)
+
+class ItemManager(models.Manager.from_queryset(ItemQuerySet)):
+    def apply_stock_delta(self, item_id, delta):
+        """
+        Applique un écart de stock par un UPDATE conditionnel unique :
+        quantity = quantity + delta WHERE quantity >= -delta.
+        Retourne False si la sortie dépasse le stock (aucune ligne modifiée).
+        """
+        qs = self.filter(pk=item_id)
+        if delta < 0:
+            qs = qs.filter(quantity__gte=-delta)
+        return qs.update(quantity=F('quantity') + delta) == 1
+
 class Item(models.Model):
     name = models.CharField(max_length=100)
     category = models.ForeignKey(Category, on_delete=models.CASCADE)
     quantity = models.IntegerField(default=0)  # Stock actuel
     unit_price = models.DecimalField(max_digits=10, decimal_places=2)
     status = models.CharField(max_length=50, default="Disponible")
+    acquisition_mode = models.ForeignKey(AcquisitionMode, on_delete=models.SET_NULL, null=True, blank=True)
+    # Seuils d'alerte (vides : point de commande calculé ou seuil par défaut)
+    min_level = models.PositiveIntegerField("stock minimum", null=True, blank=True)
+    reorder_level = models.PositiveIntegerField("point de commande", null=True, blank=True)
+    max_level = models.PositiveIntegerField("stock maximum", null=True, blank=True)
+
+    objects = ItemManager()
+
+    class Meta:
+        indexes = [
+            # Liste du catalogue triée par nom, éventuellement filtrée par catégorie
+            models.Index(fields=['name'], name='item_name_idx'),
+            models.Index(fields=['category', 'name'], name='item_category_name_idx'),
+            # Alertes de stock critique (quantity__lt) et filtre par statut
+            models.Index(fields=['quantity'], name='item_quantity_idx'),
+            models.Index(fields=['status'], name='item_status_idx'),
+        ]
 
     def __str__(self):
         return f"{self.name} ({self.quantity})"
 
+    def clean(self):
+        if self.min_level is not None and self.max_level is not None and self.min_level > self.max_level:
+            raise ValidationError({'max_level': "Le stock maximum doit être supérieur au stock minimum."})
+
+    @property
+    def stock_alert(self):
+        """Alerte active ou None (utiliser select_related('alert'))"""
+        try:
+            return self.alert
+        except ObjectDoesNotExist:
+            return None
+
+    @property
+    def is_critical(self):
+        alert = self.stock_alert
+        return alert is not None and alert.kind in StockAlert.LOW_KINDS
+
 # --- LOGIQUE DE MOUVEMENTS ---
 
+COST_PRECISION = Decimal('0.0001')
+VALUE_FIELD = DecimalField(max_digits=18, decimal_places=4)
+
+
+def weighted_cost(balance_before, cost_before, movement):
+    """
+    Coût unitaire moyen pondéré après le mouvement. Une entrée est valorisée
+    à son coût d'entrée (à défaut, au prix unitaire de l'article au moment du
+    postage) ; une sortie ne change pas le coût moyen.
+    """
+    if movement.type_mouvement != 'ENTREE':
+        return Decimal(str(cost_before)).quantize(COST_PRECISION)
+    entry_cost = movement.item.unit_price if movement.unit_cost is None else movement.unit_cost
+    balance_before = max(balance_before, 0)
+    # Prix éventuellement saisis en int/float sur une instance non relue
+    total = balance_before * Decimal(str(cost_before)) + movement.quantite * Decimal(str(entry_cost))
+    return (total / (balance_before + movement.quantite)).quantize(COST_PRECISION)
+
+
+def _last_cost():
+    # Coût moyen après le dernier mouvement de l'article (index item, date, id)
+    return Subquery(
+        Movement.objects.filter(item=OuterRef('pk')).order_by('-date', '-pk').values('unit_cost_after')[:1]
+    )
+
+
+def _open_layers():
+    """Quantité et valeur des couches FIFO ouvertes de l'article, lues avec son stock"""
+    layers = CostLayer.objects.filter(item=OuterRef('pk'), remaining__gt=0).values('item')
+    quantity = layers.annotate(total=Sum('remaining')).values('total')
+    value = layers.annotate(
+        total=Sum(F('remaining') * F('unit_cost'), output_field=VALUE_FIELD)
+    ).values('total')
+    return {
+        'layers_qty': Coalesce(Subquery(quantity), 0),
+        'layers_value': Coalesce(Subquery(value), Value(Decimal(0)), output_field=VALUE_FIELD),
+    }
+
+
+def _fifo_before(quantity, layers_qty, layers_value):
+    # Valeur FIFO connue si les couches couvrent exactement le stock ; sinon
+    # (écart à combler) c'est inventory.valuation qui valorise
+    return Decimal(str(layers_value)) if layers_qty == quantity else None
+
+
+class MovementManager(models.Manager):
+    # Nombre d'articles mis à jour par UPDATE (et de lignes par INSERT)
+    BATCH_SIZE = 500
+
+    def post_batch(self, lines):
+        """
+        Poste un lot de lignes ENTREE/SORTIE dans une seule transaction.
+
+        Chaque ligne est un dict avec 'item' (ou 'item_id'), 'type_mouvement',
+        'quantite' et éventuellement 'beneficiary' (ou 'beneficiary_id') et,
+        pour une entrée, 'unit_cost' (coût d'entrée, prix de l'article par défaut).
+        Les lignes sont appliquées dans l'ordre ; une ligne invalide est écartée
+        sans bloquer les autres. Retourne (mouvements_crees, erreurs) où
+        erreurs associe l'index de la ligne à son message.
+        """
+        lines = list(lines)
+        errors = {}
+        valid_types = dict(self.model.TYPES)
+
+        def item_id_of(line):
+            item = line.get('item')
+            return item.pk if isinstance(item, Item) else line.get('item_id', item)
+
+        with transaction.atomic():
+            # 1. Lecture du stock de tous les articles concernés en une requête
+            item_ids = {item_id_of(line) for line in lines}
+            # (avec le prix, le dernier coût moyen et les couches FIFO ouvertes)
+            stock, prices, costs, fifo = {}, {}, {}, {}
+            rows = (
+                Item.objects.select_for_update()
+                .filter(pk__in=item_ids)
+                .annotate(last_cost=_last_cost(), **_open_layers())
+                .values_list('pk', 'quantity', 'unit_price', 'last_cost', 'layers_qty', 'layers_value')
+            )
+            for pk, quantity, unit_price, last_cost, layers_qty, layers_value in rows:
+                stock[pk], prices[pk] = quantity, unit_price
+                costs[pk] = unit_price if last_cost is None else last_cost
+                fifo[pk] = _fifo_before(quantity, layers_qty, layers_value)
+
+            # 2. Validation ligne par ligne sur le solde courant
+            stock_before = dict(stock)
+            deltas = {}
+            movements = []
+            for index, line in enumerate(lines):
+                item_id = item_id_of(line)
+                type_mouvement = line.get('type_mouvement')
+                quantite = line.get('quantite')
+                if item_id not in stock:
+                    errors[index] = f"Article introuvable : {item_id}"
+                    continue
+                if type_mouvement not in valid_types:
+                    errors[index] = f"Type de mouvement invalide : {type_mouvement}"
+                    continue
+                if not isinstance(quantite, int) or quantite <= 0:
+                    errors[index] = f"Quantité invalide : {quantite}"
+                    continue
+
+                delta = quantite if type_mouvement == 'ENTREE' else -quantite
+                if stock[item_id] + delta < 0:
+                    errors[index] = f"Action impossible : Il ne reste que {stock[item_id]} unités en stock."
+                    continue
+                unit_cost = line.get('unit_cost')
+                if unit_cost is not None and (type_mouvement != 'ENTREE' or unit_cost < 0):
+                    errors[index] = f"Coût d'entrée invalide : {unit_cost}"
+                    continue
+
+                beneficiary = line.get('beneficiary')
+                movement = self.model(
+                    item_id=item_id,
+                    type_mouvement=type_mouvement,
+                    quantite=quantite,
+                    beneficiary_id=beneficiary.pk if beneficiary is not None else line.get('beneficiary_id'),
+                )
+                if type_mouvement == 'ENTREE':
+                    unit_cost = prices[item_id] if unit_cost is None else unit_cost
+                    movement.unit_cost = Decimal(str(unit_cost)).quantize(COST_PRECISION)
+                # Solde et coût moyen courants, écrits avec le mouvement
+                costs[item_id] = weighted_cost(stock[item_id], costs[item_id], movement)
+                stock[item_id] += delta
+                deltas[item_id] = deltas.get(item_id, 0) + delta
+                movement.balance_after, movement.unit_cost_after = stock[item_id], costs[item_id]
+                # Valeur FIFO d'une entrée : une couche de plus. Une sortie
+                # consomme des couches : valorisée par inventory.valuation.
+                if type_mouvement == 'ENTREE' and fifo[item_id] is not None:
+                    fifo[item_id] += quantite * movement.unit_cost
+                    movement.fifo_value_after = fifo[item_id]
+                else:
+                    fifo[item_id] = None
+                movements.append(movement)
+
+            # 3. Un UPDATE groupé par paquet d'articles
+            changed = [pk for pk, delta in deltas.items() if delta]
+            for start in range(0, len(changed), self.BATCH_SIZE):
+                chunk = changed[start:start + self.BATCH_SIZE]
+                Item.objects.filter(pk__in=chunk).update(quantity=F('quantity') + Case(
+                    *[When(pk=pk, then=Value(deltas[pk])) for pk in chunk],
+                    output_field=IntegerField(),
+                ))
+
+            # 4. Insertion des mouvements
+            created = self.bulk_create(movements, batch_size=self.BATCH_SIZE)
+
+            if created:
+                movements_posted.send(
+                    sender=self.model,
+                    movements=created,
+                    created=True,
+                    stock={pk: (stock_before[pk], stock[pk]) for pk in deltas},
+                    prices={pk: prices[pk] for pk in deltas},
+                )
+
+        return created, errors
+
+    def rebuild_balances(self, item_id, since=None):
+        """
+        Recalcule balance_after et unit_cost_after des mouvements de l'article,
+        depuis le mouvement since (inclus) ou sur tout l'historique : après la
+        modification d'un mouvement passé, les soldes suivants sont décalés.
+        Le solde est ancré sur le stock actuel de l'article.
+        """
+        item = Item.objects.values('quantity', 'unit_price').get(pk=item_id)
+        movements = self.filter(item_id=item_id)
+        cost = item['unit_price']
+        if since is not None:
+            later = Q(date__gt=since.date) | Q(date=since.date, pk__gte=since.pk)
+            previous = movements.exclude(later).order_by('-date', '-pk').values_list('unit_cost_after', flat=True).first()
+            if previous is not None:
+                cost = previous
+            movements = movements.filter(later)
+        signed = Case(When(type_mouvement='ENTREE', then=F('quantite')), default=-F('quantite'))
+        balance = item['quantity'] - (movements.aggregate(total=Sum(signed))['total'] or 0)
+
+        rows = list(movements.order_by('date', 'pk').only('pk', 'type_mouvement', 'quantite', 'unit_cost'))
+        for movement in rows:
+            if movement.unit_cost is None:
+                movement.unit_cost = item['unit_price']
+            cost = weighted_cost(balance, cost, movement)
+            balance += movement.signed_quantity
+            movement.balance_after, movement.unit_cost_after = balance, cost
+        self.bulk_update(rows, ['balance_after', 'unit_cost_after'], batch_size=self.BATCH_SIZE)
+        return len(rows)
+
 class Movement(models.Model):
     TYPES = [('ENTREE', 'Entree'), ('SORTIE', 'Sortie')]
     
@@ -44,39 +371,361 @@ class Movement(models.Model):
         null=True, 
         blank=True
     )
+    # Fiche de stock : solde et coût unitaire moyen pondéré après le mouvement,
+    # écrits au postage dans la même transaction que le stock de l'article
+    balance_after = models.IntegerField("solde après mouvement", null=True, editable=False)
+    unit_cost_after = models.DecimalField(
+        "coût unitaire moyen", max_digits=14, decimal_places=4, null=True, editable=False
+    )
+    # Coût d'entrée d'une ENTREE (prix de l'article si non renseigné) ; vide pour une SORTIE
+    unit_cost = models.DecimalField(
+        "coût unitaire d'entrée", max_digits=14, decimal_places=4, null=True, blank=True,
+        validators=[MinValueValidator(0)],
+    )
+    # Valeur FIFO du stock de l'article après le mouvement (tenue par inventory.valuation)
+    fifo_value_after = models.DecimalField(
+        "valeur FIFO après mouvement", max_digits=18, decimal_places=4, null=True, editable=False
+    )
+
+    objects = MovementManager()
+
+    class Meta:
+        indexes = [
+            # Périodes (tableau de bord, exports) et historique trié par date
+            models.Index(fields=['date'], name='movement_date_idx'),
+            # Agrégats par article, type et période (rapport mensuel)
+            models.Index(fields=['item', 'type_mouvement', 'date'], name='movement_item_type_date_idx'),
+            # Fiche de stock : historique d'un article par plage (date, id)
+            models.Index(fields=['item', 'date', 'id'], name='movement_item_date_idx'),
+        ]
+
+    @property
+    def signed_quantity(self):
+        """Quantité signée : positive pour une entrée, négative pour une sortie"""
+        return self.quantite if self.type_mouvement == 'ENTREE' else -self.quantite
 
     def clean(self):
         """Bloque la validation si la sortie dépasse le stock disponible"""
-        if self.type_mouvement == 'SORTIE':
-            if self.quantite > self.item.quantity:
+        # Contrôle indicatif pour les formulaires : le contrôle qui fait foi
+        # est l'UPDATE conditionnel exécuté dans save().
+        if self.type_mouvement == 'SORTIE' and self._state.adding and self.item_id:
+            if self.quantite is not None and self.quantite > self.item.quantity:
                 raise ValidationError({
                     'quantite': f"Action impossible : Il ne reste que {self.item.quantity} unités en stock pour '{self.item.name}'."
                 })
+        if self.type_mouvement == 'SORTIE' and self.unit_cost is not None:
+            raise ValidationError({'unit_cost': "Le coût d'entrée ne concerne que les entrées."})
 
     def save(self, *args, **kwargs):
         # 1. On valide d'abord (clean)
         self.full_clean()
-        
-        # 2. Mise à jour dynamique de la quantité de l'Article
-        if self.type_mouvement == 'ENTREE':
-            self.item.quantity += self.quantite
-        elif self.type_mouvement == 'SORTIE':
-            self.item.quantity -= self.quantite
-        
-        # Sauvegarde de l'article avec son nouveau stock
-        self.item.save()
-        
-        # 3. Sauvegarde du mouvement
-        super().save(*args, **kwargs)
+
+        # 2. Écriture du stock et du mouvement dans la même transaction
+        with transaction.atomic():
+            if self._state.adding:
+                deltas = {self.item_id: self.signed_quantity}
+            else:
+                # Modification : on n'applique que la différence avec l'ancienne version
+                previous = Movement.objects.select_for_update().get(pk=self.pk)
+                PeriodClose.objects.check_open(previous.date, self.date)
+                deltas = {previous.item_id: -previous.signed_quantity}
+                deltas[self.item_id] = deltas.get(self.item_id, 0) + self.signed_quantity
+
+            for item_id, delta in deltas.items():
+                if delta and not Item.objects.apply_stock_delta(item_id, delta):
+                    item = Item.objects.get(pk=item_id)
+                    raise ValidationError({
+                        'quantite': f"Action impossible : Il ne reste que {item.quantity} unités en stock pour '{item.name}'."
+                    })
+
+            # Stock écrit, dernier coût moyen et couches FIFO (avant ce mouvement)
+            rows = Item.objects.filter(pk__in=deltas).annotate(last_cost=_last_cost(), **_open_layers())
+            stock_after, prices, last_cost, fifo = {}, {}, None, None
+            values = rows.values_list('pk', 'quantity', 'unit_price', 'last_cost', 'layers_qty', 'layers_value')
+            for pk, quantity, unit_price, cost, layers_qty, layers_value in values:
+                stock_after[pk], prices[pk] = quantity, unit_price
+                if pk == self.item_id:
+                    last_cost = cost
+                    fifo = _fifo_before(quantity - deltas[pk], layers_qty, layers_value)
+            # Resynchronise l'instance en mémoire avec les valeurs écrites en base
+            # (sans charger l'article s'il ne l'est pas déjà)
+            if Movement.item.is_cached(self):
+                self.item.quantity = stock_after[self.item_id]
+
+            # 3. Sauvegarde du mouvement, avec son solde pour la fiche de stock
+            created = self._state.adding
+            if self.type_mouvement == 'ENTREE' and self.unit_cost is None:
+                self.unit_cost = prices[self.item_id]
+            if created:
+                self.balance_after = stock_after[self.item_id]
+                cost_before = prices[self.item_id] if last_cost is None else last_cost
+                self.unit_cost_after = weighted_cost(self.balance_after - self.signed_quantity, cost_before, self)
+                if self.type_mouvement == 'ENTREE' and fifo is not None:
+                    self.fifo_value_after = fifo + self.quantite * Decimal(str(self.unit_cost))
+            super().save(*args, **kwargs)
+            if not created:
+                # Mouvement passé modifié : soldes recalculés à partir de lui
+                since = self if previous.date >= self.date else previous
+                for item_id in deltas:
+                    Movement.objects.rebuild_balances(item_id, since=since)
+                self.balance_after, self.unit_cost_after = (
+                    Movement.objects.values_list('balance_after', 'unit_cost_after').get(pk=self.pk)
+                )
+
+            movements_posted.send(
+                sender=Movement,
+                movements=[self],
+                created=created,
+                stock={pk: (stock_after[pk] - deltas[pk], stock_after[pk]) for pk in deltas},
+                prices=prices,
+            )
+
+    def delete(self, *args, **kwargs):
+        # Vérifié avant d'ouvrir la suppression : la transaction de l'appelant
+        # reste utilisable (inventory.periods vérifie aussi chaque suppression)
+        PeriodClose.objects.check_open(self.date)
+        return super().delete(*args, **kwargs)
 
     def __str__(self):
         return f"{self.type_mouvement} : {self.item.name} ({self.quantite})"
 
+# --- VALORISATION DU STOCK ---
+
+class CostLayer(models.Model):
+    """
+    Couche de coût FIFO : une entrée (ou le stock d'ouverture d'un article,
+    sans mouvement) et la quantité qui n'en est pas encore sortie. Les
+    sorties consomment les couches les plus anciennes (inventory.valuation).
+    """
+    item = models.ForeignKey(Item, on_delete=models.CASCADE, related_name='cost_layers')
+    # Vide pour le stock d'ouverture et les entrées archivées (clôture de période)
+    movement = models.OneToOneField(
+        Movement, on_delete=models.SET_NULL, null=True, blank=True, related_name='cost_layer'
+    )
+    # Vide : stock d'ouverture sans date connue, antérieur à toute date
+    received_at = models.DateTimeField(null=True)
+    quantity = models.PositiveIntegerField()
+    remaining = models.PositiveIntegerField()
+    unit_cost = models.DecimalField(max_digits=14, decimal_places=4)
+
+    class Meta:
+        indexes = [
+            # Couches encore en stock d'un article, de la plus ancienne à la plus récente
+            models.Index(fields=['item', 'id'], condition=Q(remaining__gt=0), name='costlayer_open_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.item.name} : {self.remaining}/{self.quantity} à {self.unit_cost}"
+
+# --- CLÔTURE DES PÉRIODES ---
+
+class PeriodCloseManager(models.Manager):
+    def closed_through(self):
+        """Fin (exclue) du dernier mois clôturé, ou None"""
+        period = self.order_by('-period').values_list('period', flat=True).first()
+        if period is None:
+            return None
+        next_month = (period + timedelta(days=32)).replace(day=1)
+        return timezone.make_aware(datetime.combine(next_month, time.min))
+
+    def closed_movements(self, movements):
+        """Mouvements de movements datés dans une période clôturée"""
+        closed_through = self.closed_through()
+        return movements.none() if closed_through is None else movements.filter(date__lt=closed_through)
+
+    def check_open(self, *dates):
+        """Refuse toute écriture datée dans une période clôturée"""
+        closed_through = self.closed_through()
+        if closed_through is not None and any(when < closed_through for when in dates if when):
+            raise ValidationError(
+                f"Période clôturée : aucun mouvement antérieur au {closed_through.strftime('%d/%m/%Y')} "
+                "ne peut être modifié."
+            )
+
+
+class PeriodClose(models.Model):
+    """Mois clôturé : soldes figés dans PeriodBalance, mouvements éventuellement archivés"""
+    TABLE = 'table'
+    FILE = 'file'
+    ARCHIVES = [('', 'Aucune'), (TABLE, 'Table d\'archive'), (FILE, 'Fichier compressé')]
+
+    period = models.DateField(unique=True)  # Premier jour du mois
+    closed_at = models.DateTimeField(auto_now_add=True)
+    movement_count = models.PositiveIntegerField(default=0)
+    archive = models.CharField(max_length=10, choices=ARCHIVES, blank=True)
+    archive_file = models.FileField(upload_to='archives/', blank=True)
+
+    objects = PeriodCloseManager()
+
+    class Meta:
+        ordering = ['-period']
+
+    def __str__(self):
+        return f"Clôture {self.period.strftime('%m/%Y')}"
+
+
+class PeriodBalance(models.Model):
+    """Solde mensuel d'un article sur une période clôturée (articles mouvementés ou en stock)"""
+    # Historique clos : l'article ne peut plus être supprimé (pas de cascade)
+    item = models.ForeignKey(Item, on_delete=models.PROTECT, related_name='period_balances')
+    period = models.DateField()  # Premier jour du mois
+    opening_qty = models.IntegerField()
+    in_qty = models.PositiveIntegerField(default=0)
+    out_qty = models.PositiveIntegerField(default=0)
+    closing_qty = models.IntegerField()
+    closing_value = models.DecimalField(max_digits=18, decimal_places=4)  # Coût moyen pondéré
+    fifo_value = models.DecimalField(max_digits=18, decimal_places=4)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['item', 'period'], name='unique_period_balance'),
+        ]
+        indexes = [
+            # Rapport d'un mois clos : tous les articles de la période
+            models.Index(fields=['period', 'item'], name='periodbalance_period_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.item.name} au {self.period.strftime('%m/%Y')} : {self.closing_qty}"
+
+
+class ArchivedMovement(models.Model):
+    """Mouvement d'une période clôturée, sorti de la table des mouvements (même identifiant)"""
+    id = models.BigIntegerField(primary_key=True)
+    item = models.ForeignKey(Item, on_delete=models.PROTECT, related_name='archived_movements')  # Voir PeriodBalance
+    type_mouvement = models.CharField(max_length=10, choices=Movement.TYPES)
+    quantite = models.PositiveIntegerField()
+    date = models.DateTimeField()
+    beneficiary = models.ForeignKey('personnel.Employee', on_delete=models.SET_NULL, null=True, blank=True)
+    balance_after = models.IntegerField(null=True)
+    unit_cost_after = models.DecimalField(max_digits=14, decimal_places=4, null=True)
+    unit_cost = models.DecimalField(max_digits=14, decimal_places=4, null=True)
+    fifo_value_after = models.DecimalField(max_digits=18, decimal_places=4, null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['item', 'date'], name='archivedmovement_item_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.type_mouvement} : {self.item.name} ({self.quantite}, archivé)"
+
+# --- PHOTOS DE STOCK JOURNALIÈRES ---
+
+class StockSnapshotManager(models.Manager):
+    def stock_at(self, item, when):
+        """
+        Stock d'un article à une date (fin de journée) ou à un instant précis.
+
+        Une date se lit directement dans la dernière photo <= date (à défaut
+        dans la photo d'ouverture, sans date). Pour un datetime, on part de
+        la photo du jour et on retire les seuls mouvements postés après
+        l'instant demandé.
+        """
+        item_id = getattr(item, 'pk', item)
+        day = timezone.localdate(when) if isinstance(when, datetime) else when
+        snapshot = self.filter(item_id=item_id, day__lte=day).order_by('-day').first()
+        if snapshot is None:
+            opening = self.filter(item_id=item_id, day__isnull=True).values_list('closing_qty', flat=True).first()
+            return opening or 0
+        if not isinstance(when, datetime) or snapshot.day < day:
+            return snapshot.closing_qty
+
+        tail = Movement.objects.filter(
+            item_id=item_id,
+            date__gt=when,
+            date__lt=timezone.make_aware(datetime.combine(day + timedelta(days=1), time.min)),
+        ).aggregate(
+            net=Coalesce(Sum('quantite', filter=Q(type_mouvement='ENTREE')), 0)
+            - Coalesce(Sum('quantite', filter=Q(type_mouvement='SORTIE')), 0)
+        )['net']
+        return snapshot.closing_qty - tail
+
+class StockSnapshot(models.Model):
+    """Situation de stock d'un article en fin de journée"""
+    item = models.ForeignKey(Item, on_delete=models.CASCADE, related_name='snapshots')
+    day = models.DateField(null=True)               # Vide : stock d'ouverture, antérieur à toute date
+    closing_qty = models.IntegerField()             # Stock en fin de journée
+    in_qty = models.PositiveIntegerField(default=0)   # Total des entrées du jour
+    out_qty = models.PositiveIntegerField(default=0)  # Total des sorties du jour
+    value = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    objects = StockSnapshotManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['item', 'day'], name='unique_stock_snapshot_per_day'),
+        ]
+
+    def __str__(self):
+        day = self.day.strftime('%d/%m/%Y') if self.day else "stock d'ouverture"
+        return f"{self.item.name} au {day} : {self.closing_qty}"
+
+# --- PRÉVISIONS DE CONSOMMATION ---
+
+class ItemForecast(models.Model):
+    """Consommation prévue et point de commande d'un article (recalculés chaque nuit)"""
+    item = models.OneToOneField(Item, on_delete=models.CASCADE, primary_key=True, related_name='forecast')
+    daily_rate = models.FloatField(default=0)                # Sorties moyennes par jour
+    weekday_factors = models.JSONField(default=list)         # Saisonnalité hebdomadaire (lundi..dimanche)
+    demand_std = models.FloatField(default=0)                # Écart-type des sorties journalières
+    lead_time_days = models.PositiveSmallIntegerField()
+    lead_time_demand = models.FloatField(default=0)          # Sorties prévues pendant le délai
+    safety_stock = models.PositiveIntegerField(default=0)
+    reorder_point = models.PositiveIntegerField(default=0)
+    computed_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name = "Prévision"
+
+    def __str__(self):
+        return f"{self.item.name} : point de commande {self.reorder_point}"
+
+# --- ALERTES DE STOCK ---
+
+class StockAlert(models.Model):
+    """
+    Alerte active d'un article. La table ne change que lorsqu'un mouvement
+    fait franchir un seuil (voir inventory.alerts) : les écrans la lisent
+    au lieu de réévaluer les seuils article par article.
+    """
+    OUT = 'OUT'
+    BELOW_MIN = 'MIN'
+    REORDER = 'REORDER'
+    OVERSTOCK = 'MAX'
+    KINDS = [
+        (OUT, 'Rupture'),
+        (BELOW_MIN, 'Sous le stock minimum'),
+        (REORDER, 'À réapprovisionner'),
+        (OVERSTOCK, 'Surstock'),
+    ]
+    LOW_KINDS = (OUT, BELOW_MIN, REORDER)
+
+    item = models.OneToOneField(Item, on_delete=models.CASCADE, primary_key=True, related_name='alert')
+    kind = models.CharField(max_length=10, choices=KINDS)
+    raised_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['kind', 'raised_at'], name='stockalert_kind_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.item.name} : {self.get_kind_display()}"
+
 # --- INVENTAIRE PHYSIQUE ---
 
 class Inventory(models.Model):
+    OPEN = 'OPEN'
+    CLOSED = 'CLOSED'
+    STATUSES = [(OPEN, 'En cours'), (CLOSED, 'Clôturé')]
+
     date = models.DateTimeField(auto_now_add=True)
     description = models.TextField(blank=True)
+    # Session de comptage : périmètre (toutes catégories si vide) et état
+    category = models.ForeignKey(Category, on_delete=models.PROTECT, null=True, blank=True)
+    status = models.CharField(max_length=10, choices=STATUSES, default=OPEN)
+    closed_at = models.DateTimeField(null=True, blank=True)
 
     class Meta:
         verbose_name_plural = "Inventaires"
@@ -84,11 +733,28 @@ class Inventory(models.Model):
     def __str__(self):
         return f"Inventaire du {self.date.strftime('%d/%m/%Y')}"
 
+    @property
+    def is_open(self):
+        return self.status == self.OPEN
+
 class InventoryItem(models.Model):
     inventory = models.ForeignKey(Inventory, on_delete=models.CASCADE, related_name='items')
     item = models.ForeignKey(Item, on_delete=models.CASCADE)
-    expected_quantity = models.IntegerField() # Quantité théorique (système)
-    actual_quantity = models.IntegerField()   # Quantité réelle (comptée)
+    expected_quantity = models.IntegerField(blank=True) # Quantité théorique (système)
+    actual_quantity = models.IntegerField(null=True, blank=True)   # Quantité réelle (comptée), vide tant que non compté
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['inventory', 'item'], name='inventoryitem_inventory_item_uniq'),
+        ]
+
+    def save(self, *args, **kwargs):
+        # Quantité théorique non saisie : stock à la date de l'inventaire
+        if self.expected_quantity is None:
+            self.expected_quantity = StockSnapshot.objects.stock_at(self.item_id, self.inventory.date)
+        super().save(*args, **kwargs)
 
     def __str__(self):
-        return f"{self.item.name} - Écart: {self.actual_quantity - self.expected_quantity}"
\ No newline at end of file
+        if self.actual_quantity is None:
+            return f"{self.item.name} - Non compté"
+        return f"{self.item.name} - Écart: {self.actual_quantity - self.expected_quantity}"
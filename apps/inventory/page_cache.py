@@ -0,0 +1,121 @@
+"""
+Cache des pages du catalogue (liste et fiche des articles).
+
+Une version du catalogue, conservée dans le cache Django partagé entre
+processus (voir CACHES), est renouvelée (après validation de la
+transaction) à chaque écriture sur Item, Category ou Movement, à chaque
+postage par lot, import, clôture ou changement d'alerte, qu'elle vienne du
+serveur web, d'un worker ou d'une commande.
+Elle entre dans la clé des pages et fragments mis en cache : une écriture
+les rend tous caducs d'un coup, sans avoir à les énumérer.
+
+catalogue_page() ajoute le GET conditionnel : ETag (version + URL) et
+Last-Modified (date de la dernière écriture). Un client qui a déjà la page
+reçoit un 304 ; sinon la page est servie depuis le cache, sans requête SQL
+ni rendu de gabarit.
+"""
+import functools
+import hashlib
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.http import HttpResponse
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+
+from .models import Category, Item, Movement
+from .signals import movements_posted
+
+PAGE_TIMEOUT = getattr(settings, 'STOCKPRO_PAGE_CACHE_TIMEOUT', 10 * 60)
+
+KEY_PREFIX = 'stockpro:catalogue'
+VERSION_KEY = f'{KEY_PREFIX}:version'
+MODIFIED_KEY = f'{KEY_PREFIX}:modified'
+
+
+def catalogue_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # Clé absente (démarrage, cache vidé) : nouvelle version, jamais vue des clients
+        version = time.time_ns()
+        cache.add(VERSION_KEY, version, None)
+        version = cache.get(VERSION_KEY, version)
+    return version
+
+
+def catalogue_modified():
+    """Date de la dernière écriture connue sur le catalogue"""
+    modified = cache.get(MODIFIED_KEY)
+    if modified is None:
+        modified = time.time()
+        cache.add(MODIFIED_KEY, modified, None)
+        modified = cache.get(MODIFIED_KEY, modified)
+    return datetime.fromtimestamp(modified, dt_timezone.utc)
+
+
+def bump_catalogue():
+    # Nouvelle version horodatée plutôt qu'un incrément : pas de lecture
+    # préalable, et jamais une version déjà servie si la clé avait expiré
+    cache.set_many({MODIFIED_KEY: time.time(), VERSION_KEY: time.time_ns()}, None)
+
+
+# --- VUES ---
+
+def _page_key(request):
+    path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return f'{KEY_PREFIX}:page:{catalogue_version()}:{path}'
+
+
+def _etag(request, *args, **kwargs):
+    raw = f'{catalogue_version()}:{request.get_full_path()}'
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+def _last_modified(request, *args, **kwargs):
+    return catalogue_modified()
+
+
+def catalogue_page(view):
+    """
+    Page ne dépendant que du catalogue et de l'URL (ni utilisateur, ni
+    formulaire, ni message) : GET conditionnel puis cache de la réponse.
+    """
+    @functools.wraps(view)
+    def cached_view(request, *args, **kwargs):
+        key = _page_key(request)
+        cached = cache.get(key)
+        if cached is not None:
+            content, content_type = cached
+            return HttpResponse(content, content_type=content_type)
+        response = view(request, *args, **kwargs)
+        if response.status_code == 200 and not response.streaming:
+            cache.set(key, (response.content, response['Content-Type']), PAGE_TIMEOUT)
+        return response
+
+    conditional_view = condition(etag_func=_etag, last_modified_func=_last_modified)(cached_view)
+
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        response = conditional_view(request, *args, **kwargs)
+        # Le navigateur revalide à chaque affichage (304 si rien n'a changé)
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+    return wrapper
+
+
+# --- INVALIDATION ---
+
+def _on_change(sender, **kwargs):
+    transaction.on_commit(bump_catalogue)
+
+
+for model in (Item, Category, Movement):
+    post_save.connect(_on_change, sender=model, dispatch_uid=f'catalogue_save_{model.__name__}')
+    post_delete.connect(_on_change, sender=model, dispatch_uid=f'catalogue_delete_{model.__name__}')
+
+# Postage par lot (bulk_create + UPDATE) : pas de post_save
+movements_posted.connect(_on_change, sender=Movement, dispatch_uid='catalogue_movements_posted')
@@ -0,0 +1,61 @@
+"""
+Pagination par curseur (keyset) : la page suivante reprend après la dernière
+ligne affichée (WHERE (a, b) > (x, y)) au lieu d'un OFFSET, si bien que la
+page N coûte autant que la page 1.
+"""
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+PAGE_SIZE = 50
+
+
+def encode_cursor(values):
+    raw = json.dumps(values, default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token, model, fields):
+    """Retourne les valeurs du curseur converties, ou None si le curseur est invalide"""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        values = json.loads(raw)
+        if len(values) != len(fields):
+            return None
+        return [model._meta.get_field(field).to_python(value) for field, value in zip(fields, values)]
+    except (ValueError, TypeError, ValidationError):
+        return None
+
+
+def _after(fields, values, descending):
+    """Condition 'strictement après' pour un tri lexicographique sur fields"""
+    lookup = 'lt' if descending else 'gt'
+    # Borne sur le premier champ (a <= x) : donne à la base une plage d'index
+    bound = Q(**{f"{fields[0]}__{'lte' if descending else 'gte'}": values[0]})
+    condition = Q()
+    for position, field in enumerate(fields):
+        step = Q(**{f'{field}__{lookup}': values[position]})
+        for previous, value in zip(fields[:position], values[:position]):
+            step &= Q(**{previous: value})
+        condition |= step
+    return bound & condition
+
+
+def keyset_page(queryset, fields, cursor=None, page_size=PAGE_SIZE, descending=False):
+    """
+    Retourne (lignes, curseur_suivant) pour le tri sur fields.
+    Le dernier champ doit être unique (typiquement 'id').
+    """
+    queryset = queryset.order_by(*[f'-{field}' if descending else field for field in fields])
+    values = decode_cursor(cursor, queryset.model, fields) if cursor else None
+    if values is not None:
+        queryset = queryset.filter(_after(fields, values, descending))
+
+    rows = list(queryset[:page_size + 1])
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_cursor = encode_cursor([getattr(rows[-1], field) for field in fields])
+    return rows, next_cursor
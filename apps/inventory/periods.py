@@ -0,0 +1,162 @@
+"""
+Clôture des périodes mensuelles.
+
+close_periods() clôture, dans l'ordre, chaque mois échu non encore clos :
+les soldes de chaque article (ouverture, entrées, sorties, clôture, valeurs
+au coût moyen et FIFO) sont figés dans PeriodBalance, en une lecture
+groupée par mois, et le mois devient immuable (PeriodClose : un mouvement
+qui y est daté ne peut plus être modifié ni supprimé, y compris par une
+suppression en masse ou en cascade depuis son article ; un article qui a
+des soldes figés ou des mouvements archivés ne peut plus être supprimé).
+
+Les mouvements d'un mois clos peuvent être sortis de la table des
+mouvements, vers ArchivedMovement ('table') ou vers un CSV compressé sous
+MEDIA_ROOT/archives ('file') : la table et ses index restent à la taille
+des périodes ouvertes. Les rapports d'un mois clos et la valeur du stock
+aux dates closes se lisent dans les soldes mensuels.
+"""
+import csv
+import gzip
+import io
+from datetime import timedelta
+
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .dashboard import invalidate_metrics
+from .models import ArchivedMovement, CostLayer, Item, Movement, PeriodBalance, PeriodClose
+from .page_cache import bump_catalogue
+from .reports import month_bounds
+
+BATCH_SIZE = 500
+ARCHIVE_FIELDS = [
+    'id', 'item_id', 'type_mouvement', 'quantite', 'date', 'beneficiary_id',
+    'balance_after', 'unit_cost_after', 'unit_cost', 'fifo_value_after',
+]
+
+
+def _next_month(period):
+    return (period + timedelta(days=32)).replace(day=1)
+
+
+def open_periods(through):
+    """Mois échus non clôturés jusqu'à through (premier jour du mois) inclus"""
+    if through >= timezone.localdate().replace(day=1):
+        raise ValueError("Seuls les mois échus peuvent être clôturés.")
+    last = PeriodClose.objects.order_by('-period').values_list('period', flat=True).first()
+    if last is not None:
+        period = _next_month(last)
+    else:
+        first = Movement.objects.order_by('date').values_list('date', flat=True).first()
+        period = timezone.localdate(first).replace(day=1) if first else through
+    periods = []
+    while period <= through:
+        periods.append(period)
+        period = _next_month(period)
+    return periods
+
+
+def freeze_balances(period):
+    """
+    Écrit les soldes du mois des articles mouvementés ou en stock ; une
+    seule lecture groupée, quel que soit le nombre d'articles.
+    """
+    start, end = month_bounds(period.year, period.month)
+    last_day = end.date() - timedelta(days=1)
+    rows = (
+        Item.objects.with_period_totals(start, end)
+        .with_stock_at(last_day)
+        .with_stock_value(last_day, 'average', name='closing_value')
+        .with_stock_value(last_day, 'fifo', name='fifo_value')
+        .filter(Q(entrees__gt=0) | Q(sorties__gt=0) | ~Q(stock_at_date=0))
+        .order_by('pk')
+        .values_list('pk', 'entrees', 'sorties', 'stock_at_date', 'closing_value', 'fifo_value')
+    )
+    balances = [
+        PeriodBalance(
+            item_id=pk, period=period, opening_qty=closing - entrees + sorties, in_qty=entrees,
+            out_qty=sorties, closing_qty=closing, closing_value=value, fifo_value=fifo,
+        )
+        for pk, entrees, sorties, closing, value, fifo in rows
+    ]
+    PeriodBalance.objects.bulk_create(balances, batch_size=BATCH_SIZE)
+    return len(balances)
+
+
+def _delete(pks):
+    # Les couches FIFO d'une entrée archivée restent (sans mouvement) : le
+    # stock qu'elles portent n'est pas sorti. Suppression directe, sans
+    # signal par ligne : caches et compteurs sont invalidés une fois.
+    CostLayer.objects.filter(movement_id__in=pks).update(movement=None)
+    Movement.objects.filter(pk__in=pks)._raw_delete(Movement.objects.db)
+
+
+def _chunks(movements):
+    # Identifiants lus avant toute suppression, puis traités par paquets
+    pks = list(movements.order_by('pk').values_list('pk', flat=True))
+    for start in range(0, len(pks), BATCH_SIZE):
+        yield pks[start:start + BATCH_SIZE]
+
+
+def archive_to_table(movements):
+    """Copie les mouvements dans ArchivedMovement puis les supprime, par paquets"""
+    for pks in _chunks(movements):
+        rows = Movement.objects.filter(pk__in=pks).values_list(*ARCHIVE_FIELDS)
+        ArchivedMovement.objects.bulk_create([ArchivedMovement(**dict(zip(ARCHIVE_FIELDS, row))) for row in rows])
+        _delete(pks)
+
+
+def archive_to_file(movements, close):
+    """Écrit les mouvements dans archives/mouvements-AAAA-MM.csv.gz puis les supprime"""
+    buffer = io.BytesIO()
+    chunks = list(_chunks(movements))
+    with gzip.open(buffer, 'wt', encoding='utf-8', newline='') as output:
+        writer = csv.writer(output)
+        writer.writerow(ARCHIVE_FIELDS)
+        for pks in chunks:
+            for row in Movement.objects.filter(pk__in=pks).order_by('pk').values_list(*ARCHIVE_FIELDS):
+                writer.writerow(['' if value is None else value for value in row])
+    close.archive_file.save(f"mouvements-{close.period.strftime('%Y-%m')}.csv.gz", ContentFile(buffer.getvalue()))
+    for pks in chunks:
+        _delete(pks)
+
+
+def close_periods(through, archive='', progress=None):
+    """
+    Clôture tous les mois ouverts jusqu'à through (premier jour du mois),
+    un mois par transaction. archive : '' (aucune), 'table' ou 'file'.
+    Retourne la liste des PeriodClose créées.
+    """
+    if archive not in dict(PeriodClose.ARCHIVES):
+        raise ValueError(f"Archivage inconnu : {archive}")
+    closes = []
+    for period in open_periods(through):
+        start, end = month_bounds(period.year, period.month)
+        with transaction.atomic():
+            balances = freeze_balances(period)
+            movements = Movement.objects.filter(date__gte=start, date__lt=end)
+            close = PeriodClose.objects.create(period=period, archive=archive, movement_count=movements.count())
+            if archive == PeriodClose.TABLE:
+                archive_to_table(movements)
+            elif archive == PeriodClose.FILE:
+                archive_to_file(movements, close)
+            if archive:
+                transaction.on_commit(invalidate_metrics)
+                transaction.on_commit(bump_catalogue)
+        closes.append(close)
+        if progress:
+            progress(close, balances)
+    return closes
+
+
+# --- IMMUTABILITÉ ---
+
+@receiver(pre_delete, sender=Movement, dispatch_uid='periods_closed_movement_delete')
+def protect_closed_movements(sender, instance, **kwargs):
+    # Envoyé pour chaque mouvement supprimé : instance, QuerySet.delete()
+    # (action groupée de l'admin) et cascade depuis l'article
+    PeriodClose.objects.check_open(instance.date)
@@ -0,0 +1,62 @@
+"""
+Moteur de bons de sortie PDF.
+
+La mise en page fixe (en-tête, filet, libellés, cadres de signature) est
+dessinée une seule fois dans un « form XObject » ReportLab, puis réutilisée
+sur chaque page ; seules les valeurs propres au mouvement sont dessinées
+page par page. Le rendu est lancé par le worker de tâches (reports.jobs).
+"""
+from django.utils import timezone
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfgen import canvas
+
+TEMPLATE_NAME = 'bon_de_sortie'
+CHUNK_SIZE = 500
+
+
+def receipt_rows(queryset):
+    """Données des bons, jointures comprises, lues par paquets"""
+    return (
+        queryset.order_by('date', 'id')
+        .values_list('id', 'date', 'item__name', 'quantite', 'beneficiary__name')
+        .iterator(chunk_size=CHUNK_SIZE)
+    )
+
+
+def _draw_template(p, height):
+    p.beginForm(TEMPLATE_NAME)
+    p.setFont("Helvetica-Bold", 16)
+    p.drawString(100, height - 50, "STOCKPRO - BON DE SORTIE")
+    p.setFont("Helvetica", 12)
+    p.drawString(100, height - 80, "Date :")
+    p.drawString(100, height - 100, "Référence :")
+    p.line(100, height - 110, 500, height - 110)
+    p.drawString(120, height - 160, "Article :")
+    p.drawString(120, height - 180, "Quantité :")
+    p.drawString(120, height - 200, "Bénéficiaire :")
+    p.rect(100, height - 380, 150, 70)
+    p.rect(350, height - 380, 150, 70)
+    p.endForm()
+
+
+def render_receipts(queryset, output, progress=None):
+    """
+    Écrit un bon de sortie par mouvement dans output (fichier ou HttpResponse).
+    progress(n) est appelé tous les CHUNK_SIZE bons.
+    """
+    p = canvas.Canvas(output, pagesize=A4)
+    width, height = A4
+    _draw_template(p, height)
+    for index, (pk, date, item_name, quantite, beneficiary) in enumerate(receipt_rows(queryset), 1):
+        p.doForm(TEMPLATE_NAME)
+        p.setFont("Helvetica", 12)
+        p.drawString(140, height - 80, timezone.localtime(date).strftime('%d/%m/%Y %H:%M'))
+        p.drawString(170, height - 100, f"#MOV-{pk}")
+        p.drawString(170, height - 160, item_name)
+        p.drawString(180, height - 180, str(quantite))
+        p.drawString(205, height - 200, beneficiary or "Non spécifié")
+        p.showPage()
+        if progress and index % CHUNK_SIZE == 0:
+            progress(index)
+    p.save()
+
@@ -0,0 +1,103 @@
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from django.db.models import Case, Exists, F, OuterRef, Subquery, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Table, TableStyle
+
+from .models import DEFAULT_VALUATION_METHOD, VALUE_FIELD, Item, PeriodBalance, PeriodClose
+
+
+def month_bounds(year, month):
+    """Retourne l'intervalle [début, fin[ du mois, en heure locale"""
+    start = timezone.make_aware(datetime(year, month, 1))
+    if month == 12:
+        end = timezone.make_aware(datetime(year + 1, 1, 1))
+    else:
+        end = timezone.make_aware(datetime(year, month + 1, 1))
+    return start, end
+
+
+def parse_period(value):
+    """
+    Lit une période 'AAAA-MM'. Retourne (année, mois) ou le mois en cours
+    si la valeur est absente ou invalide.
+    """
+    try:
+        year, month = (int(part) for part in value.split('-'))
+        if 1 <= month <= 12:
+            return year, month
+    except (AttributeError, ValueError):
+        pass
+    today = timezone.localdate()
+    return today.year, today.month
+
+
+def _closed_or_live(closed, balances, field, live, default):
+    # Mois clôturé : solde figé (les mouvements ont pu être archivés), lu par
+    # une sous-requête que seule cette branche évalue ; sinon valeur calculée
+    # sur les mouvements
+    frozen = Coalesce(Subquery(balances.values(field)[:1]), default)
+    return Case(When(closed, then=frozen), default=live, output_field=default.output_field)
+
+
+def monthly_report_rows(queryset, year, month):
+    """
+    Lignes du rapport mensuel (article, entrées, sorties, stock de fin de
+    mois, valeur) obtenues en une seule requête, quel que soit le nombre
+    d'articles. Le stock de fin de mois est lu dans les photos de stock, sa
+    valeur sur le dernier mouvement du mois (coûts d'entrée, pas prix actuel).
+    Pour un mois clôturé, tout est lu dans les soldes figés (PeriodBalance),
+    dans la même requête : la clôture est vérifiée par un EXISTS.
+    """
+    start, end = month_bounds(year, month)
+    period, last_day = start.date(), end.date() - timedelta(days=1)
+    closed = Exists(PeriodClose.objects.filter(period=period))
+    balances = PeriodBalance.objects.filter(item=OuterRef('pk'), period=period)
+    value = 'fifo_value' if DEFAULT_VALUATION_METHOD == 'fifo' else 'closing_value'
+    return list(
+        Item.objects.filter(pk__in=queryset.values('pk'))
+        .with_period_totals(start, end)
+        .with_stock_at(last_day)
+        .with_stock_value(last_day)
+        .order_by('name')
+        .values_list(
+            'name',
+            _closed_or_live(closed, balances, 'in_qty', F('entrees'), Value(0)),
+            _closed_or_live(closed, balances, 'out_qty', F('sorties'), Value(0)),
+            _closed_or_live(closed, balances, 'closing_qty', F('stock_at_date'), Value(0)),
+            _closed_or_live(closed, balances, value, F('stock_value'), Value(Decimal(0), output_field=VALUE_FIELD)),
+        )
+    )
+
+
+def build_monthly_report(queryset, year, month, output):
+    """Écrit le rapport mensuel PDF des articles de queryset dans output"""
+    doc = SimpleDocTemplate(output, pagesize=A4)
+    elements = []
+    styles = getSampleStyleSheet()
+
+    month_name = date(year, month, 1).strftime('%B %Y')
+    elements.append(Paragraph(f"Rapport d'Activité Stock - {month_name}", styles['Title']))
+    elements.append(Paragraph("<br/><br/>", styles['Normal']))
+
+    # Une seule requête groupée pour tous les articles sélectionnés
+    data = [['Article', 'Entrées', 'Sorties', 'Stock Final', 'Valeur (CFA)']]
+    for name, entrees, sorties, quantity, valeur in monthly_report_rows(queryset, year, month):
+        data.append([name, entrees, sorties, quantity, f"{valeur:,.2f}"])
+
+    table = Table(data, colWidths=[150, 70, 70, 80, 100])
+    table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.gray),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.whitesmoke),
+    ]))
+    elements.append(table)
+    doc.build(elements)
@@ -0,0 +1,179 @@
+"""
+Recherche plein texte dans le catalogue (nom, catégorie, statut).
+
+Le moteur est choisi selon la base : index FTS5 sous SQLite, simple filtre
+icontains ailleurs. Un autre moteur peut être branché via le réglage
+STOCKPRO_SEARCH_BACKEND (chemin pointé vers une classe de SearchBackend).
+"""
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+from .models import Category, Item
+
+FTS_TABLE = 'inventory_item_fts'
+
+
+class SearchBackend:
+    """Interface commune des moteurs de recherche du catalogue"""
+
+    def filter(self, queryset, query, field='pk'):
+        """Restreint queryset aux lignes dont `field` désigne un article correspondant"""
+        raise NotImplementedError
+
+    def search(self, query, limit=20):
+        """Identifiants des articles correspondants, du plus pertinent au moins pertinent"""
+        raise NotImplementedError
+
+    def index(self, item_ids):
+        """(Ré)indexe les articles donnés"""
+
+    def index_category(self, category_id):
+        """Réindexe les articles d'une catégorie (après renommage)"""
+
+    def remove(self, item_ids):
+        """Retire des articles de l'index"""
+
+    def rebuild(self):
+        """Reconstruit l'index complet"""
+
+
+class SimpleSearchBackend(SearchBackend):
+    """Filtre icontains sur chaque mot : aucun index à maintenir"""
+
+    def _condition(self, query, prefix=''):
+        condition = Q()
+        for term in query.split():
+            condition &= (
+                Q(**{f'{prefix}name__icontains': term})
+                | Q(**{f'{prefix}category__name__icontains': term})
+                | Q(**{f'{prefix}status__icontains': term})
+            )
+        return condition
+
+    def filter(self, queryset, query, field='pk'):
+        prefix = '' if field == 'pk' else f'{field}__'
+        return queryset.filter(self._condition(query, prefix))
+
+    def search(self, query, limit=20):
+        matches = Item.objects.filter(self._condition(query))
+        # Les noms qui commencent par le premier mot passent en tête
+        first = query.split()[0] if query.split() else ''
+        ranked = sorted(
+            matches.values_list('pk', 'name')[:limit * 5],
+            key=lambda row: (not row[1].lower().startswith(first.lower()), row[1]),
+        )
+        return [pk for pk, _ in ranked[:limit]]
+
+
+class SQLiteFTS5Backend(SearchBackend):
+    """Index FTS5 (table virtuelle inventory_item_fts, rowid = id de l'article)"""
+
+    # Poids bm25 des colonnes : nom, catégorie, statut
+    WEIGHTS = (10.0, 3.0, 1.0)
+
+    @staticmethod
+    def match_expression(query):
+        """Chaque mot devient un préfixe : 'ordi hp' -> "ordi"* "hp"*"""
+        terms = re.findall(r'\w+', query)
+        return ' '.join(f'"{term}"*' for term in terms)
+
+    def filter(self, queryset, query, field='pk'):
+        match = self.match_expression(query)
+        if not match:
+            return queryset.none()
+        subquery = RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [match])
+        return queryset.filter(**{f'{field}__in': subquery})
+
+    def search(self, query, limit=20):
+        match = self.match_expression(query)
+        if not match:
+            return []
+        weights = ', '.join(str(weight) for weight in self.WEIGHTS)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s '
+                f'ORDER BY bm25({FTS_TABLE}, {weights}) LIMIT %s',
+                [match, limit],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    def _insert_select(self, cursor, where, params):
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, name, category, status) '
+            f'SELECT i.id, i.name, c.name, i.status FROM {Item._meta.db_table} i '
+            f'JOIN {Category._meta.db_table} c ON c.id = i.category_id WHERE {where}',
+            params,
+        )
+
+    def index(self, item_ids):
+        item_ids = list(item_ids)
+        if not item_ids:
+            return
+        placeholders = ', '.join(['%s'] * len(item_ids))
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})', item_ids)
+            self._insert_select(cursor, f'i.id IN ({placeholders})', item_ids)
+
+    def index_category(self, category_id):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid IN '
+                f'(SELECT id FROM {Item._meta.db_table} WHERE category_id = %s)',
+                [category_id],
+            )
+            self._insert_select(cursor, 'i.category_id = %s', [category_id])
+
+    def remove(self, item_ids):
+        item_ids = list(item_ids)
+        if not item_ids:
+            return
+        placeholders = ', '.join(['%s'] * len(item_ids))
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})', item_ids)
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+            self._insert_select(cursor, '1 = 1', [])
+
+
+def get_backend():
+    path = getattr(settings, 'STOCKPRO_SEARCH_BACKEND', None)
+    if path:
+        return import_string(path)()
+    if connection.vendor == 'sqlite':
+        return SQLiteFTS5Backend()
+    return SimpleSearchBackend()
+
+
+def search_items(query, limit=20):
+    """Articles correspondant à la recherche, classés par pertinence"""
+    ids = get_backend().search(query, limit)
+    items = Item.objects.select_related('category').in_bulk(ids)
+    return [items[pk] for pk in ids if pk in items]
+
+
+# --- SYNCHRONISATION DE L'INDEX ---
+
+@receiver(post_save, sender=Item)
+def index_item(sender, instance, raw=False, **kwargs):
+    if not raw:
+        get_backend().index([instance.pk])
+
+
+@receiver(post_delete, sender=Item)
+def unindex_item(sender, instance, **kwargs):
+    get_backend().remove([instance.pk])
+
+
+@receiver(post_save, sender=Category)
+def reindex_category(sender, instance, created, raw=False, **kwargs):
+    if not created and not raw:
+        get_backend().index_category(instance.pk)
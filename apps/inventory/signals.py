@@ -0,0 +1,15 @@
+from django.dispatch import Signal
+
+# Émis dans la transaction de postage, après écriture du stock et des mouvements
+# (Movement.save et Movement.objects.post_batch).
+#   movements : liste des mouvements écrits
+#   created   : False lors de la modification d'un mouvement existant
+#   stock     : {item_id: (quantité_avant, quantité_après)} pour chaque article touché
+#   prices    : {item_id: prix unitaire} des articles touchés, lu avec leur stock
+#               (facultatif : un récepteur le relit s'il est absent)
+movements_posted = Signal()
+
+# Émis après une écriture en masse sur les lignes d'un inventaire (comptages),
+# qui ne passe pas par InventoryItem.save.
+#   inventory : l'inventaire concerné
+inventory_updated = Signal()
@@ -0,0 +1,151 @@
+"""
+Tenue des photos de stock journalières (StockSnapshot).
+
+Les photos sont mises à jour à chaque mouvement posté, dans la transaction
+de postage ; la commande build_stock_snapshots reconstruit l'historique à
+partir des mouvements.
+"""
+from datetime import datetime, time
+
+from django.db.models import Q, Sum
+from django.db.models.functions import Coalesce, TruncDate
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import Item, Movement, StockSnapshot
+from .signals import movements_posted
+
+BATCH_SIZE = 500
+UPDATE_FIELDS = ['closing_qty', 'in_qty', 'out_qty', 'value']
+
+
+def _write(snapshots):
+    StockSnapshot.objects.bulk_create(
+        snapshots,
+        batch_size=BATCH_SIZE,
+        update_conflicts=True,
+        unique_fields=['item', 'day'],
+        update_fields=UPDATE_FIELDS,
+    )
+
+
+def record_daily_totals(totals, closing, prices=None):
+    """
+    Ajoute des entrées/sorties aux photos du jour et fixe leur stock de clôture.
+      totals  : {(item_id, jour): (entrées, sorties)}
+      closing : {item_id: stock après postage}
+      prices  : {item_id: prix unitaire}, relu en base s'il n'est pas fourni
+    """
+    item_ids = {item_id for item_id, _ in totals}
+    days = {day for _, day in totals}
+    existing = {
+        (item_id, day): (in_qty, out_qty)
+        for item_id, day, in_qty, out_qty in StockSnapshot.objects.filter(
+            item_id__in=item_ids, day__in=days
+        ).values_list('item_id', 'day', 'in_qty', 'out_qty')
+    }
+    if prices is None:
+        prices = dict(Item.objects.filter(pk__in=item_ids).values_list('pk', 'unit_price'))
+
+    snapshots = []
+    for (item_id, day), (in_qty, out_qty) in totals.items():
+        previous_in, previous_out = existing.get((item_id, day), (0, 0))
+        snapshots.append(StockSnapshot(
+            item_id=item_id,
+            day=day,
+            closing_qty=closing[item_id],
+            in_qty=previous_in + in_qty,
+            out_qty=previous_out + out_qty,
+            value=closing[item_id] * prices[item_id],
+        ))
+    _write(snapshots)
+
+
+def rebuild_snapshots(item_ids=None, since=None):
+    """
+    Reconstruit les photos à partir des mouvements, en remontant le temps
+    depuis le stock actuel de chaque article. Retourne le nombre de photos écrites.
+    """
+    items = Item.objects.all() if item_ids is None else Item.objects.filter(pk__in=item_ids)
+    current = dict(items.values_list('pk', 'quantity'))
+    prices = dict(items.values_list('pk', 'unit_price'))
+
+    movements = Movement.objects.filter(item_id__in=current)
+    snapshots = StockSnapshot.objects.filter(item_id__in=current)
+    if since is not None:
+        movements = movements.filter(date__gte=timezone.make_aware(datetime.combine(since, time.min)))
+        snapshots = snapshots.filter(day__gte=since)
+    daily = (
+        movements.annotate(day=TruncDate('date'))
+        .values('item_id', 'day')
+        .annotate(
+            in_qty=Coalesce(Sum('quantite', filter=Q(type_mouvement='ENTREE')), 0),
+            out_qty=Coalesce(Sum('quantite', filter=Q(type_mouvement='SORTIE')), 0),
+        )
+        .order_by('item_id', '-day')
+    )
+
+    today = timezone.localdate()
+    rows = []
+    running = dict(current)
+    first_day = {}
+    for row in daily:
+        item_id = row['item_id']
+        closing = running[item_id]
+        rows.append(StockSnapshot(
+            item_id=item_id, day=row['day'], closing_qty=closing,
+            in_qty=row['in_qty'], out_qty=row['out_qty'], value=closing * prices[item_id],
+        ))
+        running[item_id] = closing - row['in_qty'] + row['out_qty']
+        first_day[item_id] = row['day']
+
+    for item_id, quantity in current.items():
+        if since is None and (item_id not in first_day or running[item_id]):
+            # Stock d'ouverture (aucun mouvement, ou stock antérieur au premier
+            # mouvement enregistré) : sans date, il vaut avant toute date
+            opening = running[item_id]
+            rows.append(StockSnapshot(
+                item_id=item_id, day=None, closing_qty=opening, value=opening * prices[item_id],
+            ))
+        elif item_id not in first_day:
+            # Aucun mouvement depuis since : le stock actuel vaut aujourd'hui
+            rows.append(StockSnapshot(
+                item_id=item_id, day=today, closing_qty=quantity, value=quantity * prices[item_id],
+            ))
+
+    snapshots.delete()
+    _write(rows)
+    return len(rows)
+
+
+# --- MISE À JOUR INCRÉMENTALE ---
+
+@receiver(movements_posted)
+def update_snapshots_on_movements(sender, movements, created, stock, prices=None, **kwargs):
+    if not created:
+        # Modification d'un mouvement passé : l'historique des articles touchés est rejoué
+        since = min(timezone.localdate(movement.date) for movement in movements)
+        rebuild_snapshots(item_ids=list(stock), since=since)
+        return
+
+    totals = {}
+    for movement in movements:
+        key = (movement.item_id, timezone.localdate(movement.date))
+        in_qty, out_qty = totals.get(key, (0, 0))
+        if movement.type_mouvement == 'ENTREE':
+            in_qty += movement.quantite
+        else:
+            out_qty += movement.quantite
+        totals[key] = (in_qty, out_qty)
+    record_daily_totals(totals, {item_id: after for item_id, (before, after) in stock.items()}, prices)
+
+
+@receiver(post_save, sender=Item)
+def update_snapshot_on_item_save(sender, instance, raw=False, **kwargs):
+    # Création ou correction manuelle du stock : la photo du jour suit l'article
+    if raw:
+        return
+    record_daily_totals(
+        {(instance.pk, timezone.localdate()): (0, 0)}, {instance.pk: instance.quantity}, {instance.pk: instance.unit_price}
+    )
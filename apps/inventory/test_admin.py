@@ -0,0 +1,76 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from .admin import MovementInline
+from .models import Category, Item, Movement
+
+
+class AdminChangelistTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_superuser('admin', 'admin@test.com', 'pass')
+        self.client.force_login(self.user)
+        self.categories = [Category.objects.create(name=f'Catégorie {i}') for i in range(5)]
+
+    def _add_items(self, count):
+        items = Item.objects.bulk_create([
+            Item(name=f'Article {Item.objects.count() + i:03d}', category=self.categories[i % 5],
+                 quantity=0, unit_price=100)
+            for i in range(count)
+        ])
+        Movement.objects.post_batch([{'item': item, 'type_mouvement': 'ENTREE', 'quantite': 5} for item in items])
+
+    def _queries(self, path):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_liste_des_articles_en_nombre_constant_de_requetes(self):
+        self._add_items(10)
+        small = self._queries('/admin/inventory/item/')
+        self._add_items(90)
+        self.assertEqual(self._queries('/admin/inventory/item/'), small)
+
+    def test_liste_des_mouvements_en_nombre_constant_de_requetes(self):
+        self._add_items(10)
+        small = self._queries('/admin/inventory/movement/')
+        self._add_items(90)
+        self.assertEqual(self._queries('/admin/inventory/movement/'), small)
+
+    def test_choix_des_categories_lus_une_fois(self):
+        self._add_items(30)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/admin/inventory/item/')
+        choices = [query for query in queries if query['sql'].startswith('SELECT "inventory_category"')]
+        # Liste déroulante des lignes éditables + filtre latéral
+        self.assertLessEqual(len(choices), 2)
+        self.assertContains(response, '<option value="%d" selected>' % self.categories[0].pk)
+
+    def test_mouvements_recents_et_lien_vers_l_historique(self):
+        item = Item.objects.create(name='Ramette', category=self.categories[0], quantity=0, unit_price=100)
+        Movement.objects.post_batch(
+            [{'item': item, 'type_mouvement': 'ENTREE', 'quantite': 1}] * (MovementInline.recent + 10)
+        )
+        response = self.client.get(f'/admin/inventory/item/{item.pk}/change/')
+        formset = next(
+            inline.formset for inline in response.context['inline_admin_formsets']
+            if inline.formset.model is Movement
+        )
+        self.assertEqual(formset.initial_form_count(), MovementInline.recent)
+        latest = Movement.objects.filter(item=item).order_by('-date', '-pk').first()
+        self.assertEqual(formset.forms[0].instance, latest)
+        self.assertContains(response, f'/admin/inventory/movement/?item__id__exact={item.pk}')
+        self.assertEqual(self.client.get(f'/admin/inventory/movement/?item__id__exact={item.pk}').status_code, 200)
+
+    def test_modification_en_liste_avec_choix_en_cache(self):
+        item = Item.objects.create(name='Ramette', category=self.categories[0], quantity=0, unit_price=100)
+        response = self.client.post('/admin/inventory/item/', {
+            'form-TOTAL_FORMS': 1, 'form-INITIAL_FORMS': 1,
+            'form-0-id': item.pk, 'form-0-category': self.categories[3].pk, 'form-0-status': 'En panne',
+            '_save': 'Enregistrer',
+        })
+        self.assertEqual(response.status_code, 302)
+        item.refresh_from_db()
+        self.assertEqual((item.category, item.status), (self.categories[3], 'En panne'))
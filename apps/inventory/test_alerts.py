@@ -0,0 +1,77 @@
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+
+from .alerts import breaching_items, evaluate_alerts
+from .dashboard import get_metrics
+from .models import Category, Item, Movement, StockAlert
+
+
+class StockAlertTest(TestCase):
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        self.cat = Category.objects.create(name='Papeterie')
+        self.ramette = Item.objects.create(
+            name='Ramette', category=self.cat, quantity=50, unit_price=3500,
+            min_level=5, reorder_level=20, max_level=100,
+        )
+        self.stylo = Item.objects.create(name='Stylo', category=self.cat, quantity=30, unit_price=200)
+
+    def _kind(self, item):
+        return StockAlert.objects.filter(item=item).values_list('kind', flat=True).first()
+
+    def test_seuils_de_l_article(self):
+        self.assertIsNone(self._kind(self.ramette))
+        Movement.objects.create(item=self.ramette, type_mouvement='SORTIE', quantite=30)
+        self.assertEqual(self._kind(self.ramette), StockAlert.REORDER)
+        Movement.objects.create(item=self.ramette, type_mouvement='SORTIE', quantite=16)
+        self.assertEqual(self._kind(self.ramette), StockAlert.BELOW_MIN)
+        Movement.objects.create(item=self.ramette, type_mouvement='SORTIE', quantite=4)
+        self.assertEqual(self._kind(self.ramette), StockAlert.OUT)
+        Movement.objects.post_batch([{'item': self.ramette, 'type_mouvement': 'ENTREE', 'quantite': 120}])
+        self.assertEqual(self._kind(self.ramette), StockAlert.OVERSTOCK)
+        self.ramette.refresh_from_db()
+        Movement.objects.create(item=self.ramette, type_mouvement='SORTIE', quantite=70)
+        self.assertIsNone(self._kind(self.ramette))
+
+    def test_seuil_par_defaut_sans_niveau_saisi(self):
+        Movement.objects.create(item=self.stylo, type_mouvement='SORTIE', quantite=21)
+        self.assertEqual(self._kind(self.stylo), StockAlert.REORDER)
+        self.assertEqual(list(Item.objects.critical()), [self.stylo])
+
+    def test_aucune_ecriture_sans_franchissement(self):
+        Movement.objects.create(item=self.ramette, type_mouvement='SORTIE', quantite=35)
+        alert = StockAlert.objects.get(item=self.ramette)
+        # Lecture des seuils seulement : ni INSERT ni DELETE sur les alertes
+        with self.assertNumQueries(1):
+            self.assertEqual(evaluate_alerts([self.ramette.pk, self.stylo.pk]), 0)
+        Movement.objects.create(item=self.ramette, type_mouvement='SORTIE', quantite=2)
+        self.assertEqual(StockAlert.objects.get(item=self.ramette).raised_at, alert.raised_at)
+
+    def test_evaluation_ensembliste_et_resynchronisation(self):
+        Item.objects.filter(pk=self.stylo.pk).update(quantity=0)
+        Item.objects.filter(pk=self.ramette.pk).update(quantity=500)
+        with self.assertNumQueries(1):
+            kinds = dict(breaching_items().values_list('name', 'alert_kind'))
+        self.assertEqual(kinds, {'Stylo': StockAlert.OUT, 'Ramette': StockAlert.OVERSTOCK})
+        out = StringIO()
+        call_command('evaluate_stock_alerts', stdout=out)
+        self.assertIn('2 alertes modifiées', out.getvalue())
+        self.assertEqual(self._kind(self.stylo), StockAlert.OUT)
+
+    def test_tableau_de_bord_et_admin_lisent_la_table(self):
+        self.assertEqual(get_metrics()['critical_stock'], 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            Movement.objects.create(item=self.ramette, type_mouvement='SORTIE', quantite=48)
+        self.assertEqual(get_metrics()['critical_stock'], 1)
+
+        user = User.objects.create_superuser('admin', 'admin@test.com', 'pass')
+        self.client.force_login(user)
+        response = self.client.get('/admin/inventory/item/', {'stock': 'critical'})
+        self.assertContains(response, 'Sous le stock minimum')
+        self.assertNotContains(response, 'Stylo')
+        response = self.client.get('/items/')
+        self.assertContains(response, '2 (ALERTE)')
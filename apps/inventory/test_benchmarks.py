@@ -0,0 +1,58 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db.models import Q, Sum
+from django.test import TestCase
+
+from .benchmarks import BENCHMARKS, compare, run_benchmarks
+from .models import Item, Movement, StockAlert
+
+
+class SeedWarehouseTest(TestCase):
+    def test_jeu_genere_coherent(self):
+        out = StringIO()
+        call_command('seed_warehouse', items=40, movements=600, employees=5, days=30, seed=1, stdout=out)
+        self.assertIn('40 articles et 640 mouvements', out.getvalue())
+        self.assertEqual(Movement.objects.count(), 640)
+        # Le stock de chaque article est la somme de ses mouvements
+        totals = Item.objects.annotate(
+            net=Sum('movements__quantite', filter=Q(movements__type_mouvement='ENTREE'))
+            - Sum('movements__quantite', filter=Q(movements__type_mouvement='SORTIE'), default=0)
+        )
+        self.assertFalse([item for item in totals if item.net != item.quantity])
+        self.assertTrue(Movement.objects.filter(beneficiary__isnull=False).exists())
+        self.assertEqual(
+            StockAlert.objects.count(),
+            sum(1 for item in Item.objects.all() if item.quantity < 10 or (item.min_level and item.quantity < item.min_level)),
+        )
+
+
+class BenchmarkTest(TestCase):
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        call_command('seed_warehouse', items=20, movements=200, employees=3, days=30, seed=2, stdout=StringIO())
+
+    def test_rapport_sans_modifier_la_base(self):
+        movements = Movement.objects.count()
+        report = run_benchmarks(repeat=1)
+        self.assertEqual(set(report['benchmarks']), set(BENCHMARKS))
+        self.assertEqual(report['dataset'], {'items': 20, 'movements': movements})
+        self.assertEqual(report['benchmarks']['csv_export_items']['queries'], 1)
+        self.assertEqual(Movement.objects.count(), movements)
+
+    def test_regressions_detectees(self):
+        baseline = {'dataset': {'items': 20}, 'benchmarks': {
+            'item_list': {'median_ms': 10.0, 'queries': 5},
+            'monthly_report': {'median_ms': 100.0, 'queries': 1},
+        }}
+        report = {'dataset': {'items': 20}, 'benchmarks': {
+            'item_list': {'median_ms': 13.0, 'queries': 6},
+            'monthly_report': {'median_ms': 200.0, 'queries': 1},
+        }}
+        regressions, warnings = compare(report, baseline, time_tolerance=0.5)
+        # item_list : une requête de plus ; +3 ms reste sous le seuil de bruit
+        self.assertEqual(len(regressions), 2)
+        self.assertIn('item_list : 6 requêtes SQL', regressions[0])
+        self.assertIn('monthly_report : 200.0 ms', regressions[1])
+        self.assertEqual(warnings, [])
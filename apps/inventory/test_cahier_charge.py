@@ -1,14 +1,16 @@
 from django.test import TestCase
 from django.contrib.auth.models import User
-from .models import Item, Category, Movement
-from personnel.models import Personnel  # Adaptez selon votre structure
+from .models import AcquisitionMode, Item, Category, Movement
+from personnel.models import Department, Employee
 
 class StockProComplianceTest(TestCase):
     def setUp(self):
         # Initialisation des données de base
         self.user = User.objects.create_superuser('admin', 'admin@test.com', 'pass')
         self.cat = Category.objects.create(name="Informatique")
-        self.perso = Personnel.objects.create(nom="Jean Dupont", matricule="JD001")
+        self.perso = Employee.objects.create(
+            name="Jean Dupont", department=Department.objects.create(name="Comptabilité")
+        )
 
     def test_respect_cahier_des_charges(self):
         print("\n--- DEBUT DES TESTS CAHIER DES CHARGES ---")
@@ -20,7 +22,7 @@ class StockProComplianceTest(TestCase):
             category=self.cat,
             quantity=10,
             unit_price=500000,
-            description="Acquisition par Achat - Processeur i7, 16GB RAM",
+            acquisition_mode=AcquisitionMode.objects.create(name="Achat"),
             status="Disponible"
         )
         self.assertEqual(item.quantity, 10)
@@ -28,20 +30,16 @@ class StockProComplianceTest(TestCase):
 
         # 2. TEST MOUVEMENT / AFFECTATION AU PERSONNEL
         # Sortie de 2 ordinateurs pour Jean Dupont
-        mouvement = Movement.objects.create(
+        # (le stock est mis à jour par le postage du mouvement)
+        Movement.objects.create(
             item=item,
-            quantity=2,
-            type='SORTIE',
-            personnel=self.perso,
-            reason="Affectation personnel"
+            quantite=2,
+            type_mouvement='SORTIE',
+            beneficiary=self.perso,
         )
-        
-        # Simulation de la mise à jour du stock (Logique métier)
-        item.quantity -= mouvement.quantity
-        item.save()
-        
+
         self.assertEqual(item.quantity, 8)
-        print(f"✅ Sortie/Affectation réussie : 2 unités affectées à {self.perso.nom}")
+        print(f"✅ Sortie/Affectation réussie : 2 unités affectées à {self.perso.name}")
 
         # 3. TEST INVENTAIRE / SITUATION DE STOCK
         # Vérification du "Stock Final" après mouvements
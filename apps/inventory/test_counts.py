@@ -0,0 +1,140 @@
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.test import TestCase
+
+from .counts import close_session, open_session, record_counts, variance_by_category, variance_summary
+from .models import Category, Inventory, Item, Movement
+
+
+class InventorySessionTest(TestCase):
+    def setUp(self):
+        self.info = Category.objects.create(name='Informatique')
+        self.furniture = Category.objects.create(name='Mobilier')
+        self.items = Item.objects.bulk_create(
+            [Item(name=f'Écran {i}', category=self.info, quantity=10, unit_price=1000) for i in range(40)]
+            + [Item(name=f'Chaise {i}', category=self.furniture, quantity=5, unit_price=200) for i in range(10)]
+        )
+
+    def test_ouverture_en_une_requete_insert_select(self):
+        with self.assertNumQueries(4):  # savepoint, inventaire, INSERT ... SELECT, release
+            inventory = open_session('Annuel')
+        self.assertEqual(inventory.items.count(), 50)
+        self.assertEqual(inventory.items.filter(expected_quantity=10).count(), 40)
+        self.assertFalse(inventory.items.filter(actual_quantity__isnull=False).exists())
+
+    def test_ouverture_par_categorie(self):
+        inventory = open_session(category=self.furniture)
+        self.assertEqual(inventory.items.count(), 10)
+
+    def test_comptages_par_lot(self):
+        inventory = open_session()
+        counts = {item.pk: 10 for item in self.items[:40]}
+        counts[self.items[0].pk] = 7
+        with self.assertNumQueries(4):  # savepoint, lignes connues, UPDATE, release
+            updated, errors = record_counts(inventory, counts)
+        self.assertEqual((updated, errors), (40, {}))
+        self.assertEqual(inventory.items.get(item=self.items[0]).actual_quantity, 7)
+
+    def test_comptages_cumules_et_erreurs(self):
+        inventory = open_session(category=self.info)
+        chair = self.items[45]
+        scans = [(self.items[0].pk, 3), (self.items[0].pk, 2), (chair.pk, 1), (self.items[1].pk, -1)]
+        updated, errors = record_counts(inventory, scans, add=True)
+        self.assertEqual(updated, 1)
+        self.assertEqual(set(errors), {chair.pk, self.items[1].pk})
+        record_counts(inventory, [(self.items[0].pk, 1)], add=True)
+        self.assertEqual(inventory.items.get(item=self.items[0]).actual_quantity, 6)
+
+    def test_rapport_d_ecarts(self):
+        inventory = open_session()
+        record_counts(inventory, {self.items[0].pk: 12, self.items[1].pk: 7, self.items[45].pk: 5})
+        with self.assertNumQueries(2):
+            summary = variance_summary(inventory)
+        self.assertEqual(summary['counted'], 3)
+        self.assertEqual(summary['uncounted'], 47)
+        self.assertEqual(summary['with_variance'], 2)
+        self.assertEqual((summary['surplus_qty'], summary['shortage_qty']), (2, 3))
+        self.assertEqual(summary['net_value'], -1000)
+        self.assertEqual(summary['absolute_value'], 5000)
+        rows = {row['item__category__name']: row for row in variance_by_category(inventory)}
+        self.assertEqual(rows['Mobilier']['with_variance'], 0)
+
+    def test_cloture_poste_les_ajustements(self):
+        inventory = open_session()
+        record_counts(inventory, {self.items[0].pk: 12, self.items[1].pk: 7, self.items[2].pk: 10})
+        movements = close_session(inventory)
+        self.assertEqual(
+            sorted((m.item_id, m.type_mouvement, m.quantite) for m in movements),
+            [(self.items[0].pk, 'ENTREE', 2), (self.items[1].pk, 'SORTIE', 3)],
+        )
+        self.assertEqual(Item.objects.get(pk=self.items[1].pk).quantity, 7)
+        inventory.refresh_from_db()
+        self.assertEqual(inventory.status, Inventory.CLOSED)
+        with self.assertRaises(ValidationError):
+            record_counts(inventory, {self.items[0].pk: 1})
+        with self.assertRaises(ValidationError):
+            close_session(inventory)
+
+    def test_mouvements_de_la_session_conserves(self):
+        inventory = open_session(category=self.furniture)
+        chair, desk_chair, stool = self.items[40:43]
+        record_counts(inventory, {chair.pk: 4, desk_chair.pk: 6, stool.pk: 5})
+        # Mouvements postés entre le comptage et la clôture : l'écart compté s'y ajoute
+        Movement.objects.create(item=chair, type_mouvement='SORTIE', quantite=3)
+        Movement.objects.create(item=stool, type_mouvement='ENTREE', quantite=2)
+        movements = close_session(inventory)
+        self.assertEqual(
+            sorted((m.item_id, m.type_mouvement, m.quantite) for m in movements),
+            [(chair.pk, 'SORTIE', 1), (desk_chair.pk, 'ENTREE', 1)],
+        )
+        self.assertEqual(
+            list(Item.objects.filter(pk__in=[chair.pk, desk_chair.pk, stool.pk]).order_by('pk')
+                 .values_list('quantity', flat=True)),
+            [1, 6, 7],
+        )
+        # Quantités figées à l'ouverture inchangées : le rapport montre l'attendu au comptage
+        self.assertEqual(inventory.items.get(item=stool).expected_quantity, 5)
+        self.assertEqual(variance_summary(inventory)['shortage_qty'], 1)
+
+    def test_cloture_annulee_si_ajustement_impossible(self):
+        inventory = open_session(category=self.furniture)
+        chair = self.items[40]
+        record_counts(inventory, {chair.pk: 0, self.items[41].pk: 6})
+        # La chaise sort entre l'ouverture et la clôture : il n'en reste plus assez
+        Movement.objects.create(item=chair, type_mouvement='SORTIE', quantite=3)
+        with self.assertRaises(ValidationError):
+            close_session(inventory)
+        inventory.refresh_from_db()
+        self.assertTrue(inventory.is_open)
+        self.assertEqual(Item.objects.get(pk=self.items[41].pk).quantity, 5)
+
+
+class InventorySessionViewsTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_superuser('admin', 'admin@test.com', 'pass')
+        self.client.force_login(self.user)
+        cat = Category.objects.create(name='Informatique')
+        self.items = Item.objects.bulk_create([
+            Item(name=f'Clavier {i}', category=cat, quantity=4, unit_price=3000) for i in range(5)
+        ])
+
+    def test_parcours_complet(self):
+        response = self.client.post('/inventories/open/', {'description': 'Trimestriel', 'category': ''})
+        inventory = Inventory.objects.get()
+        self.assertRedirects(response, f'/inventories/{inventory.pk}/')
+
+        scan = self.client.post(
+            f'/api/v1/inventories/{inventory.pk}/counts/',
+            {'counts': [{'item': self.items[0].pk, 'quantity': 1}, {'item': self.items[0].pk, 'quantity': 1}],
+             'mode': 'add'},
+            content_type='application/json',
+        )
+        self.assertEqual(scan.json(), {'updated': 1, 'errors': {}})
+
+        page = self.client.get(f'/inventories/{inventory.pk}/')
+        self.assertContains(page, 'Clavier 0')
+        self.assertEqual(page.context['summary']['shortage_qty'], 2)
+
+        self.client.post(f'/inventories/{inventory.pk}/close/')
+        self.assertEqual(Item.objects.get(pk=self.items[0].pk).quantity, 2)
+        self.assertContains(self.client.get('/inventories/'), 'Clôturé')
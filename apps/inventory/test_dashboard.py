@@ -0,0 +1,61 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from .dashboard import get_metrics
+from .models import Category, Item, Movement
+
+
+class DashboardMetricsTest(TestCase):
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        self.cat = Category.objects.create(name='Entretien')
+        self.item = Item.objects.create(name='Savon', category=self.cat, quantity=12, unit_price=300)
+        Item.objects.create(name='Balai', category=self.cat, quantity=3, unit_price=1500)
+
+    def test_calcul_initial(self):
+        metrics = get_metrics()
+        self.assertEqual(metrics['total_items'], 2)
+        self.assertEqual(metrics['critical_stock'], 1)
+        self.assertEqual(metrics['total_mouvements'], 0)
+        self.assertEqual(len(metrics['chart_data']), 7)
+
+    def test_postage_invalide_puis_recalcule(self):
+        get_metrics()
+        with self.captureOnCommitCallbacks(execute=True):
+            Movement.objects.create(item=self.item, type_mouvement='SORTIE', quantite=5)
+        with self.captureOnCommitCallbacks(execute=True):
+            Movement.objects.post_batch([{'item': self.item, 'type_mouvement': 'ENTREE', 'quantite': 1}] * 3)
+        metrics = get_metrics()
+        # 12 -> 7 (passe sous le seuil) -> 10 (repasse au-dessus)
+        self.assertEqual(metrics['critical_stock'], 1)
+        self.assertEqual(metrics['total_mouvements'], 4)
+        self.assertEqual(metrics['chart_data'][-1], 4)
+        # Sans écriture entre deux affichages : servi depuis le cache
+        with self.assertNumQueries(0):
+            self.assertEqual(get_metrics(), metrics)
+
+    def test_creation_article_invalide_les_compteurs(self):
+        get_metrics()
+        with self.captureOnCommitCallbacks(execute=True):
+            Item.objects.create(name='Seau', category=self.cat, quantity=0, unit_price=2000)
+        metrics = get_metrics()
+        self.assertEqual((metrics['total_items'], metrics['critical_stock']), (3, 2))
+
+    def test_transaction_annulee_sans_effet(self):
+        metrics = get_metrics()
+        with self.captureOnCommitCallbacks(execute=False):
+            Movement.objects.create(item=self.item, type_mouvement='SORTIE', quantite=10)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_metrics(), metrics)
+
+    def test_index_admin_sans_requete_d_agregat(self):
+        user = User.objects.create_superuser('admin', 'admin@test.com', 'pass')
+        self.client.force_login(user)
+        self.client.get('/admin/')
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/admin/')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse([q for q in ctx.captured_queries if 'inventory_' in q['sql']])
@@ -0,0 +1,62 @@
+import shutil
+import tempfile
+from datetime import datetime
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+
+from reports.jobs import claim_next, run_job
+from reports.models import Job
+
+from .exports import item_rows
+from .models import Category, Item, Movement
+
+
+class CsvExportTest(TestCase):
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        self.user = User.objects.create_superuser('admin', 'admin@test.com', 'pass')
+        self.client.force_login(self.user)
+        self.cat = Category.objects.create(name='Consommables')
+        self.items = Item.objects.bulk_create([
+            Item(name=f'Toner {i}', category=self.cat, quantity=i, unit_price=45000) for i in range(30)
+        ])
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+
+    def _content(self, response):
+        return b''.join(response.streaming_content).decode('utf-8-sig')
+
+    def test_export_articles_par_le_worker(self):
+        response = self.client.post('/admin/inventory/item/', {
+            'action': 'export_as_csv',
+            '_selected_action': [item.pk for item in self.items],
+        })
+        # L'action met la tâche en file et rend la main aussitôt
+        job = Job.objects.get()
+        self.assertRedirects(response, f'/reports/jobs/{job.pk}/')
+        with self.settings(MEDIA_ROOT=self.media_root):
+            run_job(claim_next())
+            job.refresh_from_db()
+            self.assertEqual(job.status, Job.DONE)
+            with job.result.open('rb') as result:
+                lines = result.read().decode('utf-8-sig').strip().splitlines()
+        self.assertEqual(len(lines), 31)
+        self.assertIn('Toner 3,Consommables,3,45000.00,Disponible', lines)
+
+    def test_lignes_articles_sans_requete_par_ligne(self):
+        with self.assertNumQueries(1):
+            rows = list(item_rows(Item.objects.all()))
+        self.assertEqual(len(rows), 30)
+
+    def test_export_mouvements_par_periode(self):
+        dates = [datetime(2025, 1, 10), datetime(2025, 1, 31, 23, 30), datetime(2025, 2, 1, 8)]
+        for when in dates:
+            movement = Movement.objects.create(item=self.items[0], type_mouvement='ENTREE', quantite=2)
+            Movement.objects.filter(pk=movement.pk).update(date=timezone.make_aware(when))
+        response = self.client.get('/movements/export/', {'start': '2025-01-01', 'end': '2025-01-31'})
+        lines = self._content(response).strip().splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertTrue(lines[2].startswith(f'MOV-{movement.pk - 1},31/01/2025 23:30,Toner 0,ENTREE,2'))
@@ -0,0 +1,80 @@
+from datetime import date, datetime, timedelta
+from io import StringIO
+
+import numpy as np
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from .dashboard import get_metrics
+from .forecasting import compute_forecasts, refresh_forecasts
+from .models import Category, Item, ItemForecast, Movement
+
+TODAY = date(2025, 3, 3)  # Un lundi
+
+
+class ComputeForecastsTest(TestCase):
+    def test_taux_saisonnalite_et_point_de_commande(self):
+        # 8 semaines : 10 sorties par jour ouvré, rien le week-end
+        start = TODAY - timedelta(days=56)
+        weekdays = (start.weekday() + np.arange(56)) % 7
+        demand = np.where(weekdays < 5, 10.0, 0.0)[None, :]
+        results, eligible = compute_forecasts(demand, np.array([0]), start, TODAY, lead_time=7, service_level=0.95)
+        self.assertTrue(eligible[0])
+        factors = results['weekday_factors'][0]
+        self.assertGreater(factors[0], 1)
+        self.assertLess(factors[6], factors[0] / 2)
+        # Une semaine de délai = environ 50 sorties
+        self.assertAlmostEqual(results['lead_time_demand'][0], 50, delta=5)
+        self.assertGreaterEqual(results['reorder_point'][0], results['lead_time_demand'][0])
+
+    def test_historique_trop_court_exclu(self):
+        start = TODAY - timedelta(days=30)
+        demand = np.ones((1, 30))
+        _, eligible = compute_forecasts(demand, np.array([25]), start, TODAY)
+        self.assertFalse(eligible[0])
+
+
+class RefreshForecastsTest(TestCase):
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        self.cat = Category.objects.create(name='Papeterie')
+        self.ramette = Item.objects.create(name='Ramette', category=self.cat, quantity=500, unit_price=3500)
+        self.stylo = Item.objects.create(name='Stylo', category=self.cat, quantity=5, unit_price=200)
+        self._movement(self.ramette, 'ENTREE', 2000, TODAY - timedelta(days=60))
+        for offset in range(1, 60):
+            self._movement(self.ramette, 'SORTIE', 20, TODAY - timedelta(days=offset))
+        # Article récent : pas assez d'historique
+        self._movement(self.stylo, 'ENTREE', 5, TODAY - timedelta(days=3))
+        Item.objects.filter(pk=self.ramette.pk).update(quantity=500)
+        Item.objects.filter(pk=self.stylo.pk).update(quantity=5)
+
+    def _movement(self, item, kind, quantity, day):
+        movement = Movement.objects.create(item=item, type_mouvement=kind, quantite=quantity)
+        when = timezone.make_aware(datetime.combine(day, datetime.min.time()).replace(hour=10))
+        Movement.objects.filter(pk=movement.pk).update(date=when)
+
+    def test_point_de_commande_remplace_le_seuil_fixe(self):
+        self.assertEqual(refresh_forecasts(today=TODAY, lead_time=30), 1)
+        forecast = ItemForecast.objects.get()
+        self.assertEqual(forecast.item, self.ramette)
+        self.assertAlmostEqual(forecast.daily_rate, 20, delta=0.5)
+        self.assertGreaterEqual(forecast.reorder_point, 600)
+        # Ramette : 500 en stock sous son point de commande ; Stylo : seuil par défaut
+        self.assertEqual(set(Item.objects.critical()), {self.ramette, self.stylo})
+        self.assertTrue(Item.objects.select_related('alert').get(pk=self.ramette.pk).is_critical)
+        self.assertEqual(get_metrics()['critical_stock'], 2)
+
+    def test_recalcul_idempotent_et_purge(self):
+        refresh_forecasts(today=TODAY)
+        refresh_forecasts(today=TODAY)
+        self.assertEqual(ItemForecast.objects.count(), 1)
+        # Historique sorti de la fenêtre : la prévision est supprimée
+        refresh_forecasts(today=TODAY, history_days=2)
+        self.assertFalse(ItemForecast.objects.exists())
+
+    def test_commande(self):
+        out = StringIO()
+        call_command('refresh_forecasts', '--lead-time', '5', stdout=out)
+        self.assertIn('prévisions calculées', out.getvalue())
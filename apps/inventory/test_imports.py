@@ -0,0 +1,137 @@
+import io
+import shutil
+import tempfile
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from openpyxl import Workbook
+
+from reports.jobs import claim_next, run_job
+from reports.models import Job
+
+from .imports import import_items, read_rows
+from .models import AcquisitionMode, Category, Item, Movement, StockSnapshot
+from .search import search_items
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+CSV = (
+    "Nom;Catégorie;Quantité;Prix unitaire;Statut;Mode d'acquisition\n"
+    "Ordinateur HP;Informatique;10;450 000,00;Disponible;Achat\n"
+    "Chaise;Mobilier;0;25000;;Don\n"
+    ";Mobilier;3;1000;;\n"
+    "Table;Mobilier;-2;1000;;\n"
+    "Stylo;Fournitures;abc;100;;\n"
+    "\n"
+    "Agrafeuse;fournitures;5;3500;;achat\n"
+)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class ItemImportTest(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def _import(self, content=CSV, filename='articles.csv', **kwargs):
+        with self.captureOnCommitCallbacks(execute=True):
+            return import_items(read_rows(io.BytesIO(content.encode('utf-8')), filename), **kwargs)
+
+    def test_import_csv_avec_erreurs_par_ligne(self):
+        Category.objects.create(name='Fournitures')
+        result = self._import()
+        self.assertEqual(result.created, 3)
+        self.assertEqual([line for line, _ in result.errors], [4, 5, 6])
+        self.assertIn('Quantité invalide', result.errors[2][1])
+
+        computer = Item.objects.get(name='Ordinateur HP')
+        self.assertEqual((computer.quantity, computer.unit_price), (10, 450000))
+        self.assertEqual(computer.acquisition_mode.name, 'Achat')
+        # Noms résolus sans tenir compte de la casse, sans doublon
+        self.assertEqual(Category.objects.count(), 3)
+        self.assertEqual(AcquisitionMode.objects.count(), 2)
+        self.assertEqual(Item.objects.get(name='Agrafeuse').category.name, 'Fournitures')
+
+    def test_mouvements_et_photos_d_ouverture(self):
+        self._import()
+        # Une entrée d'ouverture par article en stock (pas pour la chaise à 0)
+        self.assertEqual(
+            sorted(Movement.objects.values_list('item__name', 'type_mouvement', 'quantite')),
+            [('Agrafeuse', 'ENTREE', 5), ('Ordinateur HP', 'ENTREE', 10)],
+        )
+        snapshot = StockSnapshot.objects.get(item__name='Ordinateur HP')
+        self.assertEqual((snapshot.closing_qty, snapshot.in_qty), (10, 10))
+        self.assertEqual([item.name for item in search_items('agraf')], ['Agrafeuse'])
+
+    def test_requetes_par_paquet_et_non_par_ligne(self):
+        Category.objects.create(name='Consommables')
+        rows = ''.join(f"Toner {i},Consommables,{i + 1},100\n" for i in range(300))
+        content = "nom,categorie,quantite,prix\n" + rows
+        # Un INSERT d'articles par tranche de 111 lignes et de mouvements par
+        # tranche de 142 (limite de paramètres SQLite), alertes évaluées puis
+        # écrites en une requête chacune, couches FIFO des ouvertures (déjà
+        # valorisées) insérées par tranche de 166
+        with self.assertNumQueries(19):
+            result = self._import(content, chunk_size=1000)
+        self.assertEqual(result.created, 300)
+
+    def test_import_xlsx(self):
+        workbook = Workbook()
+        sheet = workbook.active
+        sheet.append(['Nom', 'Catégorie', 'Quantité', 'Prix'])
+        sheet.append(['Clé USB', 'Informatique', 40, 5000.5])
+        sheet.append(['Souris', 'Informatique', None, 1500])
+        output = io.BytesIO()
+        workbook.save(output)
+        output.seek(0)
+        result = import_items(read_rows(output, 'articles.xlsx'))
+        self.assertEqual((result.created, result.errors), (2, []))
+        self.assertEqual(str(Item.objects.get(name='Clé USB').unit_price), '5000.50')
+        self.assertEqual(Item.objects.get(name='Souris').quantity, 0)
+
+    def test_colonnes_obligatoires(self):
+        with self.assertRaises(ValueError):
+            import_items(read_rows(io.BytesIO(b"nom,quantite\nA,1\n"), 'articles.csv'))
+
+    def test_commande(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', encoding='utf-8', delete=False) as source:
+            source.write(CSV)
+        errors = source.name + '.errors.csv'
+        out, err = StringIO(), StringIO()
+        call_command('import_items', source.name, '--errors', errors, stdout=out, stderr=err)
+        self.assertIn('3 articles importés, 3 lignes rejetées', out.getvalue())
+        self.assertIn('Ligne 4', err.getvalue())
+        with open(errors, encoding='utf-8-sig') as report:
+            self.assertEqual(len(report.read().strip().splitlines()), 4)
+
+    def test_ecran_admin_en_tache_de_fond(self):
+        user = User.objects.create_superuser('admin', 'admin@test.com', 'pass')
+        self.client.force_login(user)
+        self.assertEqual(self.client.get('/admin/inventory/item/import/').status_code, 200)
+
+        upload = SimpleUploadedFile('articles.csv', CSV.encode('utf-8'))
+        response = self.client.post('/admin/inventory/item/import/', {'file': upload})
+        job = Job.objects.get()
+        self.assertRedirects(response, f'/reports/jobs/{job.pk}/')
+        self.assertEqual(Item.objects.count(), 0)  # Rien n'est importé pendant la requête
+
+        with self.captureOnCommitCallbacks(execute=True):
+            run_job(claim_next())
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.DONE)
+        self.assertEqual(Item.objects.count(), 3)
+        with job.result.open('rb') as report:
+            lines = report.read().decode('utf-8-sig').splitlines()
+        self.assertEqual(lines[:2], ['Articles importés,3', 'Lignes rejetées,3'])
+
+    def test_format_refuse(self):
+        user = User.objects.create_superuser('admin', 'admin@test.com', 'pass')
+        self.client.force_login(user)
+        upload = SimpleUploadedFile('articles.pdf', b'%PDF')
+        response = self.client.post('/admin/inventory/item/import/', {'file': upload})
+        self.assertContains(response, 'Format non pris en charge')
+        self.assertFalse(Job.objects.exists())
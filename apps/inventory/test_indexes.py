@@ -0,0 +1,71 @@
+from datetime import timedelta
+from unittest import skipUnless
+
+from django.db import connection
+from django.db.models import Sum
+from django.test import TestCase
+from django.utils import timezone
+
+from .models import Category, Item, Movement
+from .pagination import _after
+
+
+@skipUnless(connection.vendor == 'sqlite', "Plans d'exécution propres à SQLite")
+class HotQueryPlanTest(TestCase):
+    """Chaque requête chaude doit s'appuyer sur un index (EXPLAIN QUERY PLAN)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.cat = Category.objects.create(name='Outillage')
+        cls.item = Item.objects.create(name='Perceuse', category=cls.cat, quantity=4, unit_price=65000)
+
+    def plan(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            return ' | '.join(row[-1] for row in cursor.fetchall())
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = self.plan(queryset)
+        self.assertIn(f'INDEX {index_name}', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_mouvements_par_periode(self):
+        since = timezone.now() - timedelta(days=6)
+        self.assertUsesIndex(Movement.objects.filter(date__gte=since), 'movement_date_idx')
+
+    def test_historique_trie_par_date(self):
+        self.assertUsesIndex(Movement.objects.order_by('-date', '-id'), 'movement_date_idx')
+
+    def test_agregat_par_article_type_et_periode(self):
+        now = timezone.now()
+        queryset = Movement.objects.filter(
+            item=self.item, type_mouvement='ENTREE', date__gte=now - timedelta(days=30), date__lt=now,
+        ).values('item').annotate(total=Sum('quantite'))
+        self.assertUsesIndex(queryset, 'movement_item_type_date_idx')
+
+    def test_stock_critique(self):
+        self.assertUsesIndex(Item.objects.filter(quantity__lt=10), 'item_quantity_idx')
+
+    def test_filtre_par_statut(self):
+        self.assertUsesIndex(Item.objects.filter(status='Disponible'), 'item_status_idx')
+
+    def test_catalogue_par_categorie_trie_par_nom(self):
+        self.assertUsesIndex(Item.objects.filter(category=self.cat).order_by('name', 'id'), 'item_category_name_idx')
+
+    def test_catalogue_trie_par_nom(self):
+        self.assertUsesIndex(Item.objects.order_by('name', 'id'), 'item_name_idx')
+
+    def test_page_suivante_par_curseur(self):
+        # Page N : plage d'index à partir du curseur, sans OFFSET ni tri temporaire
+        queryset = Movement.objects.order_by('-date', '-id').filter(
+            _after(('date', 'id'), [timezone.now(), 1000], descending=True)
+        )[:51]
+        self.assertUsesIndex(queryset, 'movement_date_idx')
+
+    def test_fiche_de_stock_par_plage(self):
+        # Page N de la fiche de stock d'un article : plage (item, date, id)
+        queryset = Movement.objects.filter(item=self.item).order_by('-date', '-id').filter(
+            _after(('date', 'id'), [timezone.now(), 1000], descending=True)
+        )[:51]
+        self.assertUsesIndex(queryset, 'movement_item_date_idx')
@@ -0,0 +1,86 @@
+from django.core.exceptions import ValidationError
+from django.test import TestCase
+
+from .models import Category, Item, Movement
+
+
+class MovementPostingTest(TestCase):
+    def setUp(self):
+        self.cat = Category.objects.create(name='Materiel')
+        self.item = Item.objects.create(name='Ramette A4', category=self.cat, quantity=20, unit_price=2500)
+
+    def test_entree_et_sortie_mettent_a_jour_le_stock(self):
+        Movement.objects.create(item=self.item, type_mouvement='ENTREE', quantite=5)
+        Movement.objects.create(item=self.item, type_mouvement='SORTIE', quantite=8)
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.quantity, 17)
+
+    def test_sortie_superieure_au_stock_refusee(self):
+        with self.assertRaises(ValidationError):
+            Movement.objects.create(item=self.item, type_mouvement='SORTIE', quantite=21)
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.quantity, 20)
+        self.assertFalse(Movement.objects.exists())
+
+    def test_instances_perimees_ne_perdent_pas_de_mise_a_jour(self):
+        # Deux magasiniers chargent le même article puis postent chacun une sortie
+        copie_a = Item.objects.get(pk=self.item.pk)
+        copie_b = Item.objects.get(pk=self.item.pk)
+        Movement.objects.create(item=copie_a, type_mouvement='SORTIE', quantite=6)
+        Movement.objects.create(item=copie_b, type_mouvement='SORTIE', quantite=4)
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.quantity, 10)
+
+    def test_depassement_detecte_par_l_update_conditionnel(self):
+        copie_a = Item.objects.get(pk=self.item.pk)
+        copie_b = Item.objects.get(pk=self.item.pk)
+        Movement.objects.create(item=copie_a, type_mouvement='SORTIE', quantite=15)
+        # copie_b croit encore disposer de 20 unités : la base doit refuser
+        with self.assertRaises(ValidationError):
+            Movement.objects.create(item=copie_b, type_mouvement='SORTIE', quantite=10)
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.quantity, 5)
+
+    def test_modification_applique_uniquement_la_difference(self):
+        mouvement = Movement.objects.create(item=self.item, type_mouvement='SORTIE', quantite=5)
+        mouvement.quantite = 7
+        mouvement.save()
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.quantity, 13)
+
+
+class MovementBatchTest(TestCase):
+    def setUp(self):
+        self.cat = Category.objects.create(name='Fournitures')
+        self.stylo = Item.objects.create(name='Stylo', category=self.cat, quantity=10, unit_price=100)
+        self.cahier = Item.objects.create(name='Cahier', category=self.cat, quantity=0, unit_price=500)
+
+    def test_lot_applique_les_lignes_valides_et_signale_les_erreurs(self):
+        created, errors = Movement.objects.post_batch([
+            {'item': self.stylo, 'type_mouvement': 'SORTIE', 'quantite': 4},
+            {'item': self.cahier, 'type_mouvement': 'SORTIE', 'quantite': 1},
+            {'item_id': self.cahier.pk, 'type_mouvement': 'ENTREE', 'quantite': 30},
+            {'item': self.stylo, 'type_mouvement': 'SORTIE', 'quantite': 7},
+            {'item': self.stylo, 'type_mouvement': 'ENTREE', 'quantite': 0},
+        ])
+        self.assertEqual(len(created), 2)
+        self.assertEqual(sorted(errors), [1, 3, 4])
+        self.stylo.refresh_from_db()
+        self.cahier.refresh_from_db()
+        self.assertEqual(self.stylo.quantity, 6)
+        self.assertEqual(self.cahier.quantity, 30)
+        self.assertEqual(Movement.objects.count(), 2)
+
+    def test_nombre_de_requetes_independant_du_nombre_de_lignes(self):
+        lines = [{'item': self.stylo, 'type_mouvement': 'ENTREE', 'quantite': 1}] * 120
+        lines += [{'item': self.cahier, 'type_mouvement': 'ENTREE', 'quantite': 2}] * 60
+        # SAVEPOINT + SELECT du stock (et des couches FIFO) + UPDATE groupé + RELEASE
+        # + 2 INSERT (142 mouvements par INSERT : limite de paramètres SQLite)
+        # + photos de stock du jour (lecture, écriture groupée ; prix transmis par le postage)
+        # + alertes (évaluation, puis suppression : le cahier repasse au-dessus du seuil)
+        # + couches FIFO des entrées, valorisées au postage (2 INSERT)
+        with self.assertNumQueries(12):
+            created, errors = Movement.objects.post_batch(lines)
+        self.assertEqual((len(created), errors), (180, {}))
+        self.stylo.refresh_from_db()
+        self.assertEqual(self.stylo.quantity, 130)
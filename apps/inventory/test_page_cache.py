@@ -0,0 +1,78 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from .alerts import evaluate_alerts
+from .models import Category, Item, Movement
+from .page_cache import catalogue_version
+
+
+class CataloguePageCacheTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('magasinier', password='pass')
+        self.client.force_login(self.user)
+        self.cat = Category.objects.create(name='Papeterie')
+        self.item = Item.objects.create(name='Ramette A4', category=self.cat, quantity=50, unit_price=3500)
+
+    def _get(self, path, **headers):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(path, **headers)
+        catalogue = [query['sql'] for query in queries if 'inventory_' in query['sql']]
+        return response, catalogue
+
+    def test_second_affichage_sans_base_ni_gabarit(self):
+        for path in ('/items/', f'/items/{self.item.pk}/'):
+            first, catalogue = self._get(path)
+            self.assertTrue(catalogue)
+            second, catalogue = self._get(path)
+            self.assertEqual(catalogue, [])
+            self.assertEqual(second.templates, [])
+            self.assertEqual(second.content, first.content)
+
+    def test_get_conditionnel(self):
+        response, _ = self._get('/items/')
+        self.assertIn('private', response['Cache-Control'])
+        etag, modified = response['ETag'], response['Last-Modified']
+
+        response, catalogue = self._get('/items/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(catalogue, [])
+        response, _ = self._get('/items/', HTTP_IF_MODIFIED_SINCE=modified)
+        self.assertEqual(response.status_code, 304)
+        # L'ETag dépend de l'URL
+        response, _ = self._get('/items/?q=ramette', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_mouvement_rend_les_pages_caduques(self):
+        etag = self.client.get(f'/items/{self.item.pk}/')['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            Movement.objects.create(item=self.item, type_mouvement='SORTIE', quantite=8)
+        response = self.client.get(f'/items/{self.item.pk}/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, '42 Unités')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Movement.objects.post_batch([{'item': self.item, 'type_mouvement': 'ENTREE', 'quantite': 3}])
+        self.assertContains(self.client.get(f'/items/{self.item.pk}/'), '45 Unités')
+
+    def test_categorie_renommee_dans_le_fragment_des_filtres(self):
+        self.client.get('/items/')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.cat.name = 'Fournitures'
+            self.cat.save()
+        # Autre page de la liste : seul le fragment des filtres pourrait être en cache
+        self.assertContains(self.client.get('/items/?q=ramette'), 'Fournitures')
+
+    def test_alerte_sans_sauvegarde_d_article(self):
+        version = catalogue_version()
+        Item.objects.filter(pk=self.item.pk).update(min_level=60)
+        with self.captureOnCommitCallbacks(execute=True):
+            evaluate_alerts([self.item.pk])
+        self.assertNotEqual(catalogue_version(), version)
+
+    def test_article_inconnu_non_mis_en_cache(self):
+        self.assertEqual(self.client.get('/items/999999/').status_code, 404)
+        with self.captureOnCommitCallbacks(execute=True):
+            item = Item.objects.create(pk=999999, name='Agrafeuse', category=self.cat, quantity=1, unit_price=500)
+        self.assertContains(self.client.get(f'/items/{item.pk}/'), 'Agrafeuse')
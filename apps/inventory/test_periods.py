@@ -0,0 +1,186 @@
+import gzip
+import shutil
+import tempfile
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.core.management import CommandError, call_command
+from django.db import transaction
+from django.db.models import ProtectedError
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from .models import ArchivedMovement, Category, CostLayer, Item, Movement, PeriodBalance, PeriodClose
+from .periods import close_periods
+from .reports import monthly_report_rows
+from .valuation import rebuild_layers, stock_value
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class PeriodCloseTest(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cat = Category.objects.create(name='Papeterie')
+        self.item = Item.objects.create(name='Ramette A4', category=cat, quantity=0, unit_price=100)
+        self.other = Item.objects.create(name='Agrafeuse', category=cat, quantity=0, unit_price=500)
+        self.dormant = Item.objects.create(name='Classeur', category=cat, quantity=0, unit_price=50)
+        # Deux mois échus, quel que soit le jour du test
+        self.march = (timezone.localdate().replace(day=1) - timedelta(days=1)).replace(day=1)
+        self.february = (self.march - timedelta(days=1)).replace(day=1)
+        self._movement(self.item, 'ENTREE', 10, self.february, 3, unit_cost=100)
+        self._movement(self.item, 'SORTIE', 4, self.february, 20)
+        self._movement(self.other, 'ENTREE', 2, self.february, 21)
+        self._movement(self.item, 'ENTREE', 10, self.march, 5, unit_cost=200)
+        self._movement(self.item, 'SORTIE', 8, self.march, 10)
+        self.latest = self._movement(self.item, 'ENTREE', 1, timezone.localdate(), 1, unit_cost=300)
+        # Dates modifiées par UPDATE : soldes, couches et photos recalculés
+        for item in (self.item, self.other):
+            Movement.objects.rebuild_balances(item.pk)
+        rebuild_layers([self.item.pk, self.other.pk])
+        call_command('build_stock_snapshots', stdout=StringIO())
+
+    def _movement(self, item, type_mouvement, quantite, month, day, **kwargs):
+        movement = Movement.objects.create(item=item, type_mouvement=type_mouvement, quantite=quantite, **kwargs)
+        when = timezone.make_aware(datetime(month.year, month.month, day, 10))
+        Movement.objects.filter(pk=movement.pk).update(date=when)
+        movement.date = when
+        return movement
+
+    def test_soldes_mensuels_figes(self):
+        closes = close_periods(self.march)
+        self.assertEqual([close.period for close in closes], [self.february, self.march])
+        self.assertEqual([close.movement_count for close in closes], [3, 2])
+
+        balance = PeriodBalance.objects.get(item=self.item, period=self.march)
+        self.assertEqual(
+            (balance.opening_qty, balance.in_qty, balance.out_qty, balance.closing_qty),
+            (6, 10, 8, 8),
+        )
+        # Coût moyen : (6 x 100 + 10 x 200) / 16 = 162,5 ; FIFO : 8 restants de l'entrée à 200
+        self.assertEqual((balance.closing_value, balance.fifo_value), (Decimal('1300'), Decimal('1600')))
+        # Article sans mouvement ni stock : pas de ligne
+        self.assertFalse(PeriodBalance.objects.filter(item=self.dormant).exists())
+        self.assertEqual(PeriodBalance.objects.filter(item=self.other).count(), 2)
+        # Rien de plus à clôturer
+        self.assertEqual(close_periods(self.march), [])
+
+    def test_mois_en_cours_refuse(self):
+        with self.assertRaises(ValueError):
+            close_periods(timezone.localdate().replace(day=1))
+
+    def test_periode_close_immuable(self):
+        close_periods(self.february)
+        movement = Movement.objects.filter(item=self.item).order_by('date').first()
+        movement.quantite = 12
+        with self.assertRaises(ValidationError):
+            movement.save()
+        with self.assertRaises(ValidationError):
+            movement.delete()
+        # Le mois suivant reste modifiable
+        march = Movement.objects.get(item=self.item, date__month=self.march.month, type_mouvement='SORTIE')
+        march.quantite = 7
+        march.save()
+        self.assertEqual(Item.objects.get(pk=self.item.pk).quantity, 10)
+
+    def test_suppression_en_masse_et_en_cascade_refusee(self):
+        close_periods(self.february)
+        count = Movement.objects.count()
+        with self.assertRaises(ValidationError), transaction.atomic():
+            Movement.objects.filter(item=self.item).delete()
+        # Article mouvementé en période close : protégé par ses soldes figés
+        with self.assertRaises(ProtectedError), transaction.atomic():
+            self.other.delete()
+        self.assertEqual(Movement.objects.count(), count)
+        # Hors période close : la suppression en masse reste possible
+        Movement.objects.filter(pk=self.latest.pk).delete()
+        self.assertEqual(Movement.objects.count(), count - 1)
+
+    def test_admin_sans_suppression_des_periodes_closes(self):
+        close_periods(self.february)
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@test.com', 'pass'))
+        closed = Movement.objects.filter(item=self.item).order_by('date').first()
+        self.assertEqual(self.client.get(f'/admin/inventory/movement/{closed.pk}/delete/').status_code, 403)
+        self.assertEqual(self.client.get(f'/admin/inventory/item/{self.item.pk}/delete/').status_code, 403)
+        # Mouvement clos : consultable, sans formulaire de modification
+        self.assertNotContains(self.client.get(f'/admin/inventory/movement/{closed.pk}/change/'), 'name="_save"')
+
+        count = Movement.objects.count()
+        response = self.client.post('/admin/inventory/movement/', {
+            'action': 'delete_selected', 'post': 'yes', '_selected_action': [closed.pk, self.latest.pk],
+        }, follow=True)
+        self.assertContains(response, "période clôturée")
+        self.assertEqual(Movement.objects.count(), count)
+        self.client.post('/admin/inventory/movement/', {
+            'action': 'delete_selected', 'post': 'yes', '_selected_action': [self.latest.pk],
+        })
+        self.assertEqual(Movement.objects.count(), count - 1)
+
+    def test_archivage_en_table(self):
+        report = monthly_report_rows(Item.objects.all(), self.march.year, self.march.month)
+        end_of_february = date(self.march.year, self.march.month, 1) - timedelta(days=1)
+        values = {method: stock_value(end_of_february, method) for method in ('average', 'fifo')}
+        current = {method: stock_value(method=method) for method in ('average', 'fifo')}
+
+        close_periods(self.march, archive=PeriodClose.TABLE)
+        self.assertEqual(Movement.objects.count(), 1)
+        self.assertEqual(ArchivedMovement.objects.count(), 5)
+        self.assertEqual(ArchivedMovement.objects.filter(item=self.item).order_by('date').first().unit_cost, 100)
+
+        # Rapports et valeurs des périodes closes lus dans les soldes, en une requête
+        with self.assertNumQueries(1):
+            self.assertEqual(monthly_report_rows(Item.objects.all(), self.march.year, self.march.month), report)
+        for method in ('average', 'fifo'):
+            self.assertEqual(stock_value(end_of_february, method), values[method])
+            self.assertEqual(stock_value(method=method), current[method])
+
+        # Les couches FIFO des entrées archivées portent toujours le stock
+        self.assertEqual(CostLayer.objects.filter(item=self.item, movement__isnull=True, remaining__gt=0).count(), 1)
+        Movement.objects.create(item=self.item, type_mouvement='SORTIE', quantite=9)
+        self.assertEqual(stock_value(items=Item.objects.filter(pk=self.item.pk), method='fifo'), Decimal('0'))
+
+        # Reconstruction après archivage : 8 à 200 (archivés) puis 1 des 3 à 300 sortis
+        self.latest.quantite = 3
+        self.latest.save()
+        self.assertEqual(stock_value(items=Item.objects.filter(pk=self.item.pk), method='fifo'), Decimal('600'))
+
+    def test_article_archive_non_supprimable(self):
+        close_periods(self.february, archive=PeriodClose.TABLE)
+        # Plus aucun mouvement vivant en période close : soldes et archives protègent l'article
+        self.assertFalse(Movement.objects.filter(item=self.other).exists())
+        with self.assertRaises(ProtectedError), transaction.atomic():
+            self.other.delete()
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@test.com', 'pass'))
+        self.client.post(f'/admin/inventory/item/{self.other.pk}/delete/', {'post': 'yes'})
+        self.client.post('/admin/inventory/item/', {
+            'action': 'delete_selected', 'post': 'yes', '_selected_action': [self.other.pk],
+        })
+        self.assertTrue(Item.objects.filter(pk=self.other.pk).exists())
+        self.assertEqual(PeriodBalance.objects.filter(item=self.other).count(), 1)
+        self.assertEqual(ArchivedMovement.objects.filter(item=self.other).count(), 1)
+
+    def test_archivage_en_fichier_compresse(self):
+        close = close_periods(self.february, archive=PeriodClose.FILE)[0]
+        self.assertTrue(close.archive_file.name.startswith('archives/mouvements-'))
+        with close.archive_file.open('rb') as archive:
+            lines = gzip.decompress(archive.read()).decode('utf-8').splitlines()
+        self.assertEqual(lines[0].split(',')[:4], ['id', 'item_id', 'type_mouvement', 'quantite'])
+        self.assertEqual(len(lines), 1 + 3)
+        self.assertEqual(Movement.objects.count(), 3)
+
+    def test_commande(self):
+        out = StringIO()
+        call_command('close_period', self.march.strftime('%Y-%m'), '--archive', 'table', stdout=out)
+        self.assertIn('2 période(s) clôturée(s)', out.getvalue())
+        with self.assertRaises(CommandError):
+            call_command('close_period', 'mars', stdout=StringIO())
+        with self.assertRaises(CommandError):
+            call_command('close_period', timezone.localdate().strftime('%Y-%m'), stdout=StringIO())
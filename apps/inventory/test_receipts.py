@@ -0,0 +1,66 @@
+import shutil
+import tempfile
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+
+from personnel.models import Department, Employee
+from reports.jobs import claim_next, run_job
+from reports.models import Job
+
+from . import receipts
+from .models import Category, Item, Movement
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class ReceiptEngineTest(TestCase):
+    databases = {'default', 'replica'}
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.user = User.objects.create_superuser('admin', 'admin@test.com', 'pass')
+        self.client.force_login(self.user)
+        cat = Category.objects.create(name='Informatique')
+        self.item = Item.objects.create(name='Clé USB', category=cat, quantity=500, unit_price=5000)
+        employee = Employee.objects.create(name='Awa Ndiaye', department=Department.objects.create(name='DAF'))
+        Movement.objects.post_batch([
+            {'item': self.item, 'type_mouvement': 'SORTIE', 'quantite': 1, 'beneficiary': employee}
+        ] * 30)
+
+    def _post_action(self):
+        return self.client.post('/admin/inventory/movement/', {
+            'action': 'generate_pdf_receipt',
+            '_selected_action': list(Movement.objects.values_list('pk', flat=True)),
+        })
+
+    def test_rendu_direct_sans_requete_par_bon(self):
+        # Une seule requête de lecture pour tous les bons (jointures comprises)
+        with tempfile.TemporaryFile() as output, self.assertNumQueries(1):
+            receipts.render_receipts(Movement.objects.all(), output)
+
+    def test_progression_par_paquets(self):
+        done = []
+        with tempfile.TemporaryFile() as output, mock.patch.object(receipts, 'CHUNK_SIZE', 10):
+            receipts.render_receipts(Movement.objects.all(), output, progress=done.append)
+        self.assertEqual(done, [10, 20, 30])
+
+    def test_action_admin_mise_en_file(self):
+        response = self._post_action()
+        job = Job.objects.get()
+        self.assertRedirects(response, f'/reports/jobs/{job.pk}/')
+        self.assertEqual(job.kind, 'receipts')
+        self.assertEqual(len(job.params['ids']), 30)
+
+        run_job(claim_next())
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.DONE)
+        download = self.client.get(f'/reports/jobs/{job.pk}/download/')
+        self.assertEqual(download.status_code, 200)
+        self.assertTrue(b''.join(download.streaming_content).startswith(b'%PDF'))
@@ -0,0 +1,55 @@
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+
+from .models import Category, Item, Movement
+from .search import SimpleSearchBackend, get_backend, search_items
+
+
+class CatalogueSearchTest(TestCase):
+    def setUp(self):
+        self.info = Category.objects.create(name='Informatique')
+        self.mobilier = Category.objects.create(name='Mobilier')
+        self.pc = Item.objects.create(name='Ordinateur portable HP', category=self.info, quantity=3, unit_price=450000)
+        self.ecran = Item.objects.create(name='Écran Dell 24 pouces', category=self.info, quantity=8, unit_price=120000)
+        self.chaise = Item.objects.create(name='Chaise ordinaire', category=self.mobilier, quantity=40, unit_price=15000)
+
+    def test_recherche_par_prefixe_et_classement(self):
+        results = search_items('ordi')
+        self.assertEqual(set(results), {self.pc, self.chaise})
+        self.assertEqual(search_items('ordi port'), [self.pc])
+
+    def test_accents_et_categorie(self):
+        self.assertEqual(search_items('ecran'), [self.ecran])
+        self.assertEqual(set(search_items('informatique')), {self.pc, self.ecran})
+
+    def test_index_synchronise_par_les_signaux(self):
+        self.pc.name = 'Serveur rack'
+        self.pc.save()
+        self.assertEqual(search_items('serveur'), [self.pc])
+        self.assertEqual(search_items('ordinateur'), [])
+
+        self.mobilier.name = 'Ameublement'
+        self.mobilier.save()
+        self.assertEqual(search_items('ameub'), [self.chaise])
+
+        self.chaise.delete()
+        self.assertEqual(search_items('chaise'), [])
+
+    def test_filtre_sur_un_queryset_lie(self):
+        Movement.objects.create(item=self.ecran, type_mouvement='SORTIE', quantite=2)
+        Movement.objects.create(item=self.chaise, type_mouvement='SORTIE', quantite=5)
+        movements = get_backend().filter(Movement.objects.all(), 'dell', field='item')
+        self.assertEqual([m.item_id for m in movements], [self.ecran.pk])
+
+    @override_settings(STOCKPRO_SEARCH_BACKEND='apps.inventory.search.SimpleSearchBackend')
+    def test_moteur_configurable(self):
+        self.assertIsInstance(get_backend(), SimpleSearchBackend)
+        self.assertEqual(search_items('dell'), [self.ecran])
+
+    def test_liste_et_admin_utilisent_l_index(self):
+        user = User.objects.create_superuser('admin', 'admin@test.com', 'pass')
+        self.client.force_login(user)
+        response = self.client.get('/items/', {'q': 'portable'})
+        self.assertEqual(list(response.context['items']), [self.pc])
+        response = self.client.get('/admin/inventory/item/', {'q': 'chaise'})
+        self.assertEqual(list(response.context['cl'].result_list), [self.chaise])
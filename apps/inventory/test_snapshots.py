@@ -0,0 +1,64 @@
+from datetime import date, datetime, timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from .models import Category, Inventory, InventoryItem, Item, Movement, StockSnapshot
+
+
+class StockSnapshotTest(TestCase):
+    def setUp(self):
+        self.cat = Category.objects.create(name='Papeterie')
+        self.item = Item.objects.create(name='Classeur', category=self.cat, quantity=5, unit_price=800)
+
+    def _movement(self, type_mouvement, quantite, when):
+        movement = Movement.objects.create(item=self.item, type_mouvement=type_mouvement, quantite=quantite)
+        Movement.objects.filter(pk=movement.pk).update(date=timezone.make_aware(when))
+
+    def test_photo_du_jour_tenue_au_fil_des_mouvements(self):
+        Movement.objects.create(item=self.item, type_mouvement='ENTREE', quantite=10)
+        Movement.objects.post_batch([{'item': self.item, 'type_mouvement': 'SORTIE', 'quantite': 3}])
+        snapshot = StockSnapshot.objects.get(item=self.item, day=timezone.localdate())
+        self.assertEqual((snapshot.closing_qty, snapshot.in_qty, snapshot.out_qty), (12, 10, 3))
+        self.assertEqual(snapshot.value, 12 * 800)
+
+    def test_reconstruction_et_stock_a_date(self):
+        self._movement('ENTREE', 20, datetime(2025, 1, 10, 9))
+        self._movement('SORTIE', 8, datetime(2025, 1, 12, 14))
+        self._movement('SORTIE', 2, datetime(2025, 1, 12, 16))
+        call_command('build_stock_snapshots', stdout=StringIO())
+
+        # Stock actuel 15 : ouverture 5, +20 le 10/01, -10 le 12/01
+        stock_at = StockSnapshot.objects.stock_at
+        self.assertEqual(stock_at(self.item, date(2025, 1, 9)), 5)
+        self.assertEqual(stock_at(self.item, date(2025, 1, 11)), 25)
+        self.assertEqual(stock_at(self.item, date(2025, 1, 12)), 15)
+        self.assertEqual(stock_at(self.item, timezone.make_aware(datetime(2025, 1, 12, 15))), 17)
+        self.assertEqual(
+            Item.objects.with_stock_at(date(2025, 1, 11)).get(pk=self.item.pk).stock_at_date, 25
+        )
+
+    def test_stock_d_ouverture_sans_date(self):
+        # Article sans mouvement : son stock vaut avant toute date, pas depuis la reconstruction
+        call_command('build_stock_snapshots', stdout=StringIO())
+        self.assertEqual(StockSnapshot.objects.get(item=self.item).day, None)
+        past = date(2020, 6, 1)
+        self.assertEqual(StockSnapshot.objects.stock_at(self.item, past), 5)
+        self.assertEqual(Item.objects.with_stock_at(past).get(pk=self.item.pk).stock_at_date, 5)
+
+    def test_quantite_theorique_d_inventaire_deduite_des_photos(self):
+        inventory = Inventory.objects.create(description='Inventaire annuel')
+        line = InventoryItem.objects.create(inventory=inventory, item=self.item, actual_quantity=4)
+        self.assertEqual(line.expected_quantity, 5)
+
+    def test_modification_d_un_mouvement_passe(self):
+        self._movement('ENTREE', 20, datetime(2025, 1, 10, 9))
+        call_command('build_stock_snapshots', stdout=StringIO())
+        movement = Movement.objects.get()
+        movement.quantite = 30
+        movement.save()
+        self.assertEqual(StockSnapshot.objects.stock_at(self.item, date(2025, 1, 10)), 35)
+        self.assertEqual(StockSnapshot.objects.stock_at(self.item, date(2025, 1, 9)), 5)
+        self.assertEqual(StockSnapshot.objects.stock_at(self.item, timezone.localdate() + timedelta(days=1)), 35)
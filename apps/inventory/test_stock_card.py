@@ -0,0 +1,93 @@
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db.models import OuterRef, Subquery
+from django.test import TestCase
+
+from .models import Category, Item, Movement
+from .pagination import PAGE_SIZE
+
+
+class RunningBalanceTest(TestCase):
+    def setUp(self):
+        self.cat = Category.objects.create(name='Papeterie')
+        self.item = Item.objects.create(name='Ramette A4', category=self.cat, quantity=0, unit_price=100)
+
+    def balances(self, item=None):
+        return list(
+            Movement.objects.filter(item=item or self.item).order_by('date', 'pk')
+            .values_list('balance_after', 'unit_cost_after')
+        )
+
+    def test_solde_et_cout_moyen_pondere(self):
+        Movement.objects.create(item=self.item, type_mouvement='ENTREE', quantite=10)
+        self.item.unit_price = 200
+        self.item.save()
+        Movement.objects.create(item=self.item, type_mouvement='ENTREE', quantite=10)
+        Movement.objects.create(item=self.item, type_mouvement='SORTIE', quantite=5)
+        self.assertEqual(self.balances(), [(10, Decimal('100')), (20, Decimal('150')), (15, Decimal('150'))])
+
+    def test_postage_par_lot(self):
+        other = Item.objects.create(name='Stylo', category=self.cat, quantity=50, unit_price=30)
+        Movement.objects.post_batch([
+            {'item': self.item, 'type_mouvement': 'ENTREE', 'quantite': 4},
+            {'item': other, 'type_mouvement': 'SORTIE', 'quantite': 20},
+            {'item': self.item, 'type_mouvement': 'SORTIE', 'quantite': 1},
+            {'item': self.item, 'type_mouvement': 'SORTIE', 'quantite': 99},  # refusée
+        ])
+        self.assertEqual(self.balances(), [(4, Decimal('100')), (3, Decimal('100'))])
+        # Stock initial saisi sans mouvement : le solde part de ce stock
+        self.assertEqual(self.balances(other), [(30, Decimal('30'))])
+
+    def test_modification_d_un_mouvement_passe(self):
+        first = Movement.objects.create(item=self.item, type_mouvement='ENTREE', quantite=10)
+        Movement.objects.create(item=self.item, type_mouvement='SORTIE', quantite=3)
+        Movement.objects.create(item=self.item, type_mouvement='ENTREE', quantite=5)
+        first.quantite = 20
+        first.save()
+        self.assertEqual([balance for balance, _ in self.balances()], [20, 17, 22])
+        self.assertEqual(first.balance_after, 20)
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.quantity, 22)
+
+    def test_historique_genere_coherent(self):
+        call_command('seed_warehouse', items=5, movements=300, employees=2, days=30, seed=3, stdout=StringIO())
+        last = Movement.objects.filter(item=OuterRef('pk')).order_by('-date', '-pk').values('balance_after')[:1]
+        for quantity, balance in Item.objects.exclude(pk=self.item.pk).annotate(last=Subquery(last)).values_list('quantity', 'last'):
+            self.assertEqual(balance, quantity)
+        item = Item.objects.exclude(pk=self.item.pk).first()
+        before = self.balances(item)
+        Movement.objects.rebuild_balances(item.pk)
+        self.assertEqual(self.balances(item), before)
+
+
+class StockCardViewTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('magasinier', password='pass')
+        cat = Category.objects.create(name='Papeterie')
+        cls.item = Item.objects.create(name='Ramette A4', category=cat, quantity=0, unit_price=100)
+        Movement.objects.post_batch(
+            [{'item': cls.item, 'type_mouvement': 'ENTREE', 'quantite': 2}] * (2 * PAGE_SIZE + 10)
+        )
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_pages_du_plus_recent_au_plus_ancien(self):
+        url = f'/items/{self.item.pk}/stock-card/'
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        balances = [movement.balance_after for movement in response.context['movements']]
+        self.assertEqual(balances[:2], [2 * (2 * PAGE_SIZE + 10), 2 * (2 * PAGE_SIZE + 9)])
+
+        # Page suivante : même coût, reprise juste après la dernière ligne
+        cache.clear()
+        with self.assertNumQueries(4):  # session, utilisateur, article, page (bénéficiaires joints)
+            response = self.client.get(f"{url}?{response.context['next_query']}")
+        balances_next = [movement.balance_after for movement in response.context['movements']]
+        self.assertEqual(balances_next[0], balances[-1] - 2)
+        self.assertContains(response, f'{balances_next[0] * 100:.2f}'.replace('.', ','))
@@ -0,0 +1,122 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db.models import F
+from django.test import TestCase
+from django.utils import timezone
+
+from .models import Category, CostLayer, Item, Movement
+from .valuation import rebuild_layers, stock_value
+
+
+class StockValuationTest(TestCase):
+    def setUp(self):
+        self.cat = Category.objects.create(name='Papeterie')
+        self.item = Item.objects.create(name='Ramette A4', category=self.cat, quantity=0, unit_price=100)
+
+    def _post(self, type_mouvement, quantite, **kwargs):
+        return Movement.objects.create(item=self.item, type_mouvement=type_mouvement, quantite=quantite, **kwargs)
+
+    def test_cout_moyen_et_fifo_selon_les_couts_d_entree(self):
+        self._post('ENTREE', 10, unit_cost=100)
+        self._post('ENTREE', 10, unit_cost=200)
+        sortie = self._post('SORTIE', 15)
+
+        # Coût moyen : 5 x 150 ; FIFO : les 5 restants viennent de la seconde entrée
+        self.assertEqual(stock_value(method='average'), Decimal('750'))
+        self.assertEqual(stock_value(method='fifo'), Decimal('1000'))
+        self.assertEqual(sortie.unit_cost, None)
+        self.assertEqual(
+            list(CostLayer.objects.filter(item=self.item).order_by('pk').values_list('quantity', 'remaining')),
+            [(10, 0), (10, 5)],
+        )
+
+    def test_valeur_a_une_date(self):
+        self._post('ENTREE', 10, unit_cost=100)
+        Movement.objects.filter(item=self.item).update(date=timezone.now() - timedelta(days=3))
+        self._post('ENTREE', 10, unit_cost=400)
+
+        yesterday = timezone.localdate() - timedelta(days=1)
+        self.assertEqual(stock_value(yesterday, method='fifo'), Decimal('1000'))
+        self.assertEqual(stock_value(yesterday - timedelta(days=5)), Decimal('0'))
+        self.assertEqual(stock_value(method='average'), Decimal('5000'))
+        self.assertEqual(stock_value(timezone.now(), method='fifo'), Decimal('5000'))
+
+    def test_entree_valorisee_au_postage_sauf_ecart(self):
+        self._post('ENTREE', 10, unit_cost=100)
+        entree = self._post('ENTREE', 5, unit_cost=200)
+        self.assertEqual(entree.fifo_value_after, Decimal('2000'))
+        # Stock corrigé hors mouvement : l'écart est comblé au prix de l'article
+        Item.objects.filter(pk=self.item.pk).update(quantity=F('quantity') + 3)
+        self.item.refresh_from_db()
+        entree = self._post('ENTREE', 1, unit_cost=200)
+        self.assertEqual(Movement.objects.get(pk=entree.pk).fifo_value_after, Decimal('2500'))
+        self.assertEqual(stock_value(method='fifo'), Decimal('2500'))
+
+    def test_stock_d_ouverture_sans_mouvement(self):
+        item = Item.objects.create(name='Agrafeuse', category=self.cat, quantity=50, unit_price=3500)
+        self.assertEqual(stock_value(method='fifo'), Decimal('175000'))
+        Movement.objects.create(item=item, type_mouvement='ENTREE', quantite=10, unit_cost=5000)
+        Movement.objects.create(item=item, type_mouvement='SORTIE', quantite=55)
+        # Les 50 d'ouverture sortent d'abord, puis 5 de l'entrée à 5000
+        self.assertEqual(stock_value(method='fifo'), Decimal('25000'))
+
+    def test_couche_d_ouverture_reconstruite_sans_date(self):
+        item = Item.objects.create(name='Agrafeuse', category=self.cat, quantity=0, unit_price=3500)
+        Item.objects.filter(pk=item.pk).update(quantity=4)
+        rebuild_layers([item.pk])
+        # Stock sans mouvement : valorisé à toute date passée
+        self.assertEqual(CostLayer.objects.get(item=item).received_at, None)
+        self.assertEqual(stock_value(timezone.localdate() - timedelta(days=400), method='fifo'), Decimal('14000'))
+
+    def test_entrepot_valorise_en_une_requete(self):
+        items = Item.objects.bulk_create([
+            Item(name=f'Stylo {i}', category=self.cat, quantity=0, unit_price=50) for i in range(40)
+        ])
+        Movement.objects.post_batch(
+            [{'item': item, 'type_mouvement': 'ENTREE', 'quantite': 4, 'unit_cost': 60} for item in items]
+            + [{'item': item, 'type_mouvement': 'SORTIE', 'quantite': 1} for item in items]
+        )
+        for method in ('average', 'fifo'):
+            with self.assertNumQueries(1):
+                self.assertEqual(stock_value(method=method), Decimal(40 * 3 * 60))
+        with self.assertRaises(ValueError):
+            stock_value(method='lifo')
+
+    def test_cout_d_entree_refuse_sur_une_sortie(self):
+        self._post('ENTREE', 10)
+        created, errors = Movement.objects.post_batch([
+            {'item': self.item, 'type_mouvement': 'SORTIE', 'quantite': 1, 'unit_cost': 80},
+            {'item': self.item, 'type_mouvement': 'ENTREE', 'quantite': 1, 'unit_cost': -5},
+            {'item': self.item, 'type_mouvement': 'ENTREE', 'quantite': 2, 'unit_cost': 250},
+        ])
+        self.assertEqual((len(created), sorted(errors)), (1, [0, 1]))
+        self.assertEqual(created[0].unit_cost, Decimal('250'))
+        self.assertEqual(stock_value(method='fifo'), Decimal('1500'))
+
+    def test_modification_d_un_mouvement_passe(self):
+        first = self._post('ENTREE', 10, unit_cost=100)
+        self._post('ENTREE', 10, unit_cost=300)
+        self._post('SORTIE', 12)
+        self.assertEqual(stock_value(method='fifo'), Decimal('2400'))
+
+        first.quantite = 20
+        first.save()
+        # 12 sortis de la première entrée : 8 à 100 et 10 à 300 restent
+        self.assertEqual(stock_value(method='fifo'), Decimal('3800'))
+        self.assertEqual(
+            Movement.objects.order_by('-date', '-pk').values_list('fifo_value_after', flat=True).first(),
+            Decimal('3800'),
+        )
+
+    def test_reconstruction_identique_au_postage(self):
+        self._post('ENTREE', 10, unit_cost=100)
+        self._post('SORTIE', 3)
+        self._post('ENTREE', 5, unit_cost=120)
+        self._post('SORTIE', 9)
+        layers = list(CostLayer.objects.order_by('pk').values_list('quantity', 'remaining', 'unit_cost'))
+        value = stock_value(method='fifo')
+
+        rebuild_layers([self.item.pk])
+        self.assertEqual(list(CostLayer.objects.order_by('pk').values_list('quantity', 'remaining', 'unit_cost')), layers)
+        self.assertEqual(stock_value(method='fifo'), value)
@@ -0,0 +1,62 @@
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+
+from .models import Category, Item, Movement
+from .pagination import keyset_page
+
+
+class KeysetPaginationTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('magasinier', password='pass')
+        cls.bureau = Category.objects.create(name='Bureau')
+        cls.info = Category.objects.create(name='Informatique')
+        # Noms en double pour vérifier le départage par id
+        Item.objects.bulk_create(
+            [Item(name=f'Article {i // 2:02d}', category=cls.bureau, quantity=i, unit_price=100) for i in range(25)]
+            + [Item(name='Clavier', category=cls.info, quantity=3, unit_price=9000, status='En panne')]
+        )
+        item = Item.objects.get(name='Clavier')
+        Movement.objects.post_batch([{'item': item, 'type_mouvement': 'ENTREE', 'quantite': 1}] * 12)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_parcours_complet_sans_doublon(self):
+        seen, cursor = [], None
+        while True:
+            rows, cursor = keyset_page(Item.objects.all(), ('name', 'id'), cursor, page_size=4)
+            seen += [row.pk for row in rows]
+            if cursor is None:
+                break
+        expected = list(Item.objects.order_by('name', 'id').values_list('pk', flat=True))
+        self.assertEqual(seen, expected)
+
+    def test_mouvements_du_plus_recent_au_plus_ancien(self):
+        # Tous les mouvements partagent la même date : l'id départage
+        Movement.objects.update(date=timezone.now())
+        first, cursor = keyset_page(Movement.objects.all(), ('date', 'id'), page_size=5, descending=True)
+        second, _ = keyset_page(Movement.objects.all(), ('date', 'id'), cursor, page_size=5, descending=True)
+        ids = [m.pk for m in first + second]
+        self.assertEqual(ids, sorted(ids, reverse=True))
+        self.assertEqual(len(set(ids)), 10)
+
+    def test_curseur_invalide_ramene_a_la_premiere_page(self):
+        rows, _ = keyset_page(Item.objects.all(), ('name', 'id'), 'pas-un-curseur', page_size=3)
+        self.assertEqual(rows[0].name, 'Article 00')
+
+    def test_vue_articles_filtres(self):
+        response = self.client.get('/items/', {'category': self.info.pk, 'status': 'En panne'})
+        self.assertEqual([item.name for item in response.context['items']], ['Clavier'])
+
+        response = self.client.get('/items/')
+        self.assertEqual(len(response.context['items']), 26)
+
+    def test_vue_mouvements_pages_suivantes(self):
+        response = self.client.get('/movements/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['movements']), 12)
+        self.assertIsNone(response.context['next_query'])
+        response = self.client.get('/movements/', {'type': 'SORTIE', 'category': self.info.pk})
+        self.assertEqual(len(response.context['movements']), 0)
@@ -11,13 +11,18 @@ urlpatterns = [
     path('items/', views.item_list, name='item_list'),
     path('items/create/', views.item_create, name='item_create'),
     path('items/<int:pk>/', views.item_detail, name='item_detail'),
+    path('items/<int:pk>/stock-card/', views.item_stock_card, name='item_stock_card'),
     path('items/<int:pk>/update/', views.item_update, name='item_update'),
     path('items/<int:pk>/delete/', views.item_delete, name='item_delete'),
 
     # Gestion des Mouvements (Entrées/Sorties)
     path('movements/', views.movement_list, name='movement_list'),
+    path('movements/export/', views.movement_export, name='movement_export'),
     # path('movements/create/', views.movement_create, name='movement_create'), # À décommenter si la vue existe
 
     # Gestion des Inventaires
-    # path('inventories/', views.inventory_list, name='inventory_list'), # À décommenter si la vue existe
+    path('inventories/', views.inventory_list, name='inventory_list'),
+    path('inventories/open/', views.inventory_open, name='inventory_open'),
+    path('inventories/<int:pk>/', views.inventory_detail, name='inventory_detail'),
+    path('inventories/<int:pk>/close/', views.inventory_close, name='inventory_close'),
 ]
@@ -0,0 +1,244 @@
+"""
+Valorisation du stock : coût moyen pondéré et couches de coût FIFO.
+
+Le coût moyen est écrit sur chaque mouvement au postage (unit_cost_after).
+Les couches FIFO (CostLayer) sont tenues ici, dans la transaction de
+postage : une entrée ouvre une couche à son coût d'entrée, une sortie
+consomme les couches les plus anciennes, et la valeur FIFO du stock après
+le mouvement est écrite sur celui-ci (fifo_value_after). Le postage lit la
+quantité et la valeur des couches ouvertes avec le stock : une entrée y est
+valorisée avant l'insertion, et seules les sorties relisent les couches.
+
+La valeur du stock à une date se lit alors en un seul agrégat sur le
+dernier mouvement de chaque article (ItemQuerySet.with_stock_value), sans
+rejouer l'historique. rebuild_layers() rejoue l'historique des seuls
+articles dont un mouvement passé a été modifié (ou après un chargement en
+masse).
+"""
+from collections import defaultdict, deque
+from decimal import Decimal
+
+from django.db.models import Case, F, Min, Sum, When
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import COST_PRECISION, CostLayer, Item, Movement
+from .signals import movements_posted
+
+BATCH_SIZE = 500
+
+
+def stock_value(when=None, method=None, items=None):
+    """
+    Valeur du stock à une date, à un instant ou maintenant, pour tout
+    l'entrepôt (ou les articles de items) : une seule requête.
+    """
+    queryset = Item.objects.all() if items is None else items
+    total = queryset.with_stock_value(when, method).aggregate(total=Sum('stock_value'))['total']
+    return (total or Decimal(0)).quantize(COST_PRECISION)
+
+
+# --- COUCHES FIFO ---
+
+def _consume(queue, quantity, touched):
+    """Sort quantity des couches les plus anciennes ; retourne la valeur sortie"""
+    value = Decimal(0)
+    while quantity and queue:
+        layer = queue[0]
+        taken = min(quantity, layer.remaining)
+        layer.remaining -= taken
+        quantity -= taken
+        value += taken * layer.unit_cost
+        touched[id(layer)] = layer
+        if not layer.remaining:
+            queue.popleft()
+    # Au-delà des couches (stock saisi hors mouvement) : rien à valoriser
+    return value
+
+
+def _apply(movement, queue, new_layers, touched, price):
+    """Applique un mouvement aux couches de son article ; retourne l'écart de valeur"""
+    if movement.type_mouvement != 'ENTREE':
+        return -_consume(queue, movement.quantite, touched)
+    layer = CostLayer(
+        item_id=movement.item_id,
+        movement_id=movement.pk,
+        received_at=movement.date,
+        quantity=movement.quantite,
+        remaining=movement.quantite,
+        unit_cost=price if movement.unit_cost is None else movement.unit_cost,
+    )
+    queue.append(layer)
+    new_layers.append(layer)
+    return layer.quantity * Decimal(str(layer.unit_cost))
+
+
+def _save(new_layers, touched, movements):
+    # Couches déjà en base dont une sortie a réduit le reste ; rien à
+    # écrire, aucune requête
+    existing = [layer for layer in touched.values() if layer.pk is not None]
+    if new_layers:
+        CostLayer.objects.bulk_create(new_layers, batch_size=BATCH_SIZE)
+    if existing:
+        CostLayer.objects.bulk_update(existing, ['remaining'], batch_size=BATCH_SIZE)
+    if movements:
+        Movement.objects.bulk_update(movements, ['fifo_value_after'], batch_size=BATCH_SIZE)
+
+
+def rebuild_layers(item_ids):
+    """
+    Reconstruit les couches FIFO et la valeur FIFO des mouvements des
+    articles item_ids en rejouant leur historique.
+
+    Les couches sans mouvement (stock d'ouverture, entrées archivées à la
+    clôture d'une période) sont conservées : les sorties prenant toujours
+    les plus anciennes, le stock d'ouverture (stock actuel - somme des
+    mouvements) occupe les plus récentes. Le stock qu'elles ne couvrent pas
+    forme une couche au prix unitaire de l'article.
+    """
+    item_ids = list(item_ids)
+    signed = Case(When(type_mouvement='ENTREE', then=F('quantite')), default=-F('quantite'))
+    totals = dict(
+        Movement.objects.filter(item_id__in=item_ids)
+        .values('item').annotate(total=Sum(signed)).values_list('item', 'total')
+    )
+    first_dates = dict(
+        Movement.objects.filter(item_id__in=item_ids)
+        .values('item').annotate(first=Min('date')).values_list('item', 'first')
+    )
+    kept = defaultdict(list)
+    for layer in CostLayer.objects.filter(item_id__in=item_ids, movement__isnull=True).order_by('pk'):
+        kept[layer.item_id].append(layer)
+    CostLayer.objects.filter(item_id__in=item_ids, movement__isnull=False).delete()
+
+    queues, values, prices, new_layers = {}, {}, {}, []
+    for pk, quantity, price in Item.objects.filter(pk__in=item_ids).values_list('pk', 'quantity', 'unit_price'):
+        prices[pk] = price
+        uncovered = max(quantity - totals.get(pk, 0), 0)
+        for layer in reversed(kept[pk]):
+            layer.remaining = min(layer.quantity, uncovered)
+            uncovered -= layer.remaining
+        layers = [layer for layer in kept[pk] if layer.remaining]
+        if uncovered:
+            layer = CostLayer(
+                item_id=pk,
+                # Sans mouvement : stock d'ouverture sans date, antérieur à toute date
+                received_at=first_dates.get(pk),
+                quantity=uncovered,
+                remaining=uncovered,
+                unit_cost=price,
+            )
+            layers.append(layer)
+            new_layers.append(layer)
+        queues[pk] = deque(layers)
+        values[pk] = sum((layer.remaining * Decimal(str(layer.unit_cost)) for layer in layers), Decimal(0))
+
+    touched, batch = {}, []
+    rows = (
+        Movement.objects.filter(item_id__in=item_ids)
+        .order_by('item', 'date', 'pk')
+        .only('pk', 'item_id', 'type_mouvement', 'quantite', 'unit_cost', 'date', 'fifo_value_after')
+    )
+    for movement in rows.iterator(chunk_size=2000):
+        item_id = movement.item_id
+        values[item_id] += _apply(movement, queues[item_id], new_layers, touched, prices[item_id])
+        # Seules les valeurs qui changent sont réécrites
+        if movement.fifo_value_after == values[item_id]:
+            continue
+        movement.fifo_value_after = values[item_id]
+        batch.append(movement)
+        if len(batch) >= BATCH_SIZE:
+            Movement.objects.bulk_update(batch, ['fifo_value_after'])
+            batch = []
+    _save(new_layers, {}, batch)
+    CostLayer.objects.bulk_update(
+        [layer for layers in kept.values() for layer in layers], ['remaining'], batch_size=BATCH_SIZE
+    )
+    return len(new_layers)
+
+
+@receiver(movements_posted, sender=Movement, dispatch_uid='valuation_movements_posted')
+def update_layers(sender, movements, created, stock, prices=None, **kwargs):
+    """Couches FIFO et valeur FIFO des mouvements postés, dans la transaction de postage"""
+    if not created:
+        # Mouvement passé modifié : les sorties suivantes ont pu changer de couches
+        rebuild_layers(stock)
+        return
+
+    # Entrées déjà valorisées au postage (couches lues avec le stock) : il
+    # reste à ouvrir leurs couches, sans relire ni réécrire quoi que ce soit
+    valued = set(stock)
+    for movement in movements:
+        if movement.type_mouvement != 'ENTREE' or movement.fifo_value_after is None:
+            valued.discard(movement.item_id)
+    new_layers, touched, changed = [], {}, []
+    for movement in movements:
+        if movement.item_id in valued:
+            _apply(movement, deque(), new_layers, touched, None)
+    pending = {item_id: before for item_id, (before, _) in stock.items() if item_id not in valued}
+    if not pending:
+        _save(new_layers, touched, changed)
+        return
+
+    queues = {item_id: deque() for item_id in pending}
+    values = {item_id: Decimal(0) for item_id in pending}
+    for layer in CostLayer.objects.filter(item_id__in=list(pending), remaining__gt=0).order_by('pk'):
+        queues[layer.item_id].append(layer)
+        values[layer.item_id] += layer.remaining * layer.unit_cost
+
+    # Écart entre le stock et les couches (article créé sans stock d'ouverture
+    # connu, quantité corrigée à la main) : couche la plus récente au prix de
+    # l'article, ou sortie des couches les plus anciennes
+    gaps = {item_id: before - sum(layer.remaining for layer in queues[item_id])
+            for item_id, before in pending.items()}
+    # Prix transmis par le postage ; à défaut, lus pour les seuls écarts à
+    # combler et entrées sans coût d'entrée
+    if prices is None:
+        priced = {item_id for item_id, gap in gaps.items() if gap > 0}
+        priced.update(
+            movement.item_id for movement in movements
+            if movement.item_id in pending and movement.type_mouvement == 'ENTREE' and movement.unit_cost is None
+        )
+        prices = dict(Item.objects.filter(pk__in=priced).values_list('pk', 'unit_price')) if priced else {}
+    first_dates = {}
+    for movement in movements:
+        first_dates.setdefault(movement.item_id, movement.date)
+    for item_id, gap in gaps.items():
+        if gap > 0:
+            layer = CostLayer(
+                item_id=item_id,
+                received_at=first_dates.get(item_id) or timezone.now(),
+                quantity=gap,
+                remaining=gap,
+                unit_cost=prices[item_id],
+            )
+            queues[item_id].append(layer)
+            new_layers.append(layer)
+            values[item_id] += gap * Decimal(str(layer.unit_cost))
+        elif gap < 0:
+            values[item_id] -= _consume(queues[item_id], -gap, touched)
+
+    for movement in movements:
+        item_id = movement.item_id
+        if item_id not in pending:
+            continue
+        values[item_id] += _apply(movement, queues[item_id], new_layers, touched, prices.get(item_id))
+        # Valeur déjà écrite à l'insertion (mouvements d'ouverture d'un import) : pas d'UPDATE
+        if movement.fifo_value_after != values[item_id]:
+            movement.fifo_value_after = values[item_id]
+            changed.append(movement)
+    _save(new_layers, touched, changed)
+
+
+@receiver(post_save, sender=Item, dispatch_uid='valuation_opening_layer')
+def create_opening_layer(sender, instance, created, raw=False, **kwargs):
+    """Stock saisi à la création de l'article : couche d'ouverture à son prix"""
+    if created and not raw and instance.quantity > 0:
+        CostLayer.objects.create(
+            item=instance,
+            received_at=timezone.now(),
+            quantity=instance.quantity,
+            remaining=instance.quantity,
+            unit_cost=instance.unit_price,
+        )
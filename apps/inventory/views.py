@@ -1,8 +1,17 @@
 ﻿from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from django.core.exceptions import ValidationError
+from django.db.models import DecimalField, ExpressionWrapper, F
+from django.views.decorators.http import require_POST
+from core.routers import read_alias
 from .models import Category, Item, Movement, AcquisitionMode, Inventory, InventoryItem
-from .forms import ItemForm, MovementForm, InventoryForm, InventoryItemForm, CategoryForm
+from .forms import ItemForm, MovementForm, InventoryForm, InventoryItemForm, CategoryForm, InventorySessionForm
+from .counts import close_session, open_session, variance_by_category, variance_lines, variance_summary
+from .exports import MOVEMENT_HEADER, csv_response, filter_date_range, movement_rows
+from .page_cache import PAGE_TIMEOUT, catalogue_page, catalogue_version
+from .pagination import keyset_page
+from .search import get_backend
 
 # --- TABLEAU DE BORD ---
 @login_required
@@ -10,19 +19,73 @@ def dashboard(request):
     return render(request, 'inventory/dashboard.html', {'title': 'Tableau de Bord'})
 
 # --- LISTE ET DÉTAILS ---
+def _page_queries(request, next_cursor):
+    """Query strings de la première page et de la page suivante, filtres conservés"""
+    query = request.GET.copy()
+    query.pop('cursor', None)
+    first_query = query.urlencode()
+    if next_cursor is None:
+        return first_query, None
+    query['cursor'] = next_cursor
+    return first_query, query.urlencode()
+
 @login_required
+@catalogue_page
 def item_list(request):
-    items = Item.objects.all().order_by('name')
+    items = Item.objects.select_related('alert')
+    # Filtres côté serveur
+    category = request.GET.get('category')
+    status = request.GET.get('status')
+    query = request.GET.get('q', '').strip()
+    if category and category.isdigit():
+        items = items.filter(category_id=category)
+    if status:
+        items = items.filter(status=status)
+    if query:
+        items = get_backend().filter(items, query)
+
+    # Pagination par curseur sur (name, id)
+    items, next_cursor = keyset_page(items, ('name', 'id'), request.GET.get('cursor'))
+    first_query, next_query = _page_queries(request, next_cursor)
     return render(request, 'inventory/item_list.html', {
         'items': items, 
+        'categories': Category.objects.order_by('name'),
+        'statuses': Item.objects.order_by('status').values_list('status', flat=True).distinct(),
+        'first_query': first_query,
+        'next_query': next_query,
+        'catalogue_version': catalogue_version(),
+        'fragment_timeout': PAGE_TIMEOUT,
         'title': 'Inventaire Global'
     })
 
 @login_required
+@catalogue_page
 def item_detail(request, pk):
-    item = get_object_or_404(Item, pk=pk)
+    item = get_object_or_404(Item.objects.select_related('alert'), pk=pk)
     return render(request, 'inventory/item_detail.html', {'item': item, 'title': item.name})
 
+@login_required
+@catalogue_page
+def item_stock_card(request, pk):
+    """
+    Fiche de stock : historique de l'article, du plus récent au plus ancien,
+    avec le solde et le coût moyen écrits au postage (aucun cumul à refaire).
+    Chaque page est un parcours de l'index (item, date, id).
+    """
+    item = get_object_or_404(Item, pk=pk)
+    movements = item.movements.select_related('beneficiary').annotate(stock_value=ExpressionWrapper(
+        F('balance_after') * F('unit_cost_after'), output_field=DecimalField(max_digits=20, decimal_places=4),
+    ))
+    movements, next_cursor = keyset_page(movements, ('date', 'id'), request.GET.get('cursor'), descending=True)
+    first_query, next_query = _page_queries(request, next_cursor)
+    return render(request, 'inventory/stock_card.html', {
+        'item': item,
+        'movements': movements,
+        'first_query': first_query,
+        'next_query': next_query,
+        'title': f'Fiche de stock - {item.name}',
+    })
+
 # --- CRÉATION ---
 @login_required
 def item_create(request):
@@ -77,8 +140,89 @@ def item_delete(request, pk):
 # --- MOUVEMENTS ---
 @login_required
 def movement_list(request):
-    movements = Movement.objects.all().order_by('-created_at') # Vérifiez le nom du champ date dans votre modèle
+    movements = filter_date_range(
+        Movement.objects.select_related('item', 'beneficiary'),
+        request.GET.get('start'),
+        request.GET.get('end'),
+    )
+    category = request.GET.get('category')
+    type_mouvement = request.GET.get('type')
+    if category and category.isdigit():
+        movements = movements.filter(item__category_id=category)
+    if type_mouvement in dict(Movement.TYPES):
+        movements = movements.filter(type_mouvement=type_mouvement)
+
+    # Pagination par curseur sur (date, id), du plus récent au plus ancien
+    movements, next_cursor = keyset_page(movements, ('date', 'id'), request.GET.get('cursor'), descending=True)
+    first_query, next_query = _page_queries(request, next_cursor)
     return render(request, 'inventory/movement_list.html', {
         'movements': movements, 
+        'categories': Category.objects.order_by('name'),
+        'types': Movement.TYPES,
+        'first_query': first_query,
+        'next_query': next_query,
         'title': 'Mouvements de Stock'
-    })
\ No newline at end of file
+    })
+
+@login_required
+def movement_export(request):
+    """Export CSV des mouvements, filtré par période (?start=AAAA-MM-JJ&end=AAAA-MM-JJ)"""
+    # Réponse en flux, lue après la vue : alias de lecture fixé sur la requête
+    movements = filter_date_range(
+        Movement.objects.using(read_alias()), request.GET.get('start'), request.GET.get('end')
+    )
+    return csv_response('mouvements_stock.csv', MOVEMENT_HEADER, movement_rows(movements))
+
+
+# --- INVENTAIRES (SESSIONS DE COMPTAGE) ---
+@login_required
+def inventory_list(request):
+    inventories = Inventory.objects.select_related('category').order_by('-date')
+    return render(request, 'inventory/inventory_list.html', {
+        'inventories': inventories,
+        'form': InventorySessionForm(),
+        'title': 'Inventaires',
+    })
+
+@login_required
+@require_POST
+def inventory_open(request):
+    form = InventorySessionForm(request.POST)
+    if form.is_valid():
+        inventory = open_session(form.cleaned_data['description'], form.cleaned_data['category'])
+        messages.success(request, f"{inventory} ouvert : {inventory.items.count()} articles à compter.")
+        return redirect('inventory:inventory_detail', pk=inventory.pk)
+    messages.error(request, "Formulaire invalide.")
+    return redirect('inventory:inventory_list')
+
+@login_required
+def inventory_detail(request, pk):
+    """Rapport d'écarts : totaux, détail par catégorie et lignes en écart"""
+    inventory = get_object_or_404(Inventory.objects.select_related('category'), pk=pk)
+    lines = variance_lines(inventory).select_related('item')
+    if not request.GET.get('all'):
+        lines = lines.exclude(variance=0)
+    lines, next_cursor = keyset_page(lines, ('id',), request.GET.get('cursor'))
+    first_query, next_query = _page_queries(request, next_cursor)
+    return render(request, 'inventory/inventory_detail.html', {
+        'inventory': inventory,
+        'summary': variance_summary(inventory),
+        'categories': variance_by_category(inventory),
+        'lines': lines,
+        'first_query': first_query,
+        'next_query': next_query,
+        'title': str(inventory),
+    })
+
+@login_required
+@require_POST
+def inventory_close(request, pk):
+    inventory = get_object_or_404(Inventory, pk=pk)
+    try:
+        movements = close_session(inventory)
+    except ValidationError as exc:
+        for message in exc.messages[:10]:
+            messages.error(request, message)
+    else:
+        messages.success(request, f"Inventaire clôturé : {len(movements)} mouvements d'ajustement postés.")
+    return redirect('inventory:inventory_detail', pk=pk)
@@ -4,6 +4,8 @@ from .models import Employee, Department
 @admin.register(Employee)
 class EmployeeAdmin(admin.ModelAdmin):
     list_display = ('name', 'department')
+    list_select_related = ('department',)
+    search_fields = ('name',)
 
 @admin.register(Department)
 class DepartmentAdmin(admin.ModelAdmin):
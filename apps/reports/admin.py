@@ -1,3 +1,25 @@
 from django.contrib import admin
+from django.urls import reverse
+from django.utils.html import format_html
 
-# Register your models here.
+from .models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('label', 'kind', 'status', 'progress', 'created_by', 'created_at', 'download')
+    list_filter = ('status', 'kind')
+    list_select_related = ('created_by',)
+    readonly_fields = ('kind', 'label', 'params', 'status', 'progress', 'result', 'error',
+                       'created_by', 'created_at', 'started_at', 'finished_at')
+
+    def download(self, obj):
+        if obj.status != Job.DONE:
+            return '-'
+        return format_html('<a href="{}">Télécharger</a>', reverse('reports:job_download', args=[obj.pk]))
+
+    download.short_description = 'Résultat'
+
+    def has_add_permission(self, request):
+        # Les tâches sont créées par les actions de l'admin, pas à la main
+        return False
@@ -0,0 +1,159 @@
+"""
+File de tâches de fond adossée à la base (modèle Job).
+
+Les actions lourdes de l'admin appellent enqueue() et rendent la main
+immédiatement ; la commande run_stockpro_worker réclame les tâches en
+attente, exécute le traitement enregistré pour leur type et range le
+fichier produit dans MEDIA_ROOT/jobs/.
+"""
+import logging
+import tempfile
+import traceback
+
+from django.core.files import File
+from django.utils import timezone
+
+from core.instrumentation import Measurement
+from core.routers import replica_reads
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+HANDLERS = {}
+
+
+def register(kind):
+    """Enregistre le traitement d'un type de tâche : handler(job, output) -> nom du fichier"""
+    def decorator(handler):
+        HANDLERS[kind] = handler
+        return handler
+    return decorator
+
+
+def enqueue(kind, label, params=None, user=None):
+    if kind not in HANDLERS:
+        raise ValueError(f"Type de tâche inconnu : {kind}")
+    return Job.objects.create(kind=kind, label=label, params=params or {}, created_by=user)
+
+
+def claim_next():
+    """
+    Réclame la plus ancienne tâche en attente. Le passage à RUNNING est un
+    UPDATE conditionnel : deux workers ne peuvent pas prendre la même tâche.
+    """
+    candidates = Job.objects.filter(status=Job.PENDING).order_by('created_at', 'id')
+    for job_id in candidates.values_list('pk', flat=True)[:10]:
+        claimed = Job.objects.filter(pk=job_id, status=Job.PENDING).update(
+            status=Job.RUNNING, started_at=timezone.now()
+        )
+        if claimed:
+            return Job.objects.get(pk=job_id)
+    return None
+
+
+def run_job(job):
+    handler = HANDLERS.get(job.kind)
+    # Requêtes et durée du traitement, étiquetées par type de tâche (core.instrumentation)
+    with Measurement() as measurement:
+        try:
+            if handler is None:
+                raise ValueError(f"Type de tâche inconnu : {job.kind}")
+            with tempfile.TemporaryFile() as output:
+                filename = handler(job, output)
+                output.seek(0)
+                job.result.save(filename, File(output), save=False)
+            job.mark_finished(Job.DONE)
+        except Exception:
+            logger.exception("Échec de la tâche #%s (%s)", job.pk, job.kind)
+            job.mark_finished(Job.FAILED, error=traceback.format_exc())
+    measurement.observe('job', job.kind if handler else 'inconnu')
+    return job
+
+
+# --- TRAITEMENTS ---
+# Exports et rapports lisent sur l'alias de lecture (core.routers) ; la
+# progression de la tâche, elle, s'écrit toujours sur le primaire.
+
+@register('export_items_csv')
+@replica_reads
+def export_items_csv(job, output):
+    from apps.inventory.exports import ITEM_HEADER, item_rows
+    from apps.inventory.models import Item
+    items = Item.objects.filter(pk__in=job.params['ids'])
+    _write_csv(job, output, ITEM_HEADER, item_rows(items), len(job.params['ids']))
+    return 'inventaire_stock.csv'
+
+
+@register('export_movements_csv')
+@replica_reads
+def export_movements_csv(job, output):
+    from apps.inventory.exports import MOVEMENT_HEADER, movement_rows
+    from apps.inventory.models import Movement
+    movements = Movement.objects.filter(pk__in=job.params['ids'])
+    _write_csv(job, output, MOVEMENT_HEADER, movement_rows(movements), len(job.params['ids']))
+    return 'mouvements_stock.csv'
+
+
+@register('monthly_report')
+@replica_reads
+def monthly_report(job, output):
+    from apps.inventory.models import Item
+    from apps.inventory.reports import build_monthly_report
+    year, month = job.params['year'], job.params['month']
+    build_monthly_report(Item.objects.filter(pk__in=job.params['ids']), year, month, output)
+    return f'rapport_mensuel_stock_{year}_{month:02d}.pdf'
+
+
+@register('receipts')
+@replica_reads
+def receipts(job, output):
+    from apps.inventory.models import Movement
+    from apps.inventory.receipts import render_receipts
+    total = len(job.params['ids'])
+    render_receipts(
+        Movement.objects.filter(pk__in=job.params['ids']),
+        output,
+        progress=lambda done: job.set_progress(done, total),
+    )
+    return 'bon_de_sortie.pdf'
+
+
+@register('import_items')
+def import_items_file(job, output):
+    import csv
+    import io
+
+    from django.core.files.storage import default_storage
+
+    from apps.inventory.imports import count_rows, import_items, read_rows
+
+    path, filename = job.params['path'], job.params['filename']
+    try:
+        with default_storage.open(path, 'rb') as source:
+            total = count_rows(source, filename)
+            result = import_items(
+                read_rows(source, filename),
+                progress=lambda done: job.set_progress(done, total),
+            )
+    finally:
+        # Le fichier déposé n'est plus utile une fois importé
+        default_storage.delete(path)
+
+    text = io.TextIOWrapper(output, encoding='utf-8-sig', newline='')
+    writer = csv.writer(text)
+    writer.writerow(['Articles importés', result.created])
+    writer.writerow(['Lignes rejetées', len(result.errors)])
+    writer.writerow([])
+    writer.writerow(['Ligne', 'Erreur'])
+    writer.writerows(result.errors)
+    text.detach()
+    return 'rapport_import.csv'
+
+
+def _write_csv(job, output, header, rows, total):
+    from apps.inventory.exports import stream_csv
+    for index, line in enumerate(stream_csv(header, rows)):
+        output.write(line.encode('utf-8'))
+        if index % 1000 == 0:
+            job.set_progress(index, total)
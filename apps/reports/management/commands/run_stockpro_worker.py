@@ -0,0 +1,81 @@
+import multiprocessing
+import time
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections
+
+
+def work(poll_interval, once=False, metrics_port=None):
+    """Boucle d'un processus du pool : réclame et exécute les tâches en attente"""
+    # Avec la méthode 'spawn' (Windows), le processus fils repart de zéro :
+    # Django est initialisé avant d'importer les modèles
+    django.setup()
+    from reports.jobs import claim_next, run_job
+
+    if metrics_port:
+        # Histogrammes stockpro_* des tâches (type 'job'), un port par processus
+        from prometheus_client import start_http_server
+        start_http_server(metrics_port)
+
+    while True:
+        close_old_connections()
+        job = claim_next()
+        if job is None:
+            if once:
+                return
+            time.sleep(poll_interval)
+            continue
+        run_job(job)
+
+
+class Command(BaseCommand):
+    help = "Exécute les tâches de fond (exports, rapports, bons de sortie) avec un pool de processus"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=2, help="Nombre de processus du pool")
+        parser.add_argument('--poll-interval', type=float, default=1.0, help="Attente (s) quand la file est vide")
+        parser.add_argument('--once', action='store_true', help="Vider la file puis s'arrêter (sans pool)")
+        parser.add_argument('--requeue-running', action='store_true',
+                            help="Remettre en attente les tâches restées « En cours » (worker interrompu)")
+        parser.add_argument('--metrics-port', type=int, default=None,
+                            help="Exposer les métriques Prometheus (processus n : port + n)")
+
+    def handle(self, *args, **options):
+        from reports.models import Job
+
+        if options['requeue_running']:
+            count = Job.objects.filter(status=Job.RUNNING).update(status=Job.PENDING, started_at=None, progress=0)
+            self.stdout.write(f"{count} tâches remises en attente.")
+
+        if options['once']:
+            work(options['poll_interval'], once=True, metrics_port=options['metrics_port'])
+            return
+
+        def port(index):
+            return options['metrics_port'] + index if options['metrics_port'] else None
+
+        # Les processus fils ouvrent leurs propres connexions
+        connections.close_all()
+        processes = [
+            multiprocessing.Process(target=work, args=(options['poll_interval'], False, port(index)), daemon=True)
+            for index in range(options['processes'])
+        ]
+        for process in processes:
+            process.start()
+        self.stdout.write(self.style.SUCCESS(f"Worker démarré ({len(processes)} processus). Ctrl+C pour arrêter."))
+        try:
+            while True:
+                for index, process in enumerate(processes):
+                    if not process.is_alive():
+                        # Processus tombé : on le remplace pour garder la taille du pool
+                        processes[index] = multiprocessing.Process(
+                            target=work, args=(options['poll_interval'], False, port(index)), daemon=True
+                        )
+                        processes[index].start()
+                time.sleep(options['poll_interval'])
+        except KeyboardInterrupt:
+            for process in processes:
+                process.terminate()
+            for process in processes:
+                process.join()
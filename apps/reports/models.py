@@ -1,3 +1,59 @@
+from django.conf import settings
 from django.db import models
+from django.utils import timezone
 
-# Create your models here.
+# --- TÂCHES DE FOND ---
+
+class Job(models.Model):
+    """Traitement lourd (export, rapport, bons de sortie) exécuté hors requête par un worker"""
+    PENDING = 'PENDING'
+    RUNNING = 'RUNNING'
+    DONE = 'DONE'
+    FAILED = 'FAILED'
+    STATUSES = [
+        (PENDING, 'En attente'),
+        (RUNNING, 'En cours'),
+        (DONE, 'Terminé'),
+        (FAILED, 'Échec'),
+    ]
+
+    kind = models.CharField(max_length=50)
+    label = models.CharField(max_length=200)
+    params = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUSES, default=PENDING)
+    progress = models.PositiveSmallIntegerField(default=0)  # Pourcentage
+    result = models.FileField(upload_to='jobs/', blank=True)
+    error = models.TextField(blank=True)
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            # File d'attente du worker : tâches en attente, les plus anciennes d'abord
+            models.Index(fields=['status', 'created_at'], name='job_status_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.label} ({self.get_status_display()})"
+
+    @property
+    def is_finished(self):
+        return self.status in (self.DONE, self.FAILED)
+
+    def set_progress(self, done, total):
+        """Met à jour l'avancement sans réécrire le reste de la ligne"""
+        progress = min(100, int(done * 100 / total)) if total else 0
+        if progress != self.progress:
+            self.progress = progress
+            Job.objects.filter(pk=self.pk).update(progress=progress)
+
+    def mark_finished(self, status, error=''):
+        self.status = status
+        self.error = error
+        self.finished_at = timezone.now()
+        if status == self.DONE:
+            self.progress = 100
+        self.save(update_fields=['status', 'error', 'finished_at', 'progress', 'result'])
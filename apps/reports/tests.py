@@ -1,3 +1,113 @@
-from django.test import TestCase
+import shutil
+import tempfile
+from io import StringIO
 
-# Create your tests here.
+from django.contrib.auth.models import Permission, User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from reports.jobs import HANDLERS, claim_next, enqueue, register, run_job
+from reports.models import Job
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@register('test_echo')
+def echo(job, output):
+    output.write(job.params['text'].encode())
+    job.set_progress(1, 2)
+    return 'echo.txt'
+
+
+@register('test_failure')
+def failure(job, output):
+    raise RuntimeError("Erreur de rendu")
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class JobQueueTest(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.user = User.objects.create_superuser('admin', 'admin@test.com', 'pass')
+        self.client.force_login(self.user)
+
+    def test_type_inconnu_refuse(self):
+        with self.assertRaises(ValueError):
+            enqueue('inconnu', 'Tâche inconnue')
+
+    def test_claim_dans_l_ordre_et_une_seule_fois(self):
+        first = enqueue('test_echo', 'Première', {'text': 'a'})
+        second = enqueue('test_echo', 'Seconde', {'text': 'b'})
+        self.assertEqual(claim_next().pk, first.pk)
+        self.assertEqual(claim_next().pk, second.pk)
+        self.assertIsNone(claim_next())
+        self.assertEqual(Job.objects.filter(status=Job.RUNNING).count(), 2)
+
+    def test_resultat_sous_media_root(self):
+        enqueue('test_echo', 'Écho', {'text': 'bonjour'})
+        job = run_job(claim_next())
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.progress), (Job.DONE, 100))
+        self.assertTrue(job.result.path.startswith(MEDIA_ROOT))
+        self.assertTrue(job.result.name.startswith('jobs/'))
+        with job.result.open('rb') as result:
+            self.assertEqual(result.read(), b'bonjour')
+
+    def test_echec_enregistre(self):
+        enqueue('test_failure', 'Échec')
+        with self.assertLogs('reports.jobs', 'ERROR'):
+            job = run_job(claim_next())
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertIn('Erreur de rendu', job.error)
+        self.assertFalse(job.result)
+        status = self.client.get(f'/reports/jobs/{job.pk}/status/').json()
+        self.assertEqual(status['error'], 'RuntimeError: Erreur de rendu')
+        self.assertEqual(self.client.get(f'/reports/jobs/{job.pk}/download/').status_code, 404)
+
+    def test_pages_de_suivi(self):
+        job = enqueue('test_echo', 'Écho', {'text': 'x'}, user=self.user)
+        self.assertContains(self.client.get('/reports/jobs/'), 'Écho')
+        self.assertContains(self.client.get(f'/reports/jobs/{job.pk}/'), 'En attente')
+        status = self.client.get(f'/reports/jobs/{job.pk}/status/').json()
+        self.assertEqual((status['status'], status['finished']), (Job.PENDING, False))
+
+    def test_pages_reservees_au_staff(self):
+        job = enqueue('test_echo', 'Écho', {'text': 'x'})
+        self.client.logout()
+        self.assertEqual(self.client.get(f'/reports/jobs/{job.pk}/').status_code, 302)
+
+    def test_taches_d_un_autre_utilisateur(self):
+        own = enqueue('test_echo', 'Mon export', {'text': 'x'}, user=self.user)
+        run_job(claim_next())
+        clerk = User.objects.create_user('magasinier', password='pass', is_staff=True)
+        self.client.force_login(clerk)
+        for url in (f'/reports/jobs/{own.pk}/', f'/reports/jobs/{own.pk}/status/', f'/reports/jobs/{own.pk}/download/'):
+            self.assertEqual(self.client.get(url).status_code, 404)
+        self.assertNotContains(self.client.get('/reports/jobs/'), 'Mon export')
+        mine = enqueue('test_echo', 'Export magasin', {'text': 'y'}, user=clerk)
+        self.assertContains(self.client.get(f'/reports/jobs/{mine.pk}/'), 'Export magasin')
+        # Permission de consulter les tâches : toutes visibles
+        clerk.user_permissions.add(Permission.objects.get(codename='view_job'))
+        self.client.force_login(User.objects.get(pk=clerk.pk))
+        self.assertEqual(self.client.get(f'/reports/jobs/{own.pk}/download/').status_code, 200)
+
+    def test_commande_worker_once(self):
+        for text in ('a', 'b', 'c'):
+            enqueue('test_echo', 'Écho', {'text': text})
+        call_command('run_stockpro_worker', '--once', stdout=StringIO())
+        self.assertEqual(Job.objects.filter(status=Job.DONE).count(), 3)
+
+    def test_requeue_running(self):
+        enqueue('test_echo', 'Écho', {'text': 'a'})
+        claim_next()
+        call_command('run_stockpro_worker', '--once', '--requeue-running', stdout=StringIO())
+        self.assertEqual(Job.objects.get().status, Job.DONE)
+
+    def test_traitements_inventaire_enregistres(self):
+        for kind in ('export_items_csv', 'export_movements_csv', 'monthly_report', 'receipts'):
+            self.assertIn(kind, HANDLERS)
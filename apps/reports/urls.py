@@ -1,5 +1,13 @@
 from django.urls import path
 
+from . import views
+
 app_name = 'reports'
 
-urlpatterns = []
+urlpatterns = [
+    # Tâches de fond (exports, rapports, bons de sortie)
+    path('jobs/', views.job_list, name='job_list'),
+    path('jobs/<int:pk>/', views.job_detail, name='job_detail'),
+    path('jobs/<int:pk>/status/', views.job_status, name='job_status'),
+    path('jobs/<int:pk>/download/', views.job_download, name='job_download'),
+]
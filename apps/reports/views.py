@@ -1,3 +1,47 @@
-from django.shortcuts import render
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import FileResponse, Http404, JsonResponse
+from django.shortcuts import get_object_or_404, render
 
-# Create your views here.
+from .models import Job
+
+
+# --- SUIVI DES TÂCHES ---
+def _jobs(request):
+    """Tâches visibles : les siennes, toutes avec la permission de consulter les tâches"""
+    if request.user.has_perm('reports.view_job'):
+        return Job.objects.all()
+    return Job.objects.filter(created_by=request.user)
+
+
+@staff_member_required
+def job_list(request):
+    jobs = _jobs(request).select_related('created_by')[:100]
+    return render(request, 'reports/job_list.html', {'jobs': jobs, 'title': 'Tâches de fond'})
+
+
+@staff_member_required
+def job_detail(request, pk):
+    job = get_object_or_404(_jobs(request), pk=pk)
+    return render(request, 'reports/job_detail.html', {'job': job, 'title': job.label})
+
+
+@staff_member_required
+def job_status(request, pk):
+    """État de la tâche en JSON, interrogé périodiquement par la page de suivi"""
+    job = get_object_or_404(_jobs(request).only('status', 'progress', 'error', 'result'), pk=pk)
+    return JsonResponse({
+        'status': job.status,
+        'status_display': job.get_status_display(),
+        'progress': job.progress,
+        'finished': job.is_finished,
+        'error': job.error.strip().splitlines()[-1] if job.error else '',
+    })
+
+
+@staff_member_required
+def job_download(request, pk):
+    job = get_object_or_404(_jobs(request), pk=pk)
+    if job.status != Job.DONE or not job.result:
+        raise Http404
+    filename = job.result.name.rsplit('/', 1)[-1]
+    return FileResponse(job.result.open('rb'), as_attachment=True, filename=filename)
@@ -1,4 +1,5 @@
 # -*- coding: utf-8 -*-
+import copy
 import os
 import sys
 from pathlib import Path
@@ -35,20 +36,25 @@ INSTALLED_APPS = [
     'widget_tweaks',
     'import_export',
     'django_filters',
+    'rest_framework',
     'django_extensions',
     'django_prometheus',
     'debug_toolbar',  # AJOUTÉ ICI pour corriger l'erreur RuntimeError
     
     # Vos applications locales
+    'core',
     'accounts',
     'inventory', 
     'personnel',
     'reports',
+    'api',
 ]
 
 # --- 4. MIDDLEWARE ---
 MIDDLEWARE = [
     'django_prometheus.middleware.PrometheusBeforeMiddleware',
+    # Requêtes SQL, rendu et taille par vue / action admin (histogrammes Prometheus)
+    'core.middleware.InstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -87,21 +93,161 @@ TEMPLATES = [
 WSGI_APPLICATION = 'stockpro.wsgi.application'
 
 # --- 6. BASE DE DONNÉES (LOGIQUE RENDER VS LOCAL) ---
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+# PostgreSQL si DB_ENGINE=postgresql (paramètres DB_NAME, DB_USER,
+# DB_PASSWORD, DB_HOST, DB_PORT), SQLite sinon.
+#
+# Profil SQLite de production (moteur core.db.backends.sqlite3) : journal
+# WAL (lecteurs et écrivain simultanés), synchronous=NORMAL (sûr en WAL),
+# attente sur verrou au lieu d'une erreur, lecture par mmap, cache de pages
+# de 64 Mo, BEGIN IMMEDIATE pour les transactions et connexions persistantes.
+DB_ENGINE = config('DB_ENGINE', default='sqlite')
+SQLITE_TUNING = config('SQLITE_TUNING', default=True, cast=bool)
+
+if DB_ENGINE == 'postgresql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': config('DB_NAME', default='stockpro'),
+            'USER': config('DB_USER', default='stockpro'),
+            'PASSWORD': config('DB_PASSWORD', default=''),
+            'HOST': config('DB_HOST', default='localhost'),
+            'PORT': config('DB_PORT', default='5432'),
+            'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', default=600, cast=int),
+            'CONN_HEALTH_CHECKS': True,
+        }
     }
-}
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'core.db.backends.sqlite3',
+        }
+    }
+
+    if SQLITE_TUNING:
+        DATABASES['default'].update({
+            'OPTIONS': {
+                'transaction_mode': 'IMMEDIATE',
+                'pragmas': {
+                    'journal_mode': 'WAL',
+                    'synchronous': 'NORMAL',
+                    'busy_timeout': config('SQLITE_BUSY_TIMEOUT_MS', default=5000, cast=int),
+                    'mmap_size': config('SQLITE_MMAP_SIZE', default=256 * 1024 * 1024, cast=int),
+                    'cache_size': -config('SQLITE_CACHE_SIZE_KB', default=64 * 1024, cast=int),
+                },
+            },
+            'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', default=600, cast=int),
+            'CONN_HEALTH_CHECKS': True,
+        })
 
-if RENDER_EXTERNAL_HOSTNAME:
-    # Chemin vers le disque persistant sur Render
-    if os.path.exists('/var/lib/stockpro'):
-        DATABASES['default']['NAME'] = '/var/lib/stockpro/db.sqlite3'
+    if RENDER_EXTERNAL_HOSTNAME:
+        # Chemin vers le disque persistant sur Render
+        if os.path.exists('/var/lib/stockpro'):
+            DATABASES['default']['NAME'] = '/var/lib/stockpro/db.sqlite3'
+        else:
+            DATABASES['default']['NAME'] = os.path.join(BASE_DIR, 'db.sqlite3')
     else:
+        # Chemin local
         DATABASES['default']['NAME'] = os.path.join(BASE_DIR, 'db.sqlite3')
+
+# Alias de lecture : rapports, exports et tableau de bord y lisent (voir
+# core.routers), le postage des mouvements reste sur le primaire. Sous
+# PostgreSQL, DB_REPLICA_HOST / DB_REPLICA_PORT désignent la réplica ; sans
+# réplica (et sous SQLite) l'alias est une seconde connexion au primaire.
+# En test, c'est un miroir de 'default'.
+DATABASES['replica'] = copy.deepcopy(DATABASES['default'])
+DATABASES['replica']['TEST'] = {'MIRROR': 'default'}
+if DB_ENGINE == 'postgresql':
+    DATABASES['replica']['HOST'] = config('DB_REPLICA_HOST', default=DATABASES['default']['HOST'])
+    DATABASES['replica']['PORT'] = config('DB_REPLICA_PORT', default=DATABASES['default']['PORT'])
+    DATABASES['replica']['USER'] = config('DB_REPLICA_USER', default=DATABASES['default']['USER'])
+    DATABASES['replica']['PASSWORD'] = config('DB_REPLICA_PASSWORD', default=DATABASES['default']['PASSWORD'])
+
+DATABASE_ROUTERS = ['core.routers.ReadReplicaRouter']
+STOCKPRO_READ_ALIAS = 'replica'
+
+# --- 6 bis. CACHE ---
+# Cache partagé par tous les processus (serveur web, workers, commandes
+# close_period, seed_warehouse, refresh_forecasts) : les versions du
+# catalogue et de l'API y sont tenues. Redis si REDIS_URL est renseigné
+# (plusieurs serveurs), sinon fichiers sous CACHE_DIR (un seul serveur).
+REDIS_URL = config('REDIS_URL', default='')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
 else:
-    # Chemin local
-    DATABASES['default']['NAME'] = os.path.join(BASE_DIR, 'db.sqlite3')
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': config('CACHE_DIR', default=os.path.join(BASE_DIR, 'cache')),
+            'OPTIONS': {'MAX_ENTRIES': 10000},
+        }
+    }
+
+# Tests : cache en mémoire du processus (core.runner), jamais le cache partagé
+TEST_RUNNER = 'core.runner.StockproTestRunner'
+
+# Durée de vie des indicateurs du tableau de bord admin (secondes) ; les
+# écritures les invalident avant (voir inventory.dashboard)
+STOCKPRO_DASHBOARD_CACHE_TIMEOUT = config('STOCKPRO_DASHBOARD_CACHE_TIMEOUT', default=60, cast=int)
+
+# Durée de vie des pages et fragments du catalogue (secondes) ; une
+# écriture sur le catalogue les rend caducs avant (voir inventory.page_cache)
+STOCKPRO_PAGE_CACHE_TIMEOUT = config('STOCKPRO_PAGE_CACHE_TIMEOUT', default=600, cast=int)
+
+# --- 6 ter. API REST (lecture seule, /api/v1/) ---
+REST_FRAMEWORK = {
+    'DEFAULT_AUTHENTICATION_CLASSES': [
+        'rest_framework.authentication.SessionAuthentication',
+        'rest_framework.authentication.BasicAuthentication',  # Scanners et services
+    ],
+    'DEFAULT_PERMISSION_CLASSES': ['rest_framework.permissions.IsAuthenticated'],
+    'DEFAULT_RENDERER_CLASSES': ['rest_framework.renderers.JSONRenderer'],
+    'DEFAULT_VERSIONING_CLASS': 'rest_framework.versioning.URLPathVersioning',
+    'ALLOWED_VERSIONS': ['v1'],
+    'DEFAULT_PAGINATION_CLASS': 'api.pagination.StockProCursorPagination',
+    'PAGE_SIZE': 50,
+}
+
+# --- 6 quater. PRÉVISIONS ET SEUILS DE STOCK ---
+# Seuil d'alerte des articles sans prévision (historique insuffisant)
+STOCKPRO_CRITICAL_THRESHOLD = config('STOCKPRO_CRITICAL_THRESHOLD', default=10, cast=int)
+# Calcul nocturne des points de commande (manage.py refresh_forecasts)
+STOCKPRO_FORECAST_HISTORY_DAYS = config('STOCKPRO_FORECAST_HISTORY_DAYS', default=180, cast=int)
+STOCKPRO_LEAD_TIME_DAYS = config('STOCKPRO_LEAD_TIME_DAYS', default=7, cast=int)
+STOCKPRO_SERVICE_LEVEL = config('STOCKPRO_SERVICE_LEVEL', default=0.95, cast=float)
+# Valorisation du stock (rapports) : 'average' (coût moyen pondéré) ou 'fifo'
+STOCKPRO_VALUATION_METHOD = config('STOCKPRO_VALUATION_METHOD', default='average')
+
+# --- 6 quinquies. INSTRUMENTATION ---
+# Histogrammes stockpro_* exportés sur /metrics avec ceux de django_prometheus
+STOCKPRO_INSTRUMENTATION = config('STOCKPRO_INSTRUMENTATION', default=True, cast=bool)
+# /metrics : 404 tant que non activé ; ensuite staff connecté ou adresses du
+# collecteur (REMOTE_ADDR tel que reçu par Django, derrière un proxy : celle du proxy)
+STOCKPRO_METRICS_ENABLED = config('STOCKPRO_METRICS_ENABLED', default=False, cast=bool)
+STOCKPRO_METRICS_ALLOWED_IPS = [
+    ip.strip() for ip in config('STOCKPRO_METRICS_ALLOWED_IPS', default='127.0.0.1').split(',') if ip.strip()
+]
+# Journal des requêtes lentes (logger 'stockpro.slow_requests'), SQL compris
+STOCKPRO_SLOW_REQUEST_MS = config('STOCKPRO_SLOW_REQUEST_MS', default=1000, cast=int)
+STOCKPRO_SLOW_REQUEST_QUERIES = config('STOCKPRO_SLOW_REQUEST_QUERIES', default=100, cast=int)
+STOCKPRO_SLOW_REQUEST_MAX_SQL = config('STOCKPRO_SLOW_REQUEST_MAX_SQL', default=200, cast=int)
+# Rapport de référence de manage.py run_benchmarks
+STOCKPRO_BENCHMARK_BASELINE = config('STOCKPRO_BENCHMARK_BASELINE', default=str(BASE_DIR / 'benchmarks' / 'baseline.json'))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'stockpro.slow_requests': {'handlers': ['console'], 'level': 'WARNING', 'propagate': False},
+    },
+}
 
 # --- 7. INTERNATIONALISATION ---
 LANGUAGE_CODE = 'fr-fr'
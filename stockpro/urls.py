@@ -3,6 +3,8 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 
+from core import views as core_views
+
 from django.contrib import admin
 
 # Change le titre dans l'onglet du navigateur (ex: "Gestion de Stock | Admin")
@@ -27,6 +29,11 @@ urlpatterns = [
     # Autres Applications (SANS le préfixe "apps.")
     path('personnel/', include('personnel.urls')),
     path('reports/', include('reports.urls')),
+    path('api/', include('api.urls')),
+
+    # Métriques Prometheus (/metrics) : django_prometheus et histogrammes
+    # StockPro, désactivées par défaut et réservées (voir core.views.metrics)
+    path('metrics', core_views.metrics, name='prometheus-django-metrics'),
 ]
 
 # Configuration pour le développement (Debug Toolbar et Fichiers Media/Static)